@@ -0,0 +1,192 @@
+"""
+Load reporting and job admission for agent workers
+The worker advertises its real capacity to the LiveKit dispatcher (load_fnc)
+and refuses job requests that would push it over the threshold (request_fnc).
+Load is the more constrained of CPU and memory; job slots are a separate cap.
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+
+import psutil
+from livekit.agents import JobRequest, utils
+from livekit.agents.utils.hw import get_cpu_monitor
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+WORKER_LOAD = Gauge(
+    "chat_worker_load",
+    "Worker load per resource, 0-1",
+    ["resource"],
+    multiprocess_mode="livemax",
+)
+JOB_REQUESTS = Counter(
+    "chat_worker_job_requests_total", "Job requests by admission decision", ["decision"]
+)
+
+
+def memory_fraction() -> float:
+    """Used memory as a fraction of the container limit, or of the host"""
+    try:
+        with open("/sys/fs/cgroup/memory.max") as f:
+            limit = f.read().strip()
+        if limit != "max":
+            with open("/sys/fs/cgroup/memory.current") as f:
+                return int(f.read()) / int(limit)
+    except (OSError, ValueError):
+        pass
+    return psutil.virtual_memory().percent / 100
+
+
+@dataclass
+class LoadSnapshot:
+    cpu: float
+    memory: float
+    jobs: int
+    max_jobs: int
+
+    @property
+    def load(self) -> float:
+        return max(self.cpu, self.memory)
+
+    @property
+    def slots_full(self) -> bool:
+        return bool(self.max_jobs) and self.jobs >= self.max_jobs
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "load": self.load}
+
+
+class WorkerLoadMonitor:
+    """
+    `avatar_cost` is the share of the worker's CPU one rendering avatar takes,
+    used to project the CPU of sessions the measurements do not show yet.
+    It starts at the configured value and follows the CPU measured above the
+    idle baseline per active job, so it adapts to the host and avatar model.
+    Admitted jobs count as pending until the worker reports them running (or
+    `admission_timeout` passes without that happening).
+    """
+
+    def __init__(
+        self,
+        *,
+        threshold: float = 0.75,
+        max_jobs: int = 4,
+        avatar_cost: float = 0.2,
+        sample_interval: float = 0.5,
+        window: int = 10,
+        admission_timeout: float = 30.0,
+    ):
+        self.threshold = threshold
+        self.max_jobs = max_jobs
+        self.avatar_cost = avatar_cost
+        self.sample_interval = sample_interval
+        self.admission_timeout = admission_timeout
+
+        self._cpu_monitor = get_cpu_monitor()
+        self._cpu_avg = utils.MovingAverage(window)
+        self._idle_cpu: Optional[float] = None
+        self._lock = threading.Lock()
+        self._active_jobs = 0
+        # job id -> admission time, for jobs accepted but not running yet
+        self._pending_jobs: Dict[str, float] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._sample_cpu, daemon=True, name="chat_load_monitor"
+            )
+            self._thread.start()
+
+    def _sample_cpu(self):
+        while True:
+            cpu = self._cpu_monitor.cpu_percent(interval=self.sample_interval)
+            with self._lock:
+                self._cpu_avg.add_sample(cpu)
+                if not self._active_jobs and not self._pending_jobs:
+                    # Idle: this is what the worker uses without any session
+                    self._idle_cpu = (
+                        cpu
+                        if self._idle_cpu is None
+                        else 0.9 * self._idle_cpu + 0.1 * cpu
+                    )
+                elif self._active_jobs and self._idle_cpu is not None:
+                    # Learn the per-avatar render cost from what sessions add
+                    measured = max(0.0, cpu - self._idle_cpu) / self._active_jobs
+                    self.avatar_cost = 0.9 * self.avatar_cost + 0.1 * measured
+
+    def snapshot(self, extra_jobs: int = 0) -> LoadSnapshot:
+        """Current load, or the projected load with `extra_jobs` more sessions"""
+        with self._lock:
+            unmeasured = len(self._pending_jobs) + extra_jobs
+            jobs = self._active_jobs + unmeasured
+            cpu = self._cpu_avg.get_avg()
+            avatar_cost = self.avatar_cost
+        return LoadSnapshot(
+            # Measured CPU already includes the running sessions' avatars
+            cpu=cpu + unmeasured * avatar_cost,
+            memory=memory_fraction(),
+            jobs=jobs,
+            max_jobs=self.max_jobs,
+        )
+
+    def load_fnc(self, worker) -> float:
+        """WorkerOptions.load_fnc: the load advertised to the dispatcher"""
+        running = {info.job.id for info in worker.active_jobs}
+        expired = time.monotonic() - self.admission_timeout
+        with self._lock:
+            self._active_jobs = len(running)
+            self._pending_jobs = {
+                job_id: admitted_at
+                for job_id, admitted_at in self._pending_jobs.items()
+                if job_id not in running and admitted_at > expired
+            }
+        snapshot = self.snapshot()
+        WORKER_LOAD.labels("cpu").set(snapshot.cpu)
+        WORKER_LOAD.labels("memory").set(snapshot.memory)
+        if snapshot.max_jobs:
+            WORKER_LOAD.labels("jobs").set(snapshot.jobs / snapshot.max_jobs)
+        # Full slots mark the worker unavailable whatever the resource load
+        return 1.0 if snapshot.slots_full else min(1.0, snapshot.load)
+
+    async def request_fnc(self, request: JobRequest):
+        """WorkerOptions.request_fnc: accept only if one more session still fits"""
+        projected = self.snapshot(extra_jobs=1)
+        if projected.max_jobs and projected.jobs > projected.max_jobs:
+            JOB_REQUESTS.labels("rejected").inc()
+            logger.warning(
+                f"Rejecting job for room {request.room.name}: all "
+                f"{projected.max_jobs} job slots are taken"
+            )
+            await request.reject()
+            return
+        if projected.load > self.threshold:
+            JOB_REQUESTS.labels("rejected").inc()
+            logger.warning(
+                f"Rejecting job for room {request.room.name}: projected load "
+                f"{projected.load:.2f} > {self.threshold:.2f} ({projected.as_dict()})"
+            )
+            await request.reject()
+            return
+
+        with self._lock:
+            self._pending_jobs[request.id] = time.monotonic()
+        JOB_REQUESTS.labels("accepted").inc()
+        await request.accept()
+
+
+def get_load_monitor() -> WorkerLoadMonitor:
+    """Monitor configured from CHAT_LOAD_THRESHOLD, CHAT_MAX_JOBS, CHAT_AVATAR_RENDER_COST"""
+    monitor = WorkerLoadMonitor(
+        threshold=float(os.getenv("CHAT_LOAD_THRESHOLD", "0.75")),
+        max_jobs=int(os.getenv("CHAT_MAX_JOBS", "4")),
+        avatar_cost=float(os.getenv("CHAT_AVATAR_RENDER_COST", "0.2")),
+    )
+    monitor.start()
+    return monitor
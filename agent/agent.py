@@ -8,6 +8,7 @@ Now enhanced with an engaging, child-friendly avatar for better interaction
 """
 
 import asyncio
+import functools
 import json
 import aiohttp
 import logging
@@ -16,28 +17,56 @@ import random
 import time
 import re
 import pathlib
-from typing import Dict, List
+from collections import deque
+from typing import Dict, List, Optional
 from enum import Enum
 from typing import Literal
 
 from dotenv import load_dotenv
 from dotenv.variables import Literal
 
+# Load environment variables before anything imports prometheus_client
+# (livekit.agents and the metric modules below): it reads
+# PROMETHEUS_MULTIPROC_DIR once, at import time
+load_dotenv()
+
 from livekit import agents, rtc
 from livekit.agents import AgentSession, Agent, RoomInputOptions, RoomOutputOptions
-from livekit.plugins import (
-    elevenlabs,
-    cartesia,
-    noise_cancellation,
-    silero,
-    bithuman,
-    google,
-)
 from livekit.agents import ChatContext
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
-
-# Load environment variables
-load_dotenv()
+from livekit.agents.llm import ChatMessage, StopResponse
+
+from admission import get_load_monitor
+from avatar_assets import MemoryUsage, job_memory_report
+from background_tasks import get_background_tasks
+from backend_client import get_backend_client
+from barge_in import BargeInController
+from coalescer import UtteranceCoalescer
+from conversation_context import CONTEXT_SUMMARY_PROMPT, ConversationContextManager
+from outbox import AnalyticsOutbox
+from phrase_cache import PhraseAudioCache
+from prompt_cache import PromptCache
+from provider_router import ProviderRouter
+from providers import (
+    IMPORT_TIMES,
+    TTS_MODEL,
+    TTS_VOICE_ID,
+    TTS_VOICE_SETTINGS,
+    ProviderConfig,
+    import_module,
+)
+from session_checkpoint import ResumeWindow, SessionCheckpoints, get_session_checkpoints
+from session_summary import RollingSessionSummary
+from timing import PhaseTimer
+from topics import DEFAULT_LANGUAGE
+from transcript_upload import TranscriptUploader
+from usage import UsageMeter
+from utterance import (
+    UtteranceAnalysis,
+    UtteranceAnalyzer,
+    build_utterance_analyzers,
+    get_utterance_analyzer,
+)
+from voice_metrics import VoiceLatencyRecorder, start_metrics_server
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -50,17 +79,16 @@ logging.getLogger("httpx").setLevel(logging.WARNING)  # Reduce HTTP client noise
 # Get current directory path
 CURRENT_DIR = pathlib.Path(__file__).parent.resolve()
 
-# Environment variable validation
+# STT/LLM/TTS/avatar backends selected by CHAT_*_PROVIDER (see providers.py);
+# their plugins are imported in prewarm, not here
+PROVIDER_CONFIG = ProviderConfig.from_env()
+
+# Environment variable validation: only the selected providers' keys are needed
 required_env_vars = [
     "LIVEKIT_URL",
     "LIVEKIT_API_KEY",
     "LIVEKIT_API_SECRET",
-    "GOOGLE_API_KEY",
-    "ELEVENLABS_API_KEY",
-    "CARTESIA_API_KEY",
-    "BITHUMAN_API_SECRET",
-    "BITHUMAN_MODEL_PATH",
-]
+] + PROVIDER_CONFIG.required_env()
 
 missing_vars = [var for var in required_env_vars if not os.getenv(var)]
 if missing_vars:
@@ -68,6 +96,32 @@ if missing_vars:
         f"Missing required environment variables: {', '.join(missing_vars)}"
     )
 
+# (provider, model) labels for the latency histograms
+PIPELINE_PROVIDERS = PROVIDER_CONFIG.labels()
+
+# Noise cancellation is a LiveKit Cloud feature
+USE_NOISE_CANCELLATION = os.getenv("LIVEKIT_URL", "").startswith("wss://")
+
+# Local Prometheus endpoint served by the worker process (0 disables it)
+METRICS_PORT = int(os.getenv("CHAT_METRICS_PORT", "9100"))
+
+
+def get_chunk_content(chunk) -> str:
+    """Extract the text delta from an LLM stream chunk"""
+    if hasattr(chunk, "choices") and chunk.choices:
+        if hasattr(chunk.choices[0], "delta") and chunk.choices[0].delta:
+            if (
+                hasattr(chunk.choices[0].delta, "content")
+                and chunk.choices[0].delta.content
+            ):
+                return chunk.choices[0].delta.content
+    # Alternative for different LLM response formats
+    elif hasattr(chunk, "delta") and chunk.delta:
+        return getattr(chunk.delta, "content", None) or ""
+    elif hasattr(chunk, "content"):
+        return chunk.content or ""
+    return ""
+
 
 class AvatarEmotion(Enum):
     """Emotions for the kid-friendly avatar"""
@@ -93,180 +147,177 @@ class AvatarGesture(Enum):
     DANCE = "dance"
 
 
+# Token budgets for the persistent LLM conversation context
+CONTEXT_TURN_BUDGET = int(os.getenv("CHAT_CONTEXT_TURN_BUDGET", "1200"))
+CONTEXT_SUMMARY_BUDGET = int(os.getenv("CHAT_CONTEXT_SUMMARY_BUDGET", "300"))
+
+# Maximum number of utterances kept in memory for the session transcript
+HISTORY_CAP = int(os.getenv("CHAT_HISTORY_CAP", "200"))
+
+# Where the clinical summary is written: "agent" keeps the rolling summary and
+# sends it with the analytics; "backend" leaves it to the backend's Celery
+# workers, which summarize the uploaded transcript (they always skip sessions
+# that arrive with a summary)
+SUMMARY_MODE = os.getenv("CHAT_SUMMARY_MODE", "agent").lower()
+
+# Rolling clinical summary: refreshed every N turns or after an idle gap
+SUMMARY_EVERY_TURNS = int(os.getenv("CHAT_SUMMARY_EVERY_TURNS", "6"))
+SUMMARY_IDLE_SECONDS = float(os.getenv("CHAT_SUMMARY_IDLE_SECONDS", "15"))
+
+# Fragments of one child burst ("car... red... go") arriving within the window
+# are merged into one turn; the window adapts between MIN and MAX (0 disables)
+COALESCE_WINDOW = float(os.getenv("CHAT_COALESCE_WINDOW_MS", "600")) / 1000
+COALESCE_MIN_WINDOW = float(os.getenv("CHAT_COALESCE_MIN_WINDOW_MS", "250")) / 1000
+COALESCE_MAX_WINDOW = float(os.getenv("CHAT_COALESCE_MAX_WINDOW_MS", "1500")) / 1000
+
+# Transcript chunks are appended to the backend every N turns or after an idle gap
+TRANSCRIPT_FLUSH_TURNS = int(os.getenv("CHAT_TRANSCRIPT_FLUSH_TURNS", "20"))
+TRANSCRIPT_FLUSH_SECONDS = float(os.getenv("CHAT_TRANSCRIPT_FLUSH_SECONDS", "30"))
+
+
+class Utterance:
+    """Compact record of a single conversation turn"""
+
+    __slots__ = ("role", "content", "timestamp", "word_count")
+
+    def __init__(self, role: str, content: str, word_count: int = 0):
+        self.role = role
+        self.content = content
+        self.timestamp = time.time()
+        self.word_count = word_count
+
+
 class ConversationAnalytics:
     """
     Analytics tracker for conversation statistics and language development metrics
+    Aggregates are updated incrementally, so statistics never rescan the history
     """
 
-    def __init__(self):
+    def __init__(
+        self, language: str = DEFAULT_LANGUAGE, history_cap: int = HISTORY_CAP
+    ):
         self.session_start = time.time()
-        self.child_utterances = []
-        self.assistant_responses = []
         self.child_words = set()
         self.encouragements_given = 0
         self.topics_mentioned = set()
-        self.conversation_history = []
-
-        # Topic keywords for detection
-        self.topic_keywords = {
-            "animals": [
-                "dog",
-                "cat",
-                "bird",
-                "cow",
-                "pig",
-                "horse",
-                "duck",
-                "sheep",
-                "chicken",
-                "fish",
-            ],
-            "colors": [
-                "red",
-                "blue",
-                "green",
-                "yellow",
-                "orange",
-                "purple",
-                "pink",
-                "black",
-                "white",
-                "brown",
-            ],
-            "toys": [
-                "ball",
-                "car",
-                "truck",
-                "doll",
-                "teddy",
-                "blocks",
-                "train",
-                "puzzle",
-                "bike",
-                "book",
-            ],
-            "food": [
-                "apple",
-                "banana",
-                "milk",
-                "cookie",
-                "bread",
-                "water",
-                "juice",
-                "cake",
-                "pizza",
-                "cheese",
-            ],
-            "family": [
-                "mama",
-                "dada",
-                "mommy",
-                "daddy",
-                "baby",
-                "sister",
-                "brother",
-                "grandma",
-                "grandpa",
-            ],
-            "actions": [
-                "go",
-                "run",
-                "jump",
-                "play",
-                "eat",
-                "drink",
-                "sleep",
-                "walk",
-                "dance",
-                "sing",
-            ],
-            "body_parts": [
-                "head",
-                "eyes",
-                "nose",
-                "mouth",
-                "hands",
-                "feet",
-                "ears",
-                "hair",
-                "arms",
-                "legs",
-            ],
-            "emotions": [
-                "happy",
-                "sad",
-                "mad",
-                "excited",
-                "tired",
-                "hungry",
-                "love",
-                "like",
-                "want",
-            ],
-        }
-
-    def add_child_utterance(self, text: str):
-        """Add a child utterance for analysis"""
+        # Only the most recent turns are retained; aggregates cover the whole session
+        self.conversation_history: deque[Utterance] = deque(maxlen=history_cap)
+
+        # Running aggregates
+        self.child_utterance_count = 0
+        self.assistant_response_count = 0
+        self.total_child_words = 0
+        self.best_utterance = ""
+        self.best_utterance_word_count = 0
+
+        # Compiled analyzer for the child's language (shared per worker)
+        self.analyzer = get_utterance_analyzer(language)
+
+        # Fed every turn once the session's LLM is available
+        self.rolling_summary: Optional[RollingSessionSummary] = None
+        # Streams every turn to the backend transcript store
+        self.transcript_uploader: Optional[TranscriptUploader] = None
+
+    def add_child_utterance(
+        self, text: str, analysis: Optional[UtteranceAnalysis] = None
+    ):
+        """Add a child utterance for analysis (pass `analysis` to reuse one)"""
         if not text or not text.strip():
             return
 
-        clean_text = text.strip().lower()
-        self.child_utterances.append(
-            {
-                "text": clean_text,
-                "timestamp": time.time(),
-                "word_count": len(clean_text.split()),
-            }
-        )
+        if analysis is None:
+            analysis = self.analyzer.analyze(text)
+        word_count = analysis.word_count
 
-        # Extract words (remove punctuation)
-        words = re.findall(r"\b[a-zA-Z]+\b", clean_text.lower())
-        self.child_words.update(words)
+        self.child_utterance_count += 1
+        self.total_child_words += word_count
+        if word_count > self.best_utterance_word_count:
+            self.best_utterance = analysis.text
+            self.best_utterance_word_count = word_count
 
-        # Detect topics
-        for topic, keywords in self.topic_keywords.items():
-            if any(keyword in clean_text for keyword in keywords):
-                self.topics_mentioned.add(topic)
+        self.child_words.update(analysis.vocabulary)
+        self.topics_mentioned.update(analysis.topics)
 
         # Add to conversation history
-        self.conversation_history.append(
-            {"role": "child", "content": text, "timestamp": time.time()}
-        )
+        utterance = Utterance("child", text, word_count)
+        self.conversation_history.append(utterance)
+        if self.rolling_summary is not None:
+            self.rolling_summary.add_turn("child", text)
+        if self.transcript_uploader is not None:
+            self.transcript_uploader.add_turn("child", text, utterance.timestamp)
 
     def add_assistant_response(self, text: str):
         """Add an assistant response"""
-        self.assistant_responses.append({"text": text, "timestamp": time.time()})
+        self.assistant_response_count += 1
 
         # Add to conversation history
-        self.conversation_history.append(
-            {"role": "assistant", "content": text, "timestamp": time.time()}
-        )
+        utterance = Utterance("assistant", text)
+        self.conversation_history.append(utterance)
+        if self.rolling_summary is not None:
+            self.rolling_summary.add_turn("assistant", text)
+        if self.transcript_uploader is not None:
+            self.transcript_uploader.add_turn("assistant", text, utterance.timestamp)
+
+    def get_transcript(self) -> List[Dict]:
+        """Retained turns in upload format for the backend"""
+        return [
+            {"role": u.role, "content": u.content, "timestamp": round(u.timestamp, 3)}
+            for u in self.conversation_history
+        ]
 
     def increment_encouragement(self):
         """Increment encouragement counter"""
         self.encouragements_given += 1
 
+    def snapshot(self) -> Dict:
+        """Aggregates and retained turns, for a session checkpoint"""
+        return {
+            "session_start": self.session_start,
+            "child_words": sorted(self.child_words),
+            "topics_mentioned": sorted(self.topics_mentioned),
+            "encouragements_given": self.encouragements_given,
+            "child_utterance_count": self.child_utterance_count,
+            "assistant_response_count": self.assistant_response_count,
+            "total_child_words": self.total_child_words,
+            "best_utterance": self.best_utterance,
+            "best_utterance_word_count": self.best_utterance_word_count,
+            "history": [
+                [u.role, u.content, u.word_count, u.timestamp]
+                for u in self.conversation_history
+            ],
+        }
+
+    def restore(self, state: Dict):
+        """Continue from a checkpoint (the session keeps its original start)"""
+        self.session_start = state["session_start"]
+        self.child_words = set(state["child_words"])
+        self.topics_mentioned = set(state["topics_mentioned"])
+        self.encouragements_given = state["encouragements_given"]
+        self.child_utterance_count = state["child_utterance_count"]
+        self.assistant_response_count = state["assistant_response_count"]
+        self.total_child_words = state["total_child_words"]
+        self.best_utterance = state["best_utterance"]
+        self.best_utterance_word_count = state["best_utterance_word_count"]
+        self.conversation_history.clear()
+        for role, content, word_count, timestamp in state["history"]:
+            utterance = Utterance(role, content, word_count)
+            utterance.timestamp = timestamp
+            self.conversation_history.append(utterance)
+
     def get_statistics(self) -> Dict:
         """Generate comprehensive conversation statistics"""
         session_duration = time.time() - self.session_start
 
-        # Calculate averages
-        child_utterance_count = len(self.child_utterances)
-        assistant_response_count = len(self.assistant_responses)
+        child_utterance_count = self.child_utterance_count
+        assistant_response_count = self.assistant_response_count
 
+        # Calculate averages
         avg_utterance_length = (
-            sum(u["word_count"] for u in self.child_utterances) / child_utterance_count
+            self.total_child_words / child_utterance_count
             if child_utterance_count > 0
             else 0
         )
 
-        # Find best (longest) utterance
-        best_utterance = ""
-        if self.child_utterances:
-            best_utterance = max(self.child_utterances, key=lambda x: x["word_count"])[
-                "text"
-            ]
-
         # Calculate child-to-AI ratio
         child_to_ai_ratio = (
             child_utterance_count / assistant_response_count
@@ -284,13 +335,39 @@ class ConversationAnalytics:
             "encouragements_given": self.encouragements_given,
             "child_to_ai_ratio": round(child_to_ai_ratio, 2),
             "topics_detected": list(self.topics_mentioned),
-            "best_utterance": best_utterance,
-            "total_child_words_spoken": sum(
-                u["word_count"] for u in self.child_utterances
-            ),  # Extra for backend
+            "best_utterance": self.best_utterance,
+            "total_child_words_spoken": self.total_child_words,  # Extra for backend
         }
 
 
+ENCOURAGEMENT_PHRASES = [
+    "Great job!",
+    "You're doing wonderful!",
+    "I love hearing your voice!",
+    "Keep going, you're amazing!",
+    "What a fantastic try!",
+    "You're so smart!",
+    "I'm so proud of you!",
+    "That was perfect!",
+]
+
+# Sound annotations STT providers write for non-verbal vocalizations,
+# e.g. "[laughs]", "(babbling)" or "*giggles*"
+SOUND_ANNOTATION = re.compile(r"\[[^\]]*\]|\([^)]*\)|\*[^*]*\*")
+
+
+def is_non_verbal(text: str, analyzer: UtteranceAnalyzer) -> bool:
+    """True when a turn has no words once sound annotations are removed"""
+    return analyzer.analyze(SOUND_ANNOTATION.sub(" ", text)).word_count == 0
+
+
+# Said instead of a generated greeting when a dropped session is resumed
+WELCOME_BACK_PHRASE = "Yay, you're back! Let's keep playing!"
+
+# Fixed phrases pre-synthesized into the phrase cache
+CACHED_PHRASES = ENCOURAGEMENT_PHRASES + [WELCOME_BACK_PHRASE]
+
+
 class KidFriendlyAvatarController:
     """
     Controller for managing kid-friendly avatar expressions and gestures
@@ -298,38 +375,15 @@ class KidFriendlyAvatarController:
     """
 
     def __init__(self):
-        self.encouragement_phrases = [
-            "Great job!",
-            "You're doing wonderful!",
-            "I love hearing your voice!",
-            "Keep going, you're amazing!",
-            "What a fantastic try!",
-            "You're so smart!",
-            "I'm so proud of you!",
-            "That was perfect!",
-        ]
+        self.encouragement_phrases = list(ENCOURAGEMENT_PHRASES)
 
     def get_emotion_for_context(
-        self, context: str, child_participation: bool = True
+        self, analysis: UtteranceAnalysis, child_participation: bool = True
     ) -> AvatarEmotion:
-        """Determine appropriate avatar emotion based on conversation context"""
-        context_lower = context.lower()
-
+        """Determine appropriate avatar emotion based on the analyzed utterance"""
         if not child_participation:
             return AvatarEmotion.ENCOURAGING
-
-        if any(
-            word in context_lower for word in ["great", "good", "perfect", "wonderful"]
-        ):
-            return AvatarEmotion.CELEBRATING
-        elif any(word in context_lower for word in ["try", "attempt", "practice"]):
-            return AvatarEmotion.ENCOURAGING
-        elif any(word in context_lower for word in ["thinking", "hmm", "let me"]):
-            return AvatarEmotion.THINKING
-        elif any(word in context_lower for word in ["excited", "fun", "play", "yay"]):
-            return AvatarEmotion.EXCITED
-        else:
-            return AvatarEmotion.HAPPY
+        return AvatarEmotion(analysis.emotion)
 
     def get_gesture_for_achievement(self, achievement_level: str) -> AvatarGesture:
         """Select appropriate gesture based on child's achievement"""
@@ -355,14 +409,71 @@ class CHATAssistant(Agent):
     Enhanced with kid-friendly avatar integration for better engagement
     """
 
-    def __init__(self, conversation_prompt: str = "", jwt_token: str = "") -> None:
+    def __init__(
+        self,
+        conversation_prompt: str = "",
+        jwt_token: str = "",
+        language: str = DEFAULT_LANGUAGE,
+        phrase_cache: Optional[PhraseAudioCache] = None,
+        usage: Optional[UsageMeter] = None,
+        latency: Optional[VoiceLatencyRecorder] = None,
+    ) -> None:
         self.conversation_prompt = conversation_prompt
         super().__init__(instructions=self._get_chat_instructions())
         self.avatar_controller = KidFriendlyAvatarController()
-        self.analytics = ConversationAnalytics()
-        self.conversation: List[Dict[str, str]] = []
-        self.max_memory_turns = 6  # keep last 6 exchanges (child+assistant)
+        self.analytics = ConversationAnalytics(language=language)
+        # Keeps the prompt built from the session's chat context token-budgeted
+        self.context = ConversationContextManager(
+            turn_budget=CONTEXT_TURN_BUDGET,
+            summary_budget=CONTEXT_SUMMARY_BUDGET,
+        )
         self.jwt_token = jwt_token
+        self.phrase_cache = phrase_cache
+        self.turn_started_at: Optional[float] = None
+        self.first_audio_latencies: List[float] = []
+        self.bootstrap_timings: Dict[str, Dict[str, float]] = {}
+        self.latency = latency or VoiceLatencyRecorder(PIPELINE_PROVIDERS)
+        self.usage = usage or UsageMeter(PIPELINE_PROVIDERS)
+        # Aborts the reply in flight when the child starts a new turn
+        self.barge_in = BargeInController()
+        # Merges bursts of transcript fragments into one turn
+        self.coalescer = UtteranceCoalescer(
+            self._reply_to_carried,
+            window=COALESCE_WINDOW,
+            min_window=COALESCE_MIN_WINDOW,
+            max_window=COALESCE_MAX_WINDOW,
+        )
+
+    def checkpoint_state(self) -> Dict:
+        """Conversation state a later job needs to resume this session"""
+        analytics = self.analytics
+        return {
+            "conversation_prompt": self.conversation_prompt,
+            "analytics": analytics.snapshot(),
+            "context": self.context.snapshot(),
+            "rolling_summary": (
+                analytics.rolling_summary.snapshot()
+                if analytics.rolling_summary is not None
+                else None
+            ),
+            "transcript": (
+                analytics.transcript_uploader.snapshot()
+                if analytics.transcript_uploader is not None
+                else None
+            ),
+            "usage": self.usage.snapshot(),
+        }
+
+    def restore_state(self, state: Dict, same_room: bool):
+        """Continue from a checkpoint taken by `checkpoint_state`"""
+        analytics = self.analytics
+        analytics.restore(state["analytics"])
+        self.context.restore(state["context"])
+        if analytics.rolling_summary is not None and state["rolling_summary"]:
+            analytics.rolling_summary.restore(state["rolling_summary"])
+        if analytics.transcript_uploader is not None and state["transcript"]:
+            analytics.transcript_uploader.restore(state["transcript"], same_room=same_room)
+        self.usage.restore(state["usage"])
 
     def _get_chat_instructions(self) -> str:
         """
@@ -440,307 +551,519 @@ Remember: Your avatar is a crucial part of creating a safe, encouraging environm
 
 Be patient, playful, and always positive. You and your avatar are helping to build the foundation for lifelong communication skills."""
 
-    async def process_and_speak(
-        self, session: AgentSession, text: str, child_participation: bool
+    def on_agent_speaking(self):
+        """Record time-to-first-audio for the current turn, once per turn"""
+        if self.turn_started_at is None:
+            return
+
+        latency = time.perf_counter() - self.turn_started_at
+        self.turn_started_at = None
+        self.first_audio_latencies.append(latency)
+        self.latency.on_first_audio(latency)
+        logger.info(f"Time to first audio: {latency:.3f}s")
+
+    def record_child_turn(self, text: str) -> UtteranceAnalysis:
+        """Add a child turn to the analytics"""
+        analysis = self.analytics.analyzer.analyze(text)
+        self.analytics.add_child_utterance(text, analysis)
+        return analysis
+
+    def record_assistant_turn(self, text: str):
+        """Add an assistant turn to the analytics"""
+        self.analytics.add_assistant_response(text)
+
+    def llm_node(self, chat_ctx, tools, model_settings):
+        """Send the session's context with the folded turns summarized"""
+        chat_ctx = self.context.fit(chat_ctx)
+        logger.info(
+            f"LLM prompt size: ~{self.context.prompt_tokens} tokens "
+            f"({self.context.folded_turns} turns folded into summary)"
+        )
+        return Agent.default.llm_node(self, chat_ctx, tools, model_settings)
+
+    async def on_user_turn_completed(
+        self, turn_ctx: ChatContext, new_message: ChatMessage
     ):
         """
-        Generates a response using the LLM and sends it to TTS with avatar metadata.
+        The session committed a child turn; its reply is generated next.
+        Fragments of one burst are merged into the last turn of the burst, and
+        a non-verbal turn is answered with a cached encouragement instead
         """
-        # Track child utterance for analytics
-        if child_participation:
-            self.analytics.add_child_utterance(text)
+        self.turn_started_at = time.perf_counter()
+        text = await self.coalescer.hold(self.session, new_message.text_content or "")
+        if text is None:
+            # The child is still speaking: a later turn carries this fragment
+            raise StopResponse()
+        if text != new_message.text_content:
+            new_message.content = [text]
+        if is_non_verbal(text, self.analytics.analyzer):
+            # Babbling or a sound: a fixed encouragement, no LLM round trip
+            self.encourage()
+            raise StopResponse()
+        self.record_child_turn(text)
+
+    def encourage(self):
+        """Say a random encouragement, from the phrase cache when it is there"""
+        encouragement = self.avatar_controller.get_random_encouragement()
+        self.analytics.increment_encouragement()
+        logger.info(f"Generating non-verbal encouragement: '{encouragement}'")
+        cached = self.phrase_cache.get(encouragement) if self.phrase_cache else None
+        if cached is not None:
+            # Pre-synthesized: play from disk, no TTS round trip
+            self.session.say(encouragement, audio=cached.frames())
+        else:
+            self.session.say(encouragement)
 
-        # 1. Determine the appropriate emotion and gesture
-        emotion = self.avatar_controller.get_emotion_for_context(
-            text, child_participation
-        )
+    async def _reply_to_carried(self, session: AgentSession, text: str):
+        """Reply to carried fragments whose follow-up never became a turn"""
+        self.turn_started_at = time.perf_counter()
+        if is_non_verbal(text, self.analytics.analyzer):
+            self.encourage()
+            return
+        self.record_child_turn(text)
+        session.generate_reply(user_input=text)
 
-        achievement_level = "good_attempt"
-        if child_participation:
-            word_count = len(text.split())
-            if word_count == 1:
-                achievement_level = "first_word"
-            elif word_count > 1:
-                achievement_level = "breakthrough"
 
-        gesture = self.avatar_controller.get_gesture_for_achievement(achievement_level)
+async def complete_text(llm, prompt: str) -> str:
+    """One-shot LLM completion on `llm` (the background summary LLM)"""
+    chat_ctx = ChatContext()
+    chat_ctx.add_message(role="user", content=prompt)
 
-        logger.info(
-            f"Avatar response determined - Emotion: {emotion.value}, Gesture: {gesture.value}"
-        )
+    text = ""
+    async for chunk in llm.chat(chat_ctx=chat_ctx):
+        text += get_chunk_content(chunk)
+    return text
 
-        chat_context = ChatContext()
-        for msg in self.conversation[-self.max_memory_turns :]:  # short memory
-            role: Literal["user", "assistant"] = (
-                "user" if msg["role"] == "child" else "assistant"
-            )
 
-            chat_context.add_message(role=role, content=msg["content"])
+async def generate_summary(llm, analytics: ConversationAnalytics) -> str:
+    """
+    Finalize the rolling conversation summary. Only the turns since its last
+    update (plus the session statistics) are sent to the LLM here.
+    """
+    if not analytics.conversation_history:
+        return "No conversation occurred during this session."
 
-        if not chat_context.items:
-            chat_context.add_message(
-                role="user",
-                content=f"""The child said: '{text}'.
-                    Your goal is to expand on this and encourage them.
-                    Keep your response very simple (1-5 words).
-                    Your current emotion should be {emotion.value}.""",
-            )
+    # Get statistics for context
+    stats = analytics.get_statistics()
+    fallback = f"Session completed with {stats['child_vocalizations']} child vocalizations and {stats['unique_child_words']} unique words used."
+
+    stats_text = f"""Session Statistics:
+- Duration: {stats['session_duration_seconds']} seconds
+- Child vocalizations: {stats['child_vocalizations']}
+- Unique words used: {stats['unique_child_words']}
+- Topics discussed: {', '.join(stats['topics_detected']) if stats['topics_detected'] else 'None identified'}
+- Best utterance: "{stats['best_utterance']}"
+"""
 
-        stream = session.llm.chat(chat_ctx=chat_context)
+    rolling = analytics.rolling_summary
+    if rolling is None:
+        # Summary was never attached: fold the retained history in one update
+        rolling = RollingSessionSummary(functools.partial(complete_text, llm))
+        for msg in analytics.conversation_history:
+            rolling.add_turn(msg.role, msg.content)
 
-        response_text = ""
-        async for chunk in stream:
-            if hasattr(chunk, "choices") and chunk.choices:
-                if hasattr(chunk.choices[0], "delta") and chunk.choices[0].delta:
-                    if (
-                        hasattr(chunk.choices[0].delta, "content")
-                        and chunk.choices[0].delta.content
-                    ):
-                        response_text += chunk.choices[0].delta.content
-            # Alternative for different LLM response formats
-            elif hasattr(chunk, "content"):
-                response_text += chunk.content
+    try:
+        summary = await rolling.finalize(stats_text)
+    except Exception as e:
+        logger.error(f"Error generating summary: {e}")
+        return fallback
+    return summary or fallback
 
-        # Add assistant response to conversation history
-        if response_text.strip():
-            self.conversation.append({"role": "assistant", "content": response_text})
-            self.analytics.add_assistant_response(response_text)
 
-            # Speak the response using session.say()
-            await session.say(response_text)
+async def send_summary_to_backend(data: dict, participant_id: str) -> Optional[int]:
+    """
+    Send session analytics to backend API in the exact expected format.
+    Returns the HTTP status, or None when the request could not be made.
+    """
+    client = get_backend_client()
+    if client is None:
+        logger.warning("BACKEND_API_URL not set in .env - skipping backend submission")
+        return None
 
-            logger.info(f"Generated and spoke response: '{response_text}'")
+    # The participant identity is the child's id
+    payload = {
+        **data,
+        "participant_id": participant_id,
+        "child_id": participant_id,
+    }
 
-    async def handle_speech_event(
-        self,
-        message: str,
-        participant: rtc.RemoteParticipant,
-        session: AgentSession,
-    ):
-        """Handle speech from child participants with avatar-enhanced processing"""
-        logger.info(
-            f"Child vocalization detected: '{message}' from {participant.identity}"
+    try:
+        resp = await client.request(
+            "POST",
+            "analytics/",
+            endpoint="analytics.create",
+            child_id=participant_id,
+            json=payload,
         )
-
-        # If the message is empty (non-verbal sound), generate simple encouragement
-        if not message.strip():
-            encouragement = self.avatar_controller.get_random_encouragement()
-            self.analytics.increment_encouragement()
-            self.analytics.add_assistant_response(encouragement)
-            logger.info(f"Generating non-verbal encouragement: '{encouragement}'")
-            await session.say(encouragement)
-        # If there is speech, process it for an expanded response
-        else:
-            await self.process_and_speak(
-                session, text=message, child_participation=True
+        if resp.status in (200, 201):
+            logger.info(
+                f"Successfully sent analytics to backend. Status: {resp.status}"
             )
+        else:
+            logger.warning(f"Backend returned status {resp.status}: {resp.text}")
+        return resp.status
 
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error(f"Network error sending analytics: {e!r}")
+    except Exception as e:
+        logger.error(f"Unexpected error sending analytics: {e}")
+    return None
 
-async def generate_summary(
-    session: AgentSession, analytics: ConversationAnalytics
-) -> str:
-    """Generate a conversation summary using the LLM"""
-    if not analytics.conversation_history:
-        return "No conversation occurred during this session."
 
-    # Create conversation text
-    convo_text = "\n".join(
-        [f"{msg['role']}: {msg['content']}" for msg in analytics.conversation_history]
-    )
+_outbox: Optional[AnalyticsOutbox] = None
 
-    # Get statistics for context
-    stats = analytics.get_statistics()
 
-    summary_prompt = f"""
-    Please create a brief, professional summary of this speech therapy session with a child (18-36 months) with Late Language Emergence.
+def get_outbox() -> AnalyticsOutbox:
+    """Return the worker-wide analytics outbox"""
+    global _outbox
+    if _outbox is None:
+        path = os.getenv(
+            "CHAT_OUTBOX_PATH", os.path.join(CURRENT_DIR, "data", "outbox.db")
+        )
+        _outbox = AnalyticsOutbox(path, send_summary_to_backend)
+    return _outbox
+
+
+def get_checkpoints() -> SessionCheckpoints:
+    """Return the worker-wide session checkpoint store"""
+    return get_session_checkpoints(os.path.join(CURRENT_DIR, "data", "checkpoints"))
+
 
-    Session Statistics:
-    - Duration: {stats['session_duration_seconds']} seconds
-    - Child vocalizations: {stats['child_vocalizations']}
-    - Unique words used: {stats['unique_child_words']}
-    - Topics discussed: {', '.join(stats['topics_detected']) if stats['topics_detected'] else 'None identified'}
-    - Best utterance: "{stats['best_utterance']}"
+async def finalize_checkpoint(record: Dict):
+    """Finalize a dropped session nobody resumed: queue its analytics"""
+    await get_outbox().enqueue(record["payload"], record["participant_id"])
 
-    Conversation:
-    {convo_text}
 
-    Focus on:
-    1. Child's communication progress and engagement
-    2. Language skills demonstrated
-    3. Areas of strength and potential growth
-    4. Overall interaction quality
+_prompt_cache: Optional[PromptCache] = None
 
-    Keep the summary concise (2-3 sentences) and professional for clinical records.
+
+def get_prompt_cache() -> PromptCache:
+    """Return the worker-wide conversation prompt cache"""
+    global _prompt_cache
+    if _prompt_cache is None:
+        path = os.getenv(
+            "CHAT_PROMPT_CACHE_PATH", os.path.join(CURRENT_DIR, "data", "prompts.db")
+        )
+        _prompt_cache = PromptCache(
+            path, ttl=float(os.getenv("CHAT_PROMPT_CACHE_TTL", "300"))
+        )
+    return _prompt_cache
+
+
+async def get_conversation_prompt(participant_id: str, jwt_token: str) -> str:
+    """
+    Fetch conversation prompt from backend API for the specific child.
+    Fresh cached prompts skip the request; stale ones are revalidated with ETag.
     """
+    client = get_backend_client()
+    if client is None:
+        logger.warning("BACKEND_API_URL not set in .env - using default prompt")
+        return ""
 
-    chat_ctx = ChatContext()
-    chat_ctx.add_message(role="user", content=summary_prompt)
+    # 👇 Add an authorization check
+    if not jwt_token and not client.service_token:
+        logger.warning("No JWT token provided, cannot fetch prompt securely.")
+        return ""
+
+    cache = get_prompt_cache()
+    cached = await cache.get(participant_id)
+    if cached is not None and cached.is_fresh(cache.ttl):
+        logger.info(f"Using cached conversation prompt for {participant_id}")
+        return cached.prompt
+
+    headers = {}
+    if cached is not None:
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
 
     try:
-        summary_stream = session.llm.chat(chat_ctx=chat_ctx)
-
-        # Collect the response from the stream
-        summary_text = ""
-        async for chunk in summary_stream:
-            if hasattr(chunk, "choices") and chunk.choices:
-                if hasattr(chunk.choices[0], "delta") and chunk.choices[0].delta:
-                    if (
-                        hasattr(chunk.choices[0].delta, "content")
-                        and chunk.choices[0].delta.content
-                    ):
-                        summary_text += chunk.choices[0].delta.content
-            # Alternative for different LLM response formats
-            elif hasattr(chunk, "content"):
-                summary_text += chunk.content
-
-        return (
-            summary_text.strip()
-            if summary_text.strip()
-            else f"Session completed with {stats['child_vocalizations']} child vocalizations and {stats['unique_child_words']} unique words used."
+        resp = await client.request(
+            "GET",
+            f"children/{participant_id}/prompt/",
+            endpoint="children.prompt",
+            jwt_token=jwt_token,
+            child_id=participant_id,
+            headers=headers,
         )
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+
+        if resp.status == 304 and cached is not None:
+            logger.info(f"Conversation prompt for {participant_id} not modified")
+            await cache.touch(participant_id)
+            return cached.prompt
+        elif resp.status == 200:
+            prompt = resp.json().get("conversation_prompt", "")
+            await cache.put(participant_id, prompt, etag, last_modified)
+            logger.info(f"Successfully fetched conversation prompt for {participant_id}")
+            return prompt
+        elif resp.status == 204:
+            await cache.put(participant_id, "", etag, last_modified)
+            logger.info(
+                f"Successfully fetched conversation prompt for {participant_id} and it was empty"
+            )
+            return ""
+        else:
+            logger.warning(
+                f"Failed to fetch prompt. Backend returned status {resp.status}: {resp.text}"
+            )
+            return cached.prompt if cached is not None else ""
 
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error(f"Network error fetching conversation prompt: {e!r}")
     except Exception as e:
-        logger.error(f"Error generating summary: {e}")
-        return f"Session completed with {stats['child_vocalizations']} child vocalizations and {stats['unique_child_words']} unique words used."
+        logger.error(f"Unexpected error fetching conversation prompt: {e}")
 
+    # Serve a stale prompt rather than none when the backend is unreachable
+    return cached.prompt if cached is not None else ""
 
-async def send_summary_to_backend(data: dict, participant_id: str, jwt_token: str):
-    """Send session analytics to backend API in the exact expected format"""
-    backend_url = os.getenv("BACKEND_API_URL")
-    if not backend_url:
-        logger.warning("BACKEND_API_URL not set in .env - skipping backend submission")
-        return
-
-    # Create the full URL for session summary submission
-    url = f"{backend_url.rstrip('/')}/analytics/"
 
-    # Add participant_id to the payload
-    payload = {
-        **data,
-        "participant_id": participant_id,
+def get_phrase_voice_config() -> Dict:
+    """Everything that changes the synthesized audio of a fixed phrase"""
+    return {
+        "voice_id": TTS_VOICE_ID,
+        "model": TTS_MODEL,
+        "voice_settings": dict(TTS_VOICE_SETTINGS),
     }
 
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.post(
-                url,
-                json=payload,
-                headers={
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {jwt_token}",
-                },
-            ) as resp:
-                if resp.status == 200:
-                    logger.info(
-                        f"Successfully sent analytics to backend. Status: {resp.status}"
-                    )
-                else:
-                    response_text = await resp.text()
-                    logger.warning(
-                        f"Backend returned status {resp.status}: {response_text}"
-                    )
-
-        except aiohttp.ClientError as e:
-            logger.error(f"Network error sending analytics: {e}")
-        except Exception as e:
-            logger.error(f"Unexpected error sending analytics: {e}")
 
+LOCAL_PLUGINS = [
+    "livekit.plugins.silero",
+    "livekit.plugins.turn_detector.multilingual",
+]
 
-async def get_conversation_prompt(participant_id: str, jwt_token: str) -> str:
-    """Fetch conversation prompt from backend API for the specific child"""
-    backend_url = os.getenv("BACKEND_API_URL")
-    if not backend_url:
-        logger.warning("BACKEND_API_URL not set in .env - using default prompt")
-        return ""
 
-    # 👇 Add an authorization check
-    if not jwt_token:
-        logger.warning("No JWT token provided, cannot fetch prompt securely.")
-        return ""
+def load_plugins():
+    """
+    Import the local-model plugins and the selected providers' plugins.
+    LiveKit plugins register on import and must do so on the main thread.
+    """
+    for module in LOCAL_PLUGINS:
+        import_module(module)
+    if USE_NOISE_CANCELLATION:
+        import_module("livekit.plugins.noise_cancellation")
+    PROVIDER_CONFIG.load_plugins()
+
+
+def prewarm(proc: agents.JobProcess):
+    """
+    Load the local ML models once per worker process, before any job is assigned.
+    Every job started in this process reuses the instances stored in proc.userdata.
+    """
+    started = time.perf_counter()
+    proc.userdata["memory_baseline"] = MemoryUsage.read()
+
+    # Plugins are imported here, on the job process's main thread, instead of
+    # at module import; unselected providers are never imported
+    load_plugins()
+    proc.userdata["vad"] = import_module("livekit.plugins.silero").VAD.load(
+        min_speech_duration=100,
+        min_silence_duration=600,
+        prefix_padding_duration=200,
+    )
+    proc.userdata["turn_detector"] = import_module(
+        "livekit.plugins.turn_detector.multilingual"
+    ).MultilingualModel()
+    build_utterance_analyzers()
+
+    phrase_cache_dir = os.getenv(
+        "CHAT_PHRASE_CACHE_DIR", os.path.join(CURRENT_DIR, "data", "phrases")
+    )
+    phrase_cache = PhraseAudioCache(phrase_cache_dir, get_phrase_voice_config())
+    cached = phrase_cache.load(CACHED_PHRASES)
+    logger.info(f"Loaded {cached}/{len(CACHED_PHRASES)} pre-synthesized phrases")
+    proc.userdata["phrase_cache"] = phrase_cache
+
+    PROVIDER_CONFIG.prewarm(proc.userdata)
 
-    # Create the full URL for fetching the child's prompt
-    url = f"{backend_url.rstrip('/')}/children/{participant_id}/prompt/"
+    logger.info(f"Plugin import times (ms): {IMPORT_TIMES}")
+    logger.info(f"Worker process prewarmed in {time.perf_counter() - started:.2f}s")
 
-    async with aiohttp.ClientSession() as session:
+
+def parse_participant_metadata(participant: rtc.RemoteParticipant) -> tuple[str, str]:
+    """Extract (jwt_token, native_language) from the participant metadata"""
+    jwt_token = ""
+    language = DEFAULT_LANGUAGE
+
+    if participant.metadata:
         try:
-            async with session.get(
-                url,
-                headers={
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {jwt_token}",
-                },
-            ) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    prompt = data.get("conversation_prompt", "")
-                    logger.info(
-                        f"Successfully fetched conversation prompt for {participant_id}"
-                    )
-                    return prompt
-                elif resp.status == 204:
-                    prompt = ""
-                    logger.info(
-                        f"Successfully fetched conversation prompt for {participant_id} and it was empty"
-                    )
-                    return prompt
-                else:
-                    response_text = await resp.text()
-                    logger.warning(
-                        f"Failed to fetch prompt. Backend returned status {resp.status}: {response_text}"
-                    )
-                    return ""
-
-        except aiohttp.ClientError as e:
-            logger.error(f"Network error fetching conversation prompt: {e}")
-            return ""
-        except Exception as e:
-            logger.error(f"Unexpected error fetching conversation prompt: {e}")
-            return ""
+            metadata = json.loads(participant.metadata)
+            jwt_token = metadata.get(
+                "authToken"
+            )  # This key must match what you set in your Django view
+            if jwt_token:
+                logger.info("Successfully extracted JWT from participant metadata.")
+            else:
+                logger.warning("Metadata found, but 'authToken' key is missing.")
+            language = metadata.get("nativeLanguage") or DEFAULT_LANGUAGE
+        except TypeError:
+            logger.error("Failed to parse participant metadata.")
+        except json.JSONDecodeError:
+            logger.error(
+                "Failed to parse participant metadata. Is it a valid JSON string?"
+            )
+    else:
+        logger.warning(
+            "Participant connected without metadata. Cannot make authenticated requests."
+        )
+
+    return jwt_token or "", language
+
+
+def build_agent_session(router: ProviderRouter) -> AgentSession:
+    """Create AgentSession with child-friendly configurations"""
+    userdata = router.userdata
+    return AgentSession(
+        preemptive_generation=True,
+        stt=router.stt(vad=userdata["vad"]),
+        llm=router.llm(),
+        tts=router.tts(),
+        vad=userdata["vad"],
+        turn_detection=userdata["turn_detector"],
+    )
+
+
+def build_avatar(userdata: Dict):
+    """Create the avatar session on top of the prewarmed runtime"""
+    return PROVIDER_CONFIG.build("avatar", userdata)
+
+
+def attach_session_handlers(
+    session: AgentSession, agent_instance: CHATAssistant, router: ProviderRouter
+):
+    """Wire the session's events to the agent's meters, context and coalescer"""
+
+    @session.on("metrics_collected")
+    def on_metrics_collected(event):
+        agent_instance.latency.on_metrics(event.metrics)
+        agent_instance.usage.on_metrics(event.metrics)
+        agent_instance.barge_in.on_metrics(event.metrics)
+        router.on_metrics(event.metrics)
+
+    # Replies the session generates, so a newer child turn can cut them off
+    @session.on("speech_created")
+    def on_speech_created(event):
+        if event.source == "generate_reply":
+            agent_instance.barge_in.track(event.speech_handle)
+
+    # A committed child turn makes any reply still in flight stale
+    @session.on("user_input_transcribed")
+    def on_user_input_transcribed(event):
+        if event.is_final and event.transcript.strip():
+            agent_instance.barge_in.cancel("child_spoke")
+
+    # Every turn the session keeps, so the prompt can fold it out in time.
+    # What the agent said is recorded as played out (so cut short by an
+    # interruption); child turns are recorded by on_user_turn_completed
+    # once coalesced
+    @session.on("conversation_item_added")
+    def on_conversation_item_added(event):
+        item = event.item
+        agent_instance.context.add_turn(item)
+        if item.type == "message" and item.role == "assistant":
+            text = item.text_content
+            if text and text.strip():
+                agent_instance.record_assistant_turn(text)
+
+    # VAD activity tells the coalescer whether a burst is still going on
+    @session.on("user_state_changed")
+    def on_user_state_changed(event):
+        if event.new_state == "speaking":
+            agent_instance.coalescer.on_speech_started()
+        elif event.old_state == "speaking":
+            agent_instance.coalescer.on_speech_ended()
+
+    @session.on("agent_state_changed")
+    def on_agent_state_changed(event):
+        if event.new_state == "speaking":
+            agent_instance.latency.on_agent_speaking()
+            agent_instance.on_agent_speaking()
 
 
 async def entrypoint(ctx: agents.JobContext):
-    """Main entrypoint for the CHAT agent with Bithuman avatar."""
+    """
+    Main entrypoint for the CHAT agent with Bithuman avatar.
+
+    Bootstrap dependency graph (independent branches run concurrently):
+        connect ─ providers ─ wait_participant ─┬─ fetch_prompt ─┬─ session_start ─ greeting
+                                                └─ avatar_start ─┘
+    The TTS connection prewarmed in "providers" opens in the background meanwhile.
+    A child rejoining a dropped session after its job ended resumes from the
+    session checkpoint: no prompt fetch and a cached "welcome back" greeting.
+    """
 
+    timer = PhaseTimer()
     logger.info(f"Starting CHAT agent with Bithuman avatar for room: {ctx.room.name}")
     agent_instance = None
-    jwt_token = ""
 
     try:
         # Connect to the room first
         logger.info("Connecting to LiveKit room...")
-        await ctx.connect(auto_subscribe=agents.AutoSubscribe.AUDIO_ONLY)
+        with timer.phase("connect"):
+            await ctx.connect(auto_subscribe=agents.AutoSubscribe.AUDIO_ONLY)
         logger.info("Successfully connected to room!")
 
+        # Deliver analytics left over from earlier jobs or worker restarts
+        get_outbox().start()
+        # ...and of dropped sessions whose job ended before their grace window
+        get_checkpoints().start(finalize_checkpoint)
+        background_tasks = get_background_tasks()
+
+        # Provider clients do not depend on the child, so set them up while waiting
+        with timer.phase("providers"):
+            router = ProviderRouter(PROVIDER_CONFIG, ctx.proc.userdata)
+            session = build_agent_session(router)
+            session.tts.prewarm()
+            avatar = build_avatar(ctx.proc.userdata)
+        logger.info("BitHuman avatar instance created.")
+
         # Now we can safely wait for participants
         logger.info("Waiting for first participant to join...")
-        participant = await ctx.wait_for_participant()
+        with timer.phase("wait_participant"):
+            participant = await ctx.wait_for_participant()
         participant_id = participant.identity
         logger.info(f"Child participant connected: {participant_id}")
 
-        if participant.metadata:
-            try:
-                metadata = json.loads(participant.metadata)
-                jwt_token = metadata.get(
-                    "authToken"
-                )  # This key must match what you set in your Django view
-                if jwt_token:
-                    logger.info("Successfully extracted JWT from participant metadata.")
-                else:
-                    logger.warning("Metadata found, but 'authToken' key is missing.")
-            except TypeError:
-                logger.error("Failed to parse participant metadata.")
-            except json.JSONDecodeError:
-                logger.error(
-                    "Failed to parse participant metadata. Is it a valid JSON string?"
-                )
-        else:
-            logger.warning(
-                "Participant connected without metadata. Cannot make authenticated requests."
+        jwt_token, language = parse_participant_metadata(participant)
+
+        # A child rejoining within the grace window continues the dropped session
+        checkpoint = await get_checkpoints().resume(participant_id, finalize_checkpoint)
+        if checkpoint is not None:
+            logger.info(f"Resuming dropped session of {participant_id} from checkpoint")
+
+        async def fetch_prompt() -> str:
+            if checkpoint is not None:
+                return checkpoint["state"]["conversation_prompt"]
+            logger.info(f"Fetching conversation prompt for participant: {participant_id}")
+            with timer.phase("fetch_prompt"):
+                return await get_conversation_prompt(participant_id, jwt_token)
+
+        # Counts provider usage from the avatar start until the session is flushed,
+        # per provider that served it (router.plugins maps metrics to providers)
+        usage = UsageMeter(PIPELINE_PROVIDERS, router.plugins)
+        # Summaries run on their own LLM: billed, but never hedged and never
+        # counted as turn latency
+        summary_llm = router.background_llm()
+        summary_llm.on("metrics_collected", usage.on_metrics)
+
+        async def start_avatar():
+            logger.info("Starting BitHuman avatar session...")
+            with timer.phase("avatar_start"):
+                await avatar.start(session, room=ctx.room)
+            usage.avatar_started()
+            logger.info("BitHuman avatar started successfully!")
+            logger.info(
+                f"Job memory after avatar start: "
+                f"{job_memory_report(ctx.proc.userdata.get('memory_baseline'))}"
             )
 
-        # Fetch conversation prompt from backend
-        logger.info(f"Fetching conversation prompt for participant: {participant_id}")
-        conversation_prompt = await get_conversation_prompt(participant_id, jwt_token)
+        # The prompt fetch and the avatar start are independent: overlap them
+        async with asyncio.TaskGroup() as group:
+            prompt_task = group.create_task(fetch_prompt())
+            group.create_task(start_avatar())
+        conversation_prompt = prompt_task.result()
 
         if conversation_prompt:
             logger.info(
@@ -749,113 +1072,249 @@ async def entrypoint(ctx: agents.JobContext):
         else:
             logger.info("No specific conversation prompt found, using default")
 
-        # Create AgentSession with child-friendly configurations
-        session = AgentSession(
-            preemptive_generation=True,
-            stt=cartesia.STT(
-                api_key=os.getenv("CARTESIA_API_KEY"),
-                model="ink-whisper",
-            ),
-            llm=google.LLM(
-                api_key=os.getenv("GOOGLE_API_KEY"),
-                model="gemini-2.0-flash-lite",
-                temperature=0.5,
-            ),
-            tts=elevenlabs.TTS(
-                voice_id="TX3LPaxmHKxFdv7VOQHJ",
-                model="eleven_multilingual_v3",
-                api_key=os.getenv("ELEVENLABS_API_KEY"),
-                voice_settings=elevenlabs.VoiceSettings(
-                    stability=0.8,
-                    similarity_boost=0.7,
-                    style=0.3,
-                    use_speaker_boost=True,
-                    speed=0.75,
-                ),
-            ),
-            vad=silero.VAD.load(
-                min_speech_duration=100,
-                min_silence_duration=600,
-                prefix_padding_duration=200,
-            ),
-            turn_detection=MultilingualModel(),
+        # Create and start the agent session with the fetched prompt
+        agent_instance = CHATAssistant(
+            conversation_prompt=conversation_prompt,
+            jwt_token=jwt_token,
+            language=language,
+            phrase_cache=ctx.proc.userdata["phrase_cache"],
+            usage=usage,
+            latency=VoiceLatencyRecorder(PIPELINE_PROVIDERS, router.plugins),
         )
 
-        # Create BitHuman avatar session
-        model_path = os.path.join(CURRENT_DIR, os.getenv("BITHUMAN_MODEL_PATH"))
-        logger.info(f"Model path is located at: {model_path}")
-        avatar = bithuman.AvatarSession(
-            api_secret=os.getenv("BITHUMAN_API_SECRET"),
-            model_path=model_path,
+        # Folded turns the summary excerpts cannot hold are summarized, not
+        # dropped; a fold hands over its overflow at once, for one update
+        agent_instance.context.attach_summarizer(
+            RollingSessionSummary(
+                functools.partial(complete_text, summary_llm),
+                every_turns=1,
+                idle_seconds=SUMMARY_IDLE_SECONDS,
+                prompt=CONTEXT_SUMMARY_PROMPT,
+            )
         )
-        logger.info("BitHuman avatar instance created.")
 
-        # Start the avatar session first
-        logger.info("Starting BitHuman avatar session...")
-        await avatar.start(session, room=ctx.room)
-        logger.info("BitHuman avatar started successfully!")
+        if SUMMARY_MODE == "agent":
+            agent_instance.analytics.rolling_summary = RollingSessionSummary(
+                functools.partial(complete_text, summary_llm),
+                every_turns=SUMMARY_EVERY_TURNS,
+                idle_seconds=SUMMARY_IDLE_SECONDS,
+            )
 
-        # Create and start the agent session with the fetched prompt
-        agent_instance = CHATAssistant(
-            conversation_prompt=conversation_prompt, jwt_token=jwt_token
-        )
-        await session.start(
-            room=ctx.room,
-            agent=agent_instance,
-            room_input_options=RoomInputOptions(
-                noise_cancellation=(
-                    noise_cancellation.BVC()
-                    if os.getenv("LIVEKIT_URL", "").startswith("wss://")
+        backend_client = get_backend_client()
+        if backend_client is not None:
+            agent_instance.analytics.transcript_uploader = TranscriptUploader(
+                backend_client,
+                ctx.room.name,
+                participant_id,
+                flush_turns=TRANSCRIPT_FLUSH_TURNS,
+                flush_seconds=TRANSCRIPT_FLUSH_SECONDS,
+            )
+
+        if checkpoint is not None:
+            agent_instance.restore_state(
+                checkpoint["state"], same_room=checkpoint["room"] == ctx.room.name
+            )
+            # Seed the session's chat context with the turns the prompt keeps
+            await agent_instance.update_chat_ctx(
+                agent_instance.context.history_ctx()
+            )
+
+        # Subscribe before start so the greeting turn is measured too
+        attach_session_handlers(session, agent_instance, router)
+
+        # Flush, checkpoint and shutdown handling are all set up before the
+        # session starts, so a drop or a shutdown during the greeting is covered
+        def build_session_payload(
+            summary: str, transcript_chunks, transcript_upload
+        ) -> dict:
+            analytics = agent_instance.analytics
+            return {
+                **analytics.get_statistics(),
+                "conversation_summary": summary,
+                "livekit_room": ctx.room.name,
+                "transcript_chunks": transcript_chunks,
+                "transcript_upload": transcript_upload,
+                "summary_usage": (
+                    analytics.rolling_summary.usage()
+                    if analytics.rolling_summary is not None
                     else None
                 ),
-            ),
-            room_output_options=RoomOutputOptions(
-                audio_enabled=False,  # Bithuman avatar handles audio
-            ),
-        )
+                "bootstrap_timings": agent_instance.bootstrap_timings,
+                "latency_summary": agent_instance.latency.summary(),
+                "barge_in": agent_instance.barge_in.summary(),
+                "coalescing": agent_instance.coalescer.summary(),
+                "usage": agent_instance.usage.summary(),
+                "routing": router.summary(),
+                "resume": {
+                    **resume_window.summary(),
+                    "from_checkpoint": checkpoint is not None,
+                },
+                "memory_profile": job_memory_report(
+                    ctx.proc.userdata.get("memory_baseline"), final=True
+                ),
+            }
 
-        # Generate initial greeting appropriate for children with avatar
-        initial_greeting = f"""Generate a very short, warm, and exciting welcome message for a young child (aged 18 months - 5 years).
-        Your name is CHAT. Keep it very simple (5-15 words).
-        End by inviting the child to do a simple action, like waving or saying hello.
-        There is something the therapist/parent said: {conversation_prompt}"""
+        def retained_transcript_chunks() -> List[Dict]:
+            """Without an uploader nothing is stored yet: chunks from sequence 0"""
+            transcript = agent_instance.analytics.get_transcript()
+            size = TRANSCRIPT_FLUSH_TURNS
+            return [
+                {"sequence": sequence, "turns": transcript[start : start + size]}
+                for sequence, start in enumerate(range(0, len(transcript), size))
+            ]
 
-        # Track the initial greeting
-        agent_instance.analytics.add_assistant_response(initial_greeting)
+        flush_state = {"persisted": False}
+
+        async def flush_session():
+            """Summary, last transcript chunk and analytics for this session"""
+            analytics = agent_instance.analytics
+            summary = ""
+            if analytics.rolling_summary is not None:
+                summary = await generate_summary(summary_llm, analytics)
+
+            # Upload the last transcript chunk before the analytics, so
+            # enrichment sees the whole conversation; turns the store did
+            # not accept travel with the (durable) analytics payload
+            uploader = analytics.transcript_uploader
+            if uploader is not None:
+                transcript_chunks = await uploader.close()
+                transcript_upload = uploader.stats()
+            else:
+                transcript_chunks = retained_transcript_chunks()
+                transcript_upload = None
+
+            # An empty summary is written by the backend from the transcript
+            payload = build_session_payload(
+                summary, transcript_chunks, transcript_upload
+            )
+            logger.info(f"Session Analytics: {payload}")
+            # Persist first; the outbox flusher delivers it in the background
+            await get_outbox().enqueue(payload, participant_id)
+            flush_state["persisted"] = True
+
+        def build_local_payload() -> dict:
+            """The session payload from what is in memory, without any network call"""
+            analytics = agent_instance.analytics
+            summary = ""
+            if analytics.rolling_summary is not None:
+                summary = analytics.rolling_summary.summary
+            uploader = analytics.transcript_uploader
+            if uploader is not None:
+                transcript_chunks = uploader.unsent_chunks()
+                transcript_upload = uploader.stats()
+            else:
+                transcript_chunks = retained_transcript_chunks()
+                transcript_upload = None
+            return build_session_payload(summary, transcript_chunks, transcript_upload)
+
+        async def spool_session():
+            """Shutdown fallback: persist what we have without any network call"""
+            if flush_state["persisted"]:
+                return
+            await get_outbox().enqueue(build_local_payload(), participant_id)
+            flush_state["persisted"] = True
+
+        async def checkpoint_session() -> Dict:
+            payload = build_local_payload()
+            # Building the payload stopped the avatar clock, but the avatar
+            # keeps rendering while the job waits for the child
+            agent_instance.usage.avatar_started()
+            return await get_checkpoints().save(
+                participant_id,
+                room=ctx.room.name,
+                participant_id=participant_id,
+                state=agent_instance.checkpoint_state(),
+                payload=payload,
+            )
 
-        # Use session.say with metadata for the initial greeting
-        await session.generate_reply(
-            instructions=initial_greeting,
+        # A drop defers the flush for the grace window: a rejoin simply goes on
+        resume_window = ResumeWindow(
+            get_checkpoints(),
+            participant_id,
+            checkpoint_session,
+            finalize=lambda: background_tasks.flush_session(participant_id),
+            release=lambda: background_tasks.release_session(participant_id),
         )
 
+        # Flushed when the participant leaves for good, or drained at shutdown
+        # if the job is stopped (e.g. a redeploy) while the session is still active
+        background_tasks.register_session(participant_id, flush_session, spool_session)
+
         # Set up event handlers for monitoring
         @ctx.room.on("participant_connected")
         def on_participant_connected(participant: rtc.RemoteParticipant):
             logger.info(f"Participant joined: {participant.identity}")
+            if participant.identity == participant_id:
+                asyncio.create_task(resume_window.on_reconnect())
 
         @ctx.room.on("participant_disconnected")
         def on_participant_disconnected(participant: rtc.RemoteParticipant):
             logger.info(f"Participant left: {participant.identity}")
+            if participant.identity == participant_id:
+                resume_window.on_disconnect()
+
+        async def drain_and_close():
+            # A session still inside its grace window stays checkpointed for
+            # a later job instead of being finalized by the drain
+            await resume_window.hand_off()
+            # Session flushes first: they still need the outbox and the client
+            await background_tasks.drain()
+            await summary_llm.aclose()
+            await get_checkpoints().stop()
+            await get_outbox().stop()
+            client = get_backend_client()
+            if client is not None:
+                logger.info(f"Backend API latency: {client.get_metrics()}")
+                await client.close()
+
+        ctx.add_shutdown_callback(drain_and_close)
+
+        with timer.phase("session_start"):
+            await session.start(
+                room=ctx.room,
+                agent=agent_instance,
+                room_input_options=RoomInputOptions(
+                    noise_cancellation=(
+                        import_module("livekit.plugins.noise_cancellation").BVC()
+                        if USE_NOISE_CANCELLATION
+                        else None
+                    ),
+                ),
+                room_output_options=RoomOutputOptions(
+                    audio_enabled=False,  # Bithuman avatar handles audio
+                ),
+            )
+        agent_instance.bootstrap_timings = timer.as_dict()
 
-            async def handle_disconnect():
-                if agent_instance:
-                    # Generate real statistics from the conversation
-                    stats = agent_instance.analytics.get_statistics()
-                    summary = await generate_summary(session, agent_instance.analytics)
-
-                    # Create payload with real data
-                    payload = {
-                        **stats,
-                        "conversation_summary": summary,
-                    }
-
-                    logger.info(f"Session Analytics: {payload}")
-                    await send_summary_to_backend(
-                        payload, participant.identity, agent_instance.jwt_token
-                    )
+        # Synthesize any fixed phrase this host has not cached yet, off the hot
+        # path and once per process (with the primary TTS: the cache is keyed by
+        # its voice)
+        ctx.proc.userdata["phrase_cache"].start_fill(
+            router.primary("tts"), CACHED_PHRASES
+        )
 
-            # Schedule the disconnect handler
-            asyncio.create_task(handle_disconnect())
+        if checkpoint is not None:
+            # Resumed: no LLM round trip, just the (usually cached) welcome back
+            cached = ctx.proc.userdata["phrase_cache"].get(WELCOME_BACK_PHRASE)
+            if cached is not None:
+                greeting = session.say(WELCOME_BACK_PHRASE, audio=cached.frames())
+            else:
+                greeting = session.say(WELCOME_BACK_PHRASE)
+        else:
+            # Generate initial greeting appropriate for children with avatar
+            initial_greeting = f"""Generate a very short, warm, and exciting welcome message for a young child (aged 18 months - 5 years).
+            Your name is CHAT. Keep it very simple (5-15 words).
+            End by inviting the child to do a simple action, like waving or saying hello.
+            There is something the therapist/parent said: {conversation_prompt}"""
+
+            # Use session.say with metadata for the initial greeting
+            greeting = session.generate_reply(
+                instructions=initial_greeting,
+            )
+        logger.info(
+            f"Job startup for room {ctx.room.name} took {timer.elapsed():.2f}s (until greeting scheduled): {timer.summary()}"
+        )
+        await greeting
 
         @ctx.room.on("track_published")
         def on_track_published(
@@ -885,9 +1344,27 @@ def main():
     logger.info("Enhanced with engaging visual avatar for better interaction")
     logger.info(f"Connecting to: {os.getenv('LIVEKIT_URL')}")
 
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
+
+    # The CLI (e.g. `download-files`) works on the plugins registered in this
+    # process; job processes import their own in prewarm
+    load_plugins()
+
+    # Advertise real capacity and refuse rooms that would degrade running sessions
+    load_monitor = get_load_monitor()
+
     # Configure worker options for child therapy sessions with avatar
     worker_options = agents.WorkerOptions(
         entrypoint_fnc=entrypoint,
+        prewarm_fnc=prewarm,
+        request_fnc=load_monitor.request_fnc,
+        load_fnc=load_monitor.load_fnc,
+        load_threshold=load_monitor.threshold,
+        # Room for the session drain (plus spooling) before the job is killed
+        shutdown_process_timeout=(
+            get_background_tasks().deadline + get_background_tasks().spool_deadline + 5
+        ),
     )
 
     try:
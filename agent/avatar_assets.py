@@ -0,0 +1,79 @@
+"""
+Per-job memory accounting
+Every job runs in its own process and the bitHuman SDK loads the avatar model
+itself, so the model cannot be shared across jobs; what each session holds
+privately is measured and reported per job instead.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from prometheus_client import Histogram
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+JOB_PRIVATE_MEMORY = Histogram(
+    "chat_agent_job_private_memory_bytes",
+    "Memory a job process holds privately (USS) when its session ends",
+    buckets=[n * 64 * MB for n in (1, 2, 4, 6, 8, 12, 16, 24, 32, 48)],
+)
+
+
+@dataclass
+class MemoryUsage:
+    """Process memory split by sharing, in bytes (from /proc/<pid>/smaps_rollup)"""
+
+    rss: int
+    pss: int
+    private: int  # USS: freed if this process exits
+    shared: int
+
+    @classmethod
+    def read(cls, pid: str = "self") -> Optional["MemoryUsage"]:
+        fields: Dict[str, int] = {}
+        try:
+            with open(f"/proc/{pid}/smaps_rollup") as rollup:
+                for line in rollup:
+                    parts = line.split()
+                    if len(parts) == 3 and parts[2] == "kB":
+                        fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+        except OSError:
+            return None
+        return cls(
+            rss=fields.get("Rss", 0),
+            pss=fields.get("Pss", 0),
+            private=fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+            shared=fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+        )
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "rss_mb": round(self.rss / MB, 1),
+            "pss_mb": round(self.pss / MB, 1),
+            "private_mb": round(self.private / MB, 1),
+            "shared_mb": round(self.shared / MB, 1),
+        }
+
+
+def job_memory_report(
+    baseline: Optional[MemoryUsage], *, final: bool = False
+) -> Dict[str, float]:
+    """
+    Current memory plus the increment since `baseline` (taken before prewarm).
+    The `final` report of a job is also recorded in the histogram.
+    """
+    current = MemoryUsage.read()
+    if current is None:
+        return {}
+    if final:
+        JOB_PRIVATE_MEMORY.observe(current.private)
+    report = current.as_dict()
+    if baseline is not None:
+        report["private_increment_mb"] = round(
+            (current.private - baseline.private) / MB, 1
+        )
+        report["rss_increment_mb"] = round((current.rss - baseline.rss) / MB, 1)
+    return report
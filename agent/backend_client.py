@@ -0,0 +1,224 @@
+"""
+Connection-pooled HTTP client for agent -> backend API calls
+One client per worker process keeps TCP/TLS connections alive across requests
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying: the request did not reach the application or it was overloaded
+RETRYABLE_STATUSES = {429, 502, 503, 504}
+
+
+@dataclass
+class BackendResponse:
+    """Fully read backend response (the connection is already back in the pool)"""
+
+    status: int
+    text: str
+    headers: Dict[str, str]
+
+    def json(self) -> Any:
+        return json.loads(self.text) if self.text else None
+
+
+@dataclass
+class EndpointStats:
+    """Latency and outcome counters for one logical endpoint"""
+
+    requests: int = 0
+    errors: int = 0
+    retries: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    last_status: Optional[int] = None
+    statuses: Dict[int, int] = field(default_factory=dict)
+
+    def record(self, seconds: float, status: Optional[int]):
+        self.requests += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.last_status = status
+        if status is None:
+            self.errors += 1
+        else:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "avg_ms": (
+                round(self.total_seconds / self.requests * 1000, 1)
+                if self.requests
+                else 0
+            ),
+            "max_ms": round(self.max_seconds * 1000, 1),
+            "statuses": dict(self.statuses),
+        }
+
+
+class BackendClient:
+    """
+    Keep-alive aiohttp client with explicit timeouts, bounded jittered retries
+    and per-endpoint latency metrics
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        total_timeout: float = 10.0,
+        connect_timeout: float = 3.0,
+        max_retries: int = 2,
+        backoff_base: float = 0.25,
+        backoff_cap: float = 2.0,
+        pool_size: int = 10,
+        keepalive_timeout: float = 60.0,
+        service_token: str = "",
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.service_token = service_token
+        self.timeout = aiohttp.ClientTimeout(
+            total=total_timeout, sock_connect=connect_timeout
+        )
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.stats: Dict[str, EndpointStats] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Create the pooled session lazily, inside the running event loop"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=self.timeout
+            )
+        return self._session
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        ceiling = min(self.backoff_cap, self.backoff_base * 2**attempt)
+        return random.uniform(0, ceiling)
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        endpoint: str,
+        jwt_token: str = "",
+        child_id: str = "",
+        json: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        idempotent: Optional[bool] = None,
+    ) -> BackendResponse:
+        """
+        Send a request and return the fully read response.
+        `endpoint` is a low-cardinality label for metrics (e.g. "children.prompt").
+        Calls made for a child use the service credential when one is set, and
+        fall back to the child's `jwt_token` otherwise.
+        Non-idempotent requests are only retried when the connection never
+        reached the server. Raises aiohttp.ClientError/TimeoutError when the
+        retries are exhausted.
+        """
+        if idempotent is None:
+            idempotent = method.upper() in ("GET", "HEAD", "PUT", "DELETE")
+
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        request_headers = {"Content-Type": "application/json"}
+        if self.service_token and child_id:
+            request_headers["Authorization"] = f"Service {self.service_token}"
+            request_headers["X-Chat-Child"] = child_id
+        elif jwt_token:
+            request_headers["Authorization"] = f"Bearer {jwt_token}"
+        if headers:
+            request_headers.update(headers)
+
+        stats = self.stats.setdefault(endpoint, EndpointStats())
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                async with self._get_session().request(
+                    method, url, json=json, headers=request_headers
+                ) as resp:
+                    text = await resp.text()
+                    response = BackendResponse(resp.status, text, dict(resp.headers))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                stats.record(time.perf_counter() - started, None)
+                connect_failed = isinstance(e, aiohttp.ClientConnectorError)
+                if attempt >= self.max_retries or not (idempotent or connect_failed):
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(
+                    f"{method} {endpoint} failed ({e!r}), retrying in {delay:.2f}s"
+                )
+            else:
+                stats.record(time.perf_counter() - started, response.status)
+                if (
+                    response.status not in RETRYABLE_STATUSES
+                    or not idempotent
+                    or attempt >= self.max_retries
+                ):
+                    return response
+                delay = self._backoff(attempt)
+                logger.warning(
+                    f"{method} {endpoint} returned {response.status}, retrying in {delay:.2f}s"
+                )
+
+            attempt += 1
+            stats.retries += 1
+            await asyncio.sleep(delay)
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per-endpoint latency summary"""
+        return {name: stats.as_dict() for name, stats in self.stats.items()}
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+_client: Optional[BackendClient] = None
+
+
+def get_backend_client() -> Optional[BackendClient]:
+    """Return the worker-wide client, or None when BACKEND_API_URL is not set"""
+    global _client
+    backend_url = os.getenv("BACKEND_API_URL")
+    if not backend_url:
+        return None
+    if _client is None:
+        service_token = os.getenv("CHAT_AGENT_SERVICE_TOKEN", "")
+        if not service_token:
+            logger.warning(
+                "CHAT_AGENT_SERVICE_TOKEN not set - analytics and transcripts "
+                "cannot be delivered once the session is over"
+            )
+        _client = BackendClient(
+            backend_url,
+            total_timeout=float(os.getenv("BACKEND_TIMEOUT_SECONDS", "10")),
+            max_retries=int(os.getenv("BACKEND_MAX_RETRIES", "2")),
+            service_token=service_token,
+        )
+    return _client
@@ -0,0 +1,151 @@
+"""
+Per-worker registry of background work that must survive shutdown
+Session flushes (summary, transcript upload, analytics) and other tracked
+tasks are drained concurrently under one deadline when the job shuts down.
+A flush that misses the deadline is cancelled and its session is spooled
+to the on-disk outbox instead of being lost.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Coroutine, Dict, Optional, Set
+
+from prometheus_client import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+SESSION_FLUSHES = Counter(
+    "chat_agent_session_flushes_total",
+    "Session analytics flushes by outcome (completed, spooled, timed_out, failed)",
+    ["outcome"],
+)
+SHUTDOWN_DRAIN = Histogram(
+    "chat_agent_shutdown_drain_seconds",
+    "Time spent draining background work at job shutdown",
+    buckets=[0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30],
+)
+
+# flush() does the full work; spool() must only persist locally and be fast
+Flush = Callable[[], Awaitable[None]]
+Spool = Callable[[], Awaitable[None]]
+
+
+class SessionFlush:
+    def __init__(self, key: str, flush: Flush, spool: Spool):
+        self.key = key
+        self.flush = flush
+        self.spool = spool
+        self.task: Optional[asyncio.Task] = None
+        self.outcome: Optional[str] = None
+
+
+class BackgroundTasks:
+    """
+    Sessions register their flush when they start; the flush runs when the
+    participant leaves (`flush_session`) or, for sessions still active, when
+    the job shuts down (`drain`). Each session is flushed at most once.
+    """
+
+    def __init__(self, deadline: float = 8.0, spool_deadline: float = 2.0):
+        self.deadline = deadline
+        self.spool_deadline = spool_deadline
+        self._sessions: Dict[str, SessionFlush] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def spawn(self, coro: Coroutine, *, name: str) -> asyncio.Task:
+        """Run a tracked task; drain waits for it up to the deadline"""
+        task = asyncio.create_task(coro, name=name)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def register_session(self, key: str, flush: Flush, spool: Spool):
+        self._sessions[key] = SessionFlush(key, flush, spool)
+
+    def release_session(self, key: str) -> bool:
+        """Forget a session whose flush has not started (someone else will do it)"""
+        entry = self._sessions.get(key)
+        if entry is None or entry.task is not None:
+            return False
+        del self._sessions[key]
+        return True
+
+    def flush_session(self, key: str) -> Optional[asyncio.Task]:
+        """Start the session's flush (idempotent)"""
+        entry = self._sessions.get(key)
+        if entry is None:
+            return None
+        if entry.task is None:
+            entry.task = self.spawn(self._run_flush(entry), name=f"flush-{key}")
+        return entry.task
+
+    async def _run_flush(self, entry: SessionFlush):
+        try:
+            await entry.flush()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Flush of session {entry.key} failed: {e!r}")
+            await self._spool(entry, "failed")
+        else:
+            self._record(entry, "completed")
+
+    async def _spool(self, entry: SessionFlush, failed_outcome: str):
+        try:
+            await asyncio.wait_for(entry.spool(), self.spool_deadline)
+        except Exception as e:
+            logger.error(f"Could not spool session {entry.key}: {e!r}")
+            self._record(entry, failed_outcome)
+        else:
+            self._record(entry, "spooled")
+
+    def _record(self, entry: SessionFlush, outcome: str):
+        if entry.outcome is None:
+            entry.outcome = outcome
+            SESSION_FLUSHES.labels(outcome=outcome).inc()
+
+    async def drain(self) -> Dict[str, int]:
+        """
+        Flush every session not yet flushed, wait for all tracked work
+        concurrently until the deadline, then spool whatever did not finish
+        """
+        started = time.perf_counter()
+        for key in self._sessions:
+            self.flush_session(key)
+
+        pending = set(self._tasks)
+        if pending:
+            _, pending = await asyncio.wait(pending, timeout=self.deadline)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        late = [entry for entry in self._sessions.values() if entry.outcome is None]
+        if late:
+            logger.warning(f"{len(late)} session flush(es) missed the drain deadline")
+            await asyncio.gather(*(self._spool(entry, "timed_out") for entry in late))
+
+        outcomes: Dict[str, int] = {}
+        for entry in self._sessions.values():
+            outcomes[entry.outcome] = outcomes.get(entry.outcome, 0) + 1
+        elapsed = time.perf_counter() - started
+        SHUTDOWN_DRAIN.observe(elapsed)
+        logger.info(f"Drained background work in {elapsed:.2f}s: {outcomes}")
+        return outcomes
+
+
+_registry: Optional[BackgroundTasks] = None
+
+
+def get_background_tasks() -> BackgroundTasks:
+    """Return the worker-wide registry"""
+    global _registry
+    if _registry is None:
+        _registry = BackgroundTasks(
+            deadline=float(os.getenv("CHAT_SHUTDOWN_DRAIN_SECONDS", "8")),
+            spool_deadline=float(os.getenv("CHAT_SHUTDOWN_SPOOL_SECONDS", "2")),
+        )
+    return _registry
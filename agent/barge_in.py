@@ -0,0 +1,155 @@
+"""
+Barge-in cancellation of in-flight replies
+When a new child turn is committed while the previous reply is still being
+generated or spoken, the stale reply's speech handle is interrupted, which
+closes its LLM and TTS streams, so no more tokens are generated and no more
+text is synthesized.
+"""
+
+import logging
+from typing import Dict, Optional
+
+from livekit.agents import metrics as lk_metrics
+from livekit.agents.voice import SpeechHandle
+from prometheus_client import Counter
+
+from conversation_context import CHARS_PER_TOKEN
+
+logger = logging.getLogger(__name__)
+
+BARGE_INS = Counter(
+    "chat_agent_barge_ins_total",
+    "Replies cancelled because the child started a new turn",
+)
+SAVED_LLM_TOKENS = Counter(
+    "chat_agent_barge_in_saved_llm_tokens_total",
+    "Estimated LLM completion tokens not generated thanks to barge-in",
+)
+SAVED_TTS_CHARACTERS = Counter(
+    "chat_agent_barge_in_saved_tts_characters_total",
+    "Estimated characters not synthesized thanks to barge-in",
+)
+
+
+class ReplyTurn:
+    """Work and progress of one assistant reply"""
+
+    def __init__(self):
+        self.speech: Optional[SpeechHandle] = None
+        self.generated_chars = 0  # LLM output received
+        self.synthesized_chars = 0  # text handed to TTS
+        self.cancelled = False
+        self.reason = "interrupted"
+
+    def track_speech(self, speech: SpeechHandle) -> SpeechHandle:
+        self.speech = speech
+        return speech
+
+
+class BargeInController:
+    """
+    Follows the replies the session generates (`track`, from `speech_created`)
+    and interrupts those still in flight when the child takes a new turn.
+    Their progress comes from the LLM and TTS metrics of their speech id.
+
+    Savings are estimated against the mean size of the replies that completed:
+    whatever a cancelled reply had not yet generated (tokens) or handed to TTS
+    (characters) counts as saved. A reply the session interrupts by itself,
+    e.g. a preemptive generation discarded because the turn changed, counts
+    as cancelled too.
+    """
+
+    def __init__(self):
+        # speech id -> reply generated by the session, until its handle is done
+        self.live: Dict[str, ReplyTurn] = {}
+        self.completed_replies = 0
+        self.completed_chars = 0
+        self.cancelled_replies = 0
+        self.saved_llm_tokens = 0
+        self.saved_tts_chars = 0
+        self.wasted_llm_tokens = 0  # generated, then never spoken
+
+    def _expected_chars(self) -> float:
+        if not self.completed_replies:
+            return 0.0
+        return self.completed_chars / self.completed_replies
+
+    def track(self, speech: SpeechHandle) -> ReplyTurn:
+        """Follow a reply the session generates (`speech_created` event)"""
+        turn = ReplyTurn()
+        turn.track_speech(speech)
+        self.live[speech.id] = turn
+        speech.add_done_callback(self._on_speech_done)
+        return turn
+
+    def on_metrics(self, event):
+        """Feed one `MetricsCollectedEvent.metrics` item"""
+        turn = self.live.get(getattr(event, "speech_id", None))
+        if turn is None:
+            return
+        if isinstance(event, lk_metrics.LLMMetrics):
+            turn.generated_chars += event.completion_tokens * CHARS_PER_TOKEN
+        elif isinstance(event, lk_metrics.TTSMetrics):
+            turn.synthesized_chars += event.characters_count
+
+    def _on_speech_done(self, speech: SpeechHandle):
+        # The pipeline closes a reply's streams (and so reports their metrics)
+        # before it marks the handle done
+        turn = self.live.pop(speech.id, None)
+        if turn is None:
+            return
+        if speech.interrupted:
+            self._record_cancelled(turn, turn.reason)
+        else:
+            self._record_completed(turn)
+
+    def cancel(self, reason: str = "child_spoke") -> bool:
+        """Abort the replies in flight, if any; safe to call from event handlers"""
+        cancelled = False
+        for turn in list(self.live.values()):
+            speech = turn.speech
+            if turn.cancelled or speech.done() or not speech.allow_interruptions:
+                continue
+            # Accounted for once the handle is done
+            turn.reason = reason
+            self._abort(turn)
+            cancelled = True
+        return cancelled
+
+    def _abort(self, turn: ReplyTurn):
+        turn.cancelled = True
+        if turn.speech is not None and not turn.speech.done():
+            turn.speech.interrupt()
+
+    def _record_completed(self, turn: ReplyTurn):
+        self.completed_replies += 1
+        self.completed_chars += turn.generated_chars
+
+    def _record_cancelled(self, turn: ReplyTurn, reason: str):
+        expected = self._expected_chars()
+        saved_tokens = int(max(0.0, expected - turn.generated_chars) / CHARS_PER_TOKEN)
+        saved_chars = int(max(0.0, expected - turn.synthesized_chars))
+        wasted_tokens = max(0, turn.generated_chars - turn.synthesized_chars)
+        wasted_tokens //= CHARS_PER_TOKEN
+
+        self.cancelled_replies += 1
+        self.saved_llm_tokens += saved_tokens
+        self.saved_tts_chars += saved_chars
+        self.wasted_llm_tokens += wasted_tokens
+        BARGE_INS.inc()
+        SAVED_LLM_TOKENS.inc(saved_tokens)
+        SAVED_TTS_CHARACTERS.inc(saved_chars)
+        logger.info(
+            f"Barge-in ({reason}): cancelled reply after {turn.generated_chars} "
+            f"generated / {turn.synthesized_chars} synthesized chars "
+            f"(saved ~{saved_tokens} tokens, ~{saved_chars} chars)"
+        )
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "cancelled_replies": self.cancelled_replies,
+            "completed_replies": self.completed_replies,
+            "saved_llm_tokens": self.saved_llm_tokens,
+            "saved_tts_characters": self.saved_tts_chars,
+            "wasted_llm_tokens": self.wasted_llm_tokens,
+        }
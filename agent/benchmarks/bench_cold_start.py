@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+"""
+Cold-start regression benchmark for the agent module
+Each sample is a fresh interpreter. Checks that
+- importing agent.py pulls in no provider plugin (they load in prewarm), and
+- agent.py costs at most CHAT_IMPORT_BUDGET_MS on top of livekit.agents itself
+and reports the prewarm-time import cost of the selected providers' plugins.
+Exits non-zero when a check fails.
+Usage: python benchmarks/bench_cold_start.py [runs]
+       CHAT_FAKE_PROVIDERS=true python benchmarks/bench_cold_start.py 5
+"""
+
+import json
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+
+AGENT_DIR = pathlib.Path(__file__).resolve().parent.parent
+
+# Import cost agent.py may add on top of livekit.agents
+IMPORT_BUDGET_MS = float(os.getenv("CHAT_IMPORT_BUDGET_MS", "500"))
+
+MEASURE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - started) * 1000
+plugins = sorted(m for m in sys.modules if m.startswith("livekit.plugins."))
+extra = {{}}
+if {load_plugins}:
+    {module}.load_plugins()
+    extra = {module}.IMPORT_TIMES
+print(json.dumps({{"ms": elapsed, "plugins": plugins, "plugin_imports": extra}}))
+"""
+
+
+def sample(module: str, load_plugins: bool = False) -> dict:
+    env = dict(os.environ)
+    # agent.py validates its environment at import time
+    for name in ("LIVEKIT_URL", "LIVEKIT_API_KEY", "LIVEKIT_API_SECRET"):
+        env.setdefault(name, "benchmark")
+    code = MEASURE.format(module=module, load_plugins=load_plugins)
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=AGENT_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    baseline = statistics.median(
+        sample("livekit.agents")["ms"] for _ in range(runs)
+    )
+    agent_samples = [sample("agent") for _ in range(runs)]
+    agent_ms = statistics.median(s["ms"] for s in agent_samples)
+    overhead = agent_ms - baseline
+    eager_plugins = agent_samples[0]["plugins"]
+
+    loaded = sample("agent", load_plugins=True)["plugin_imports"]
+
+    print(f"runs: {runs}")
+    print(f"import livekit.agents:  {baseline:8.0f} ms")
+    print(f"import agent:           {agent_ms:8.0f} ms")
+    print(f"agent.py overhead:      {overhead:8.0f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)")
+    print("plugin imports deferred to prewarm:")
+    for module, ms in sorted(loaded.items(), key=lambda item: -item[1]):
+        print(f"  {module:45} {ms:8.0f} ms")
+    print(f"  {'total':45} {sum(loaded.values()):8.0f} ms")
+
+    failed = False
+    if eager_plugins:
+        print(f"FAIL: imported at agent import: {', '.join(eager_plugins)}")
+        failed = True
+    if overhead > IMPORT_BUDGET_MS:
+        print("FAIL: agent.py import overhead is over budget")
+        failed = True
+    if not failed:
+        print("OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+
+"""
+Capacity benchmark: N child sessions through the real AgentSession in one worker
+Each session is built by build_agent_session() on the fake providers
+(CHAT_FAKE_PROVIDERS=true) and wired with the entrypoint's own handlers. A
+simulated child speaks into the session's audio input; VAD, the fake STT,
+on_user_turn_completed, the LLM and TTS nodes and the avatar's real-time
+playout all run as in a live job, so the numbers reflect the agent's own
+overhead plus the configured fake latencies and avatar render cost.
+The child's audio is noise, which silero does not take for speech: turns are
+detected by a level-threshold VAD (with silero still run on every frame for
+its CPU cost), and ended by VAD silence since the multilingual turn detector
+needs the worker's inference process.
+With a barge-in fraction, that share of child turns starts while the previous
+reply is still playing, as an impatient child would.
+Usage: python benchmarks/bench_sessions.py [sessions,...] [turns] [barge_in_fraction]
+       e.g. python benchmarks/bench_sessions.py 1,2,4,8,16 5 0.3
+"""
+
+import asyncio
+import logging
+import os
+import pathlib
+import random
+import resource
+import statistics
+import sys
+import time
+from importlib import import_module
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+# agent.py validates its environment at import time
+os.environ["CHAT_FAKE_PROVIDERS"] = "true"
+for _name in ("LIVEKIT_URL", "LIVEKIT_API_KEY", "LIVEKIT_API_SECRET"):
+    os.environ.setdefault(_name, "benchmark")
+
+from agent import (  # noqa: E402
+    CACHED_PHRASES,
+    CURRENT_DIR,
+    PIPELINE_PROVIDERS,
+    PROVIDER_CONFIG,
+    CHATAssistant,
+    attach_session_handlers,
+    build_agent_session,
+    build_avatar,
+    get_phrase_voice_config,
+)
+from fake_providers import FakeChildAudio, FakeVAD  # noqa: E402
+from phrase_cache import PhraseAudioCache  # noqa: E402
+from provider_router import ProviderRouter  # noqa: E402
+from usage import UsageMeter  # noqa: E402
+from voice_metrics import VoiceLatencyRecorder  # noqa: E402
+
+UTTERANCE = (0.6, 1.5)  # seconds of child speech per turn
+THINK_TIME = (1.0, 3.0)  # seconds a child takes before answering
+BARGE_IN_AFTER = (0.1, 0.6)  # seconds into the reply an impatient child speaks
+REPLY_TIMEOUT = 15.0  # seconds without a reply before the turn counts as lost
+LAG_INTERVAL = 0.05
+
+
+def build_worker_userdata() -> dict:
+    """What prewarm() leaves in proc.userdata, shared by every session"""
+    try:
+        silero = import_module("livekit.plugins.silero").VAD.load(
+            min_speech_duration=100,
+            min_silence_duration=600,
+            prefix_padding_duration=200,
+        )
+    except ImportError:
+        silero = None
+    phrase_cache = PhraseAudioCache(
+        os.getenv("CHAT_PHRASE_CACHE_DIR", os.path.join(CURRENT_DIR, "data", "phrases")),
+        get_phrase_voice_config(),
+    )
+    phrase_cache.load(CACHED_PHRASES)
+    userdata = {
+        "vad": FakeVAD(silero),
+        "turn_detector": "vad",
+        "phrase_cache": phrase_cache,
+    }
+    PROVIDER_CONFIG.prewarm(userdata)
+    return userdata
+
+
+class SimulatedChild:
+    """One session as the entrypoint builds it, and the child talking to it"""
+
+    def __init__(self, userdata: dict):
+        router = ProviderRouter(PROVIDER_CONFIG, userdata)
+        self.session = build_agent_session(router)
+        self.agent = CHATAssistant(
+            phrase_cache=userdata["phrase_cache"],
+            usage=UsageMeter(PIPELINE_PROVIDERS, router.plugins),
+            latency=VoiceLatencyRecorder(PIPELINE_PROVIDERS, router.plugins),
+        )
+        attach_session_handlers(self.session, self.agent, router)
+        self.avatar = build_avatar(userdata)
+        self.microphone = FakeChildAudio()
+        self.session.input.audio = self.microphone
+
+        self.speaking = asyncio.Event()
+        self.listening = asyncio.Event()
+        self.session.on("agent_state_changed", self._on_agent_state_changed)
+        # Child speech end -> first reply audio, VAD silence included
+        self.response_latencies: list = []
+        self.lost_turns = 0
+
+    def _on_agent_state_changed(self, event):
+        if event.new_state == "speaking":
+            self.speaking.set()
+        elif event.old_state == "speaking":
+            self.listening.set()
+
+    async def start(self):
+        await self.avatar.start(self.session)
+        await self.session.start(agent=self.agent)
+
+    async def aclose(self):
+        await self.session.aclose()
+        await self.avatar.aclose()
+
+    async def speak(self) -> bool:
+        """One child turn; True once the reply to it started playing"""
+        self.speaking.clear()
+        self.listening.clear()
+        await self.microphone.speak(random.uniform(*UTTERANCE))
+        spoken_at = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.speaking.wait(), REPLY_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.lost_turns += 1
+            return False
+        self.response_latencies.append(time.perf_counter() - spoken_at)
+        return True
+
+    async def run(self, turns: int, barge_in: float):
+        await self.start()
+        try:
+            for turn in range(turns):
+                replied = await self.speak()
+                if not replied or turn == turns - 1:
+                    continue
+                if random.random() < barge_in:
+                    # Talk over the reply; the session interrupts it
+                    await asyncio.sleep(random.uniform(*BARGE_IN_AFTER))
+                else:
+                    try:
+                        await asyncio.wait_for(self.listening.wait(), REPLY_TIMEOUT)
+                    except asyncio.TimeoutError:
+                        pass
+                    await asyncio.sleep(random.uniform(*THINK_TIME))
+            await asyncio.wait_for(self.listening.wait(), REPLY_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            await self.aclose()
+
+
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Peak RSS (KiB on Linux, bytes on macOS) where /proc is unavailable
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+async def measure_loop_lag(samples: list, stop: asyncio.Event):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(LAG_INTERVAL)
+        samples.append(time.perf_counter() - started - LAG_INTERVAL)
+
+
+def percentile(values, fraction: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+async def run_level(sessions: int, turns: int, userdata: dict, barge_in: float) -> dict:
+    children = [SimulatedChild(userdata) for _ in range(sessions)]
+
+    lag: list = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(lag, stop))
+    cpu_started, wall_started = time.process_time(), time.perf_counter()
+
+    await asyncio.gather(*(child.run(turns, barge_in) for child in children))
+
+    cpu, wall = time.process_time() - cpu_started, time.perf_counter() - wall_started
+    stop.set()
+    await lag_task
+
+    replies = [x for child in children for x in child.agent.first_audio_latencies]
+    responses = [x for child in children for x in child.response_latencies]
+    cancelled = [child.agent.barge_in.summary() for child in children]
+    return {
+        "sessions": sessions,
+        "turns": len(responses),
+        "lost": sum(child.lost_turns for child in children),
+        "cpu_pct": 100 * cpu / wall,
+        "rss_mb": current_rss_mb(),
+        "lag_p95_ms": 1000 * percentile(lag, 0.95),
+        "lag_max_ms": 1000 * max(lag),
+        "reply_p50_ms": 1000 * (statistics.median(replies) if replies else float("nan")),
+        "reply_p95_ms": 1000 * percentile(replies, 0.95),
+        "e2e_p50_ms": 1000 * (statistics.median(responses) if responses else float("nan")),
+        "e2e_p95_ms": 1000 * percentile(responses, 0.95),
+        "barge_ins": sum(c["cancelled_replies"] for c in cancelled),
+        "saved_tokens": sum(c["saved_llm_tokens"] for c in cancelled),
+        "saved_chars": sum(c["saved_tts_characters"] for c in cancelled),
+    }
+
+
+async def main():
+    levels_arg = sys.argv[1] if len(sys.argv) > 1 else "1,2,4,8"
+    levels = [int(n) for n in levels_arg.split(",")]
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    barge_in = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0
+    logging.getLogger().setLevel(logging.WARNING)
+    userdata = build_worker_userdata()
+
+    # reply: turn committed -> first audio; e2e: child stops speaking -> first audio
+    print(
+        f"{'sessions':>8} {'turns':>6} {'lost':>5} {'cpu%':>6} {'rss MB':>7} "
+        f"{'lag p95':>8} {'lag max':>8} {'reply p50':>10} {'reply p95':>10} "
+        f"{'e2e p50':>9} {'e2e p95':>9} "
+        f"{'barge-ins':>9} {'saved tok':>9} {'saved chr':>9}"
+    )
+    for sessions in levels:
+        r = await run_level(sessions, turns, userdata, barge_in)
+        print(
+            f"{r['sessions']:>8} {r['turns']:>6} {r['lost']:>5} "
+            f"{r['cpu_pct']:>6.1f} {r['rss_mb']:>7.1f} "
+            f"{r['lag_p95_ms']:>6.1f}ms {r['lag_max_ms']:>6.1f}ms "
+            f"{r['reply_p50_ms']:>8.0f}ms {r['reply_p95_ms']:>8.0f}ms "
+            f"{r['e2e_p50_ms']:>7.0f}ms {r['e2e_p95_ms']:>7.0f}ms "
+            f"{r['barge_ins']:>9} {r['saved_tokens']:>9} {r['saved_chars']:>9}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
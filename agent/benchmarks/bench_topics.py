@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+"""
+Micro-benchmark: compiled TopicIndex vs the original per-keyword substring loop
+Usage: python benchmarks/bench_topics.py [iterations]
+"""
+
+import pathlib
+import sys
+import timeit
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from topics import TOPIC_KEYWORDS, get_topic_index  # noqa: E402
+
+UTTERANCES = [
+    "dog",
+    "red car go",
+    "mama milk",
+    "i want the big blue ball",
+    "doggy go bye bye",
+    "no",
+    "the cat is sleeping on my teddy",
+    "more juice please mommy",
+    "uh oh",
+    "jump jump jump",
+]
+
+
+def legacy_detect(text: str, topic_keywords) -> set:
+    """The loop ConversationAnalytics used before the compiled index"""
+    topics = set()
+    for topic, keywords in topic_keywords.items():
+        if any(keyword in text for keyword in keywords):
+            topics.add(topic)
+    return topics
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    keywords = TOPIC_KEYWORDS["en"]
+    index = get_topic_index("en")
+
+    legacy = timeit.timeit(
+        lambda: [legacy_detect(u, keywords) for u in UTTERANCES], number=iterations
+    )
+    compiled = timeit.timeit(
+        lambda: [index.detect(u) for u in UTTERANCES], number=iterations
+    )
+
+    per_call = 1e6 / (iterations * len(UTTERANCES))
+    print(f"utterances per run: {len(UTTERANCES)}, runs: {iterations}")
+    print(f"legacy substring loop: {legacy * per_call:8.2f} us/utterance")
+    print(f"compiled topic index:  {compiled * per_call:8.2f} us/utterance")
+    print(f"speedup: {legacy / compiled:.1f}x")
+
+    false_hits = {
+        u: sorted(legacy_detect(u, keywords) - index.detect(u))
+        for u in UTTERANCES
+        if legacy_detect(u, keywords) - index.detect(u)
+    }
+    print(f"substring false hits removed: {false_hits}")
+
+
+if __name__ == "__main__":
+    main()
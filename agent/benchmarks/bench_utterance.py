@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+"""
+Micro-benchmark: single-pass UtteranceAnalyzer vs the per-turn code path it replaced
+(analytics strip/lower/split/regex/topics, four emotion keyword scans and a
+second split for the achievement level)
+Usage: python benchmarks/bench_utterance.py [iterations]
+"""
+
+import pathlib
+import re
+import sys
+import timeit
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from topics import get_topic_index  # noqa: E402
+from utterance import get_utterance_analyzer  # noqa: E402
+
+UTTERANCES = [
+    "dog",
+    "red car go",
+    "mama milk",
+    "I want the big blue ball",
+    "doggy go bye bye",
+    "no",
+    "the cat is sleeping on my teddy",
+    "more juice please mommy",
+    "uh oh, let me try",
+    "yay play play",
+    "سگ",
+    "ماشین قرمز",
+]
+
+
+def legacy_turn(text: str, topic_index) -> tuple:
+    """The work process_and_speak did per child turn before the analyzer"""
+    # ConversationAnalytics.add_child_utterance
+    clean_text = text.strip().lower()
+    word_count = len(clean_text.split())
+    words = re.findall(r"\b[a-zA-Z]+\b", clean_text)
+    topics = topic_index.detect(clean_text)
+
+    # KidFriendlyAvatarController.get_emotion_for_context
+    context_lower = text.lower()
+    if any(w in context_lower for w in ["great", "good", "perfect", "wonderful"]):
+        emotion = "celebrating"
+    elif any(w in context_lower for w in ["try", "attempt", "practice"]):
+        emotion = "encouraging"
+    elif any(w in context_lower for w in ["thinking", "hmm", "let me"]):
+        emotion = "thinking"
+    elif any(w in context_lower for w in ["excited", "fun", "play", "yay"]):
+        emotion = "excited"
+    else:
+        emotion = "happy"
+
+    # achievement level in process_and_speak
+    achievement = "good_attempt"
+    count = len(text.split())
+    if count == 1:
+        achievement = "first_word"
+    elif count > 1:
+        achievement = "breakthrough"
+
+    return word_count, set(words), topics, emotion, achievement
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    topic_index = get_topic_index("en")
+    analyzer = get_utterance_analyzer("en")
+
+    legacy = timeit.timeit(
+        lambda: [legacy_turn(u, topic_index) for u in UTTERANCES], number=iterations
+    )
+    single_pass = timeit.timeit(
+        lambda: [analyzer.analyze(u) for u in UTTERANCES], number=iterations
+    )
+
+    per_call = 1e6 / (iterations * len(UTTERANCES))
+    print(f"utterances per run: {len(UTTERANCES)}, runs: {iterations}")
+    print(f"legacy multi-scan path: {legacy * per_call:8.2f} us/utterance")
+    print(f"single-pass analyzer:   {single_pass * per_call:8.2f} us/utterance")
+    print(f"speedup: {legacy / single_pass:.1f}x")
+
+    legacy_words = set().union(*(legacy_turn(u, topic_index)[1] for u in UTTERANCES))
+    words = set().union(*(analyzer.analyze(u).vocabulary for u in UTTERANCES))
+    print(f"vocabulary kept: legacy {len(legacy_words)}, analyzer {len(words)}")
+    print(f"words the Latin-only regex dropped: {sorted(words - legacy_words)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Coalescing of rapid child utterance fragments into one turn
+Toddlers speak in bursts ("car... red... go"); each final transcript would
+otherwise start its own LLM call and TTS reply. Each turn the session
+commits is held for the rest of a short window after the child stopped
+speaking; if the child speaks again meanwhile, the turn is dropped and its
+fragment carried into the next one, so the burst gets a single reply. The
+window adapts to the pauses this child actually leaves between fragments of
+one burst, as seen by the VAD (speech start after a fragment).
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from prometheus_client import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+COALESCED_FRAGMENTS = Counter(
+    "chat_agent_coalesced_fragments_total",
+    "Child transcript fragments merged into an earlier fragment's turn",
+)
+COALESCE_WAIT = Histogram(
+    "chat_agent_coalesce_wait_seconds",
+    "Time a turn waited after its last fragment before being dispatched",
+    buckets=[0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0],
+)
+
+# process(session, text) replies to carried fragments no later turn picked up
+Process = Callable[[Any, str], Awaitable[None]]
+
+
+class UtteranceCoalescer:
+    """
+    The window is the 90th percentile of recent in-burst pauses plus a
+    margin, clamped to [min_window, max_window]; until enough pauses are
+    observed, `window` is used. A window of 0 disables coalescing.
+    Carried fragments that no later turn picks up (the child's speech was
+    not transcribed) are passed to `process` after `max_hold`.
+    """
+
+    def __init__(
+        self,
+        process: Process,
+        *,
+        window: float = 0.6,
+        min_window: float = 0.25,
+        max_window: float = 1.5,
+        margin: float = 0.1,
+        max_hold: float = 4.0,
+        min_samples: int = 5,
+    ):
+        self.process = process
+        self.default_window = window
+        self.min_window = min_window
+        self.max_window = max_window
+        self.margin = margin
+        self.max_hold = max_hold
+        self.min_samples = min_samples
+
+        self.fragments = 0
+        self.turns = 0
+        self.total_wait = 0.0
+        self._pauses: Deque[float] = deque(maxlen=50)
+        self._pending: List[str] = []
+        self._session = None
+        self._last_fragment_at: Optional[float] = None
+        self._first_fragment_at: Optional[float] = None
+        self._speech_ended_at: Optional[float] = None
+        # Resolved with the merged text, or None if the turn is carried over
+        self._held: Optional[asyncio.Future] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.default_window > 0
+
+    @property
+    def window(self) -> float:
+        if len(self._pauses) < self.min_samples:
+            return self.default_window
+        ordered = sorted(self._pauses)
+        p90 = ordered[min(len(ordered) - 1, int(0.9 * len(ordered)))]
+        return min(self.max_window, max(self.min_window, p90 + self.margin))
+
+    async def hold(self, session, text: str) -> Optional[str]:
+        """
+        Hold a turn the session committed until the window has passed. Returns
+        the text to reply to (with any carried fragments before it), or None
+        if the child spoke again and a later turn will carry this fragment.
+        """
+        self.fragments += 1
+        if not self.enabled:
+            self.turns += 1
+            return text
+
+        now = time.perf_counter()
+        if not self._pending:
+            self._first_fragment_at = now
+        self._pending.append(text.strip())
+        self._session = session
+        self._last_fragment_at = now
+        self._release(None)
+        self._held = asyncio.get_running_loop().create_future()
+        # The session already waited out its endpointing delay
+        waited = now - self._speech_ended_at if self._speech_ended_at else 0.0
+        self._arm(max(0.0, self.window - waited))
+        return await self._held
+
+    def on_speech_started(self):
+        """VAD: the child started speaking again; carry the held turn over"""
+        if not self._pending or self._last_fragment_at is None:
+            return
+        pause = time.perf_counter() - self._last_fragment_at
+        if pause <= self.max_window:
+            self._pauses.append(pause)
+        self._release(None)
+        # Fallback in case the speech never becomes a turn
+        waited = time.perf_counter() - self._first_fragment_at
+        self._arm(max(self.window, self.max_hold - waited))
+
+    def on_speech_ended(self):
+        """VAD: the child stopped speaking"""
+        self._speech_ended_at = time.perf_counter()
+
+    def _release(self, text: Optional[str]) -> bool:
+        held, self._held = self._held, None
+        if held is None or held.done():
+            return False
+        held.set_result(text)
+        return True
+
+    def _arm(self, delay: float):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def _dispatch(self):
+        self._timer = None
+        if not self._pending:
+            return
+        text = " ".join(self._pending)
+        merged = len(self._pending) - 1
+        wait = time.perf_counter() - self._last_fragment_at
+        self._pending = []
+
+        self.turns += 1
+        self.total_wait += wait
+        COALESCE_WAIT.observe(wait)
+        if merged:
+            COALESCED_FRAGMENTS.inc(merged)
+            logger.info(f"Coalesced {merged + 1} fragments into one turn: '{text}'")
+        if not self._release(text):
+            self._spawn(self._session, text)
+
+    def _spawn(self, session, text: str):
+        task = asyncio.create_task(self.process(session, text), name="child-turn")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def flush(self):
+        """Release whatever is pending right away (e.g. the session is ending)"""
+        if self._timer is not None:
+            self._timer.cancel()
+        self._dispatch()
+
+    def summary(self) -> Dict[str, float]:
+        saved = self.fragments - self.turns - len(self._pending)
+        return {
+            "fragments": self.fragments,
+            "turns": self.turns,
+            # each merged fragment is one LLM call and one TTS reply not made
+            "saved_llm_calls": saved,
+            "saved_tts_replies": saved,
+            "window_ms": round(self.window * 1000),
+            "avg_added_wait_ms": (
+                round(self.total_wait / self.turns * 1000, 1) if self.turns else 0
+            ),
+        }
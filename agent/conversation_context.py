@@ -0,0 +1,213 @@
+"""
+Token-budgeted conversation context for the CHAT assistant
+The session's chat context keeps every turn; the prompt sent to the LLM keeps
+only the recent ones, the oldest being folded into a running summary once the
+budget is hit
+"""
+
+import logging
+from collections import deque
+from typing import Deque, Dict, List, Set, Tuple
+
+from livekit.agents import ChatContext
+from livekit.agents.llm import ChatItem, ChatMessage
+
+logger = logging.getLogger(__name__)
+
+# Prompt for the summarizer of folded turns (a RollingSessionSummary)
+CONTEXT_SUMMARY_PROMPT = """You are CHAT, talking with a young child. Older turns of the conversation no longer fit in your prompt; keep a short memory of them.
+
+Memory so far:
+{summary}
+
+Older turns to add:
+{turns}
+{stats}
+Update the memory: what you played or talked about, words and sounds the child said, and anything you promised to come back to.
+Keep it to 2-3 short sentences. Reply with the updated memory only."""
+
+# Rough chars-per-token ratio; good enough for budgeting without a tokenizer
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+
+
+def estimate_ctx_tokens(chat_ctx: ChatContext) -> int:
+    return sum(
+        estimate_tokens(item.text_content or "")
+        for item in chat_ctx.items
+        if item.type == "message"
+    )
+
+
+class ConversationContextManager:
+    """
+    Keeps the LLM prompt size flat for arbitrarily long sessions.
+
+    The session's chat context grows with every turn; `fit()` builds the
+    prompt actually sent from it:
+        [system: instructions]
+        [system: running summary]
+        [recent turns, oldest first]
+    Turns are recorded (by message id) as the session adds them. When recent
+    turns exceed `turn_budget` tokens, the oldest are folded out of the prompt
+    until they fit in `turn_budget * low_watermark`, and shown as excerpts in
+    the summary instead. Excerpts are capped at `summary_budget` tokens; the
+    ones dropped to stay within it are handed to `summarizer` (a
+    RollingSessionSummary, see CONTEXT_SUMMARY_PROMPT), whose summary leads
+    the excerpts. Without a summarizer the excerpts are all there is.
+    """
+
+    def __init__(
+        self,
+        *,
+        turn_budget: int = 1200,
+        summary_budget: int = 300,
+        low_watermark: float = 0.7,
+    ):
+        self.turn_budget = turn_budget
+        self.summary_budget = summary_budget
+        self.low_watermark = low_watermark
+
+        self._turns: Deque[Tuple[ChatMessage, int]] = deque()
+        self._turn_tokens = 0
+        self._seen: Set[str] = set()
+        # Ids of the turns folded out of the prompt
+        self._folded: Set[str] = set()
+        # Excerpts of folded turns: (speaker, text, tokens)
+        self._summary_lines: Deque[Tuple[str, str, int]] = deque()
+        self._summary_tokens = 0
+        self.folded_turns = 0
+        # Estimated size of the last prompt built by fit()
+        self.prompt_tokens = 0
+        self.summarizer = None
+
+    def attach_summarizer(self, summarizer):
+        """Summarize the turns whose excerpts are dropped from now on"""
+        self.summarizer = summarizer
+
+    @property
+    def summary(self) -> str:
+        parts = []
+        if self.summarizer is not None and self.summarizer.summary:
+            parts.append(self.summarizer.summary)
+        parts.extend(
+            self._excerpt(speaker, text) for speaker, text, _ in self._summary_lines
+        )
+        return "\n".join(parts)
+
+    def add_turn(self, message: ChatItem):
+        """Record a child or assistant message the session added to its context"""
+        if message.type != "message" or message.role not in ("user", "assistant"):
+            return
+        if message.id in self._seen:
+            return
+        text = message.text_content
+        if not text or not text.strip():
+            return
+        self._seen.add(message.id)
+        tokens = estimate_tokens(text)
+        self._turns.append((message, tokens))
+        self._turn_tokens += tokens
+
+        if self._turn_tokens > self.turn_budget:
+            self._fold()
+
+    def _fold(self):
+        """Move the oldest turns into the running summary"""
+        target = int(self.turn_budget * self.low_watermark)
+        folded: List[ChatMessage] = []
+        while self._turns and self._turn_tokens > target:
+            message, tokens = self._turns.popleft()
+            self._turn_tokens -= tokens
+            self._folded.add(message.id)
+            folded.append(message)
+
+        for message in folded:
+            speaker = "child" if message.role == "user" else "you"
+            text = message.text_content or ""
+            self._add_excerpt(speaker, text)
+        # Only what the excerpts cannot hold costs a summarizer call
+        while self._summary_lines and self._summary_tokens > self.summary_budget:
+            speaker, text, tokens = self._summary_lines.popleft()
+            self._summary_tokens -= tokens
+            if self.summarizer is not None:
+                self.summarizer.add_turn(speaker, text)
+
+        self.folded_turns += len(folded)
+        logger.debug(
+            f"Folded {len(folded)} turns into summary ({self._summary_tokens} tokens)"
+        )
+
+    def _add_excerpt(self, speaker: str, text: str):
+        tokens = estimate_tokens(self._excerpt(speaker, text))
+        self._summary_lines.append((speaker, text, tokens))
+        self._summary_tokens += tokens
+
+    @staticmethod
+    def _excerpt(speaker: str, text: str) -> str:
+        return f"- {speaker}: {text}"
+
+    def fit(self, chat_ctx: ChatContext) -> ChatContext:
+        """The prompt for `chat_ctx`: folded turns replaced by the summary"""
+        items = [item for item in chat_ctx.items if item.id not in self._folded]
+        system_text = self._system_text()
+        if system_text:
+            # After the instructions, which lead the session's context
+            position = 0
+            while (
+                position < len(items)
+                and items[position].type == "message"
+                and items[position].role in ("system", "developer")
+            ):
+                position += 1
+            items.insert(position, ChatMessage(role="system", content=[system_text]))
+        fitted = ChatContext(items)
+        self.prompt_tokens = estimate_ctx_tokens(fitted)
+        return fitted
+
+    def snapshot(self) -> Dict:
+        """Running summary and recent turns, for a session checkpoint"""
+        return {
+            "summary_lines": [
+                [speaker, text] for speaker, text, _ in self._summary_lines
+            ],
+            "summarizer": (
+                self.summarizer.snapshot() if self.summarizer is not None else None
+            ),
+            "turns": [
+                [message.role, message.text_content or ""] for message, _ in self._turns
+            ],
+            "folded_turns": self.folded_turns,
+        }
+
+    def restore(self, state: Dict):
+        """Rebuild the context from a checkpoint, without re-folding"""
+        self._summary_lines = deque()
+        self._summary_tokens = 0
+        for speaker, text in state["summary_lines"]:
+            self._add_excerpt(speaker, text)
+        if self.summarizer is not None and state.get("summarizer"):
+            self.summarizer.restore(state["summarizer"])
+        self._turns = deque()
+        self._turn_tokens = 0
+        for role, text in state["turns"]:
+            message = ChatMessage(role=role, content=[text])
+            tokens = estimate_tokens(text)
+            self._seen.add(message.id)
+            self._turns.append((message, tokens))
+            self._turn_tokens += tokens
+        self.folded_turns = state["folded_turns"]
+
+    def history_ctx(self) -> ChatContext:
+        """The recent turns, as recorded, to seed the session's context"""
+        return ChatContext([message for message, _ in self._turns])
+
+    def _system_text(self) -> str:
+        summary = self.summary
+        if not summary:
+            return ""
+        return f"EARLIER IN THIS SESSION (summary):\n{summary}"
@@ -0,0 +1,443 @@
+"""
+In-process fake STT / LLM / TTS / avatar providers
+They plug into the same AgentSession construction as the real plugins
+(CHAT_FAKE_PROVIDERS=true) and are used by the capacity benchmarks, so worker
+density can be measured without Cartesia, Gemini, ElevenLabs or bitHuman.
+The fake child microphone and VAD let a benchmark drive an AgentSession
+without a room.
+"""
+
+import array
+import asyncio
+import itertools
+import logging
+import os
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from livekit import rtc
+from livekit.agents import (
+    DEFAULT_API_CONNECT_OPTIONS,
+    APIConnectOptions,
+    llm,
+    stt,
+    tts,
+    vad,
+)
+from livekit.agents.utils import AudioBuffer
+from livekit.agents.voice import io
+
+logger = logging.getLogger(__name__)
+
+FAKE_TRANSCRIPTS = [
+    "dog",
+    "red car",
+    "mama milk",
+    "ball go up",
+    "more juice please",
+    "uh oh",
+]
+
+FAKE_REPLIES = [
+    "Yes! A big dog! Woof woof!",
+    "Red car goes vroom!",
+    "Milk, yummy milk!",
+    "Up, up, up! Great job!",
+    "More juice, please. Wonderful!",
+]
+
+
+def _env_ms(name: str, default: float) -> float:
+    return float(os.getenv(name, default)) / 1000
+
+
+@dataclass
+class FakeProfile:
+    """Latency and cost knobs for every fake provider, in seconds"""
+
+    stt_latency: float = 0.15
+    llm_ttft: float = 0.35
+    llm_token_interval: float = 0.02
+    tts_ttfb: float = 0.2
+    tts_chars_per_second: float = 14.0  # speaking rate of the produced audio
+    avatar_start: float = 0.5
+    avatar_fps: int = 25
+    avatar_render_ms: float = 4.0  # CPU burned per rendered video frame
+    jitter: float = 0.2  # +/- fraction applied to every latency
+    transcripts: List[str] = field(default_factory=lambda: list(FAKE_TRANSCRIPTS))
+    replies: List[str] = field(default_factory=lambda: list(FAKE_REPLIES))
+
+    @classmethod
+    def from_env(cls) -> "FakeProfile":
+        defaults = cls()
+        return cls(
+            stt_latency=_env_ms("CHAT_FAKE_STT_MS", defaults.stt_latency * 1000),
+            llm_ttft=_env_ms("CHAT_FAKE_LLM_TTFT_MS", defaults.llm_ttft * 1000),
+            tts_ttfb=_env_ms("CHAT_FAKE_TTS_TTFB_MS", defaults.tts_ttfb * 1000),
+            avatar_render_ms=float(
+                os.getenv("CHAT_FAKE_AVATAR_RENDER_MS", defaults.avatar_render_ms)
+            ),
+        )
+
+    def delay(self, seconds: float) -> float:
+        return max(0.0, seconds * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+
+class FakeSTT(stt.STT):
+    """Non-streaming STT; AgentSession wraps it with VAD like any batch STT"""
+
+    def __init__(self, profile: Optional[FakeProfile] = None):
+        super().__init__(
+            capabilities=stt.STTCapabilities(streaming=False, interim_results=False)
+        )
+        self.profile = profile or FakeProfile()
+        self._transcripts = itertools.cycle(self.profile.transcripts)
+
+    @property
+    def model(self) -> str:
+        return "fake-stt"
+
+    @property
+    def provider(self) -> str:
+        return "fake"
+
+    async def _recognize_impl(
+        self,
+        buffer: AudioBuffer,
+        *,
+        language=None,
+        conn_options: APIConnectOptions,
+    ) -> stt.SpeechEvent:
+        await asyncio.sleep(self.profile.delay(self.profile.stt_latency))
+        return stt.SpeechEvent(
+            type=stt.SpeechEventType.FINAL_TRANSCRIPT,
+            request_id=uuid.uuid4().hex,
+            alternatives=[
+                stt.SpeechData(language="en", text=next(self._transcripts))
+            ],
+        )
+
+
+class FakeLLMStream(llm.LLMStream):
+    async def _run(self):
+        profile: FakeProfile = self._llm.profile
+        reply = next(self._llm._replies)
+        request_id = uuid.uuid4().hex
+
+        await asyncio.sleep(profile.delay(profile.llm_ttft))
+        for index, word in enumerate(reply.split(" ")):
+            if index:
+                await asyncio.sleep(profile.delay(profile.llm_token_interval))
+            self._event_ch.send_nowait(
+                llm.ChatChunk(
+                    id=request_id,
+                    delta=llm.ChoiceDelta(
+                        role="assistant", content=word if not index else f" {word}"
+                    ),
+                )
+            )
+
+
+class FakeLLM(llm.LLM):
+    """Streams a canned reply word by word after a configurable TTFT"""
+
+    def __init__(self, profile: Optional[FakeProfile] = None):
+        super().__init__()
+        self.profile = profile or FakeProfile()
+        self._replies = itertools.cycle(self.profile.replies)
+
+    @property
+    def model(self) -> str:
+        return "fake-llm"
+
+    @property
+    def provider(self) -> str:
+        return "fake"
+
+    def chat(
+        self,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools=None,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        **kwargs,
+    ) -> FakeLLMStream:
+        return FakeLLMStream(
+            self, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options
+        )
+
+
+class FakeChunkedStream(tts.ChunkedStream):
+    async def _run(self, output_emitter: tts.AudioEmitter):
+        profile: FakeProfile = self._tts.profile
+        sample_rate = self._tts.sample_rate
+        output_emitter.initialize(
+            request_id=uuid.uuid4().hex,
+            sample_rate=sample_rate,
+            num_channels=1,
+            mime_type="audio/pcm",
+        )
+
+        await asyncio.sleep(profile.delay(profile.tts_ttfb))
+        duration = max(0.3, len(self._input_text) / profile.tts_chars_per_second)
+        chunk = bytes(2 * sample_rate // 10)  # 100ms of 16-bit silence
+        for _ in range(int(duration * 10)):
+            output_emitter.push(chunk)
+            await asyncio.sleep(0)
+        output_emitter.flush()
+
+
+class FakeTTS(tts.TTS):
+    """Produces silence whose length follows the text, after a configurable TTFB"""
+
+    def __init__(self, profile: Optional[FakeProfile] = None, sample_rate: int = 24000):
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=sample_rate,
+            num_channels=1,
+        )
+        self.profile = profile or FakeProfile()
+
+    @property
+    def model(self) -> str:
+        return "fake-tts"
+
+    @property
+    def provider(self) -> str:
+        return "fake"
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> FakeChunkedStream:
+        return FakeChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+
+class FakeChildAudio(io.AudioInput):
+    """
+    Microphone of a simulated child: 20ms frames paced in real time, silent
+    except while speak() sends noise at speech level
+    """
+
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = 20):
+        self.sample_rate = sample_rate
+        self.samples_per_frame = sample_rate * frame_ms // 1000
+        self.frame_duration = frame_ms / 1000
+        self._silence = bytes(2 * self.samples_per_frame)
+        self._noise = [
+            array.array(
+                "h",
+                (random.randint(-8000, 8000) for _ in range(self.samples_per_frame)),
+            ).tobytes()
+            for _ in range(8)
+        ]
+        self._speech_frames = 0
+        self._spoken: Optional[asyncio.Future] = None
+        self._next_at: Optional[float] = None
+
+    async def speak(self, seconds: float):
+        """Send `seconds` of speech; returns once the last frame went out"""
+        self._speech_frames = max(1, int(seconds / self.frame_duration))
+        self._spoken = asyncio.get_running_loop().create_future()
+        await self._spoken
+
+    async def __anext__(self) -> rtc.AudioFrame:
+        now = time.perf_counter()
+        self._next_at = max(self._next_at or now, now - 1.0) + self.frame_duration
+        await asyncio.sleep(max(0.0, self._next_at - now))
+
+        data = self._silence
+        if self._speech_frames > 0:
+            self._speech_frames -= 1
+            data = self._noise[self._speech_frames % len(self._noise)]
+            if self._speech_frames == 0 and not self._spoken.done():
+                self._spoken.set_result(None)
+        return rtc.AudioFrame(data, self.sample_rate, 1, self.samples_per_frame)
+
+
+class FakeVAD(vad.VAD):
+    """
+    Level-threshold VAD: silero does not take the fake child's noise for
+    speech. With `inner` (silero) every frame is run through it as well and
+    its events discarded, so its inference cost is still paid.
+    """
+
+    def __init__(
+        self,
+        inner: Optional[vad.VAD] = None,
+        *,
+        threshold: int = 2000,
+        min_speech_duration: float = 0.1,
+        min_silence_duration: float = 0.6,
+    ):
+        super().__init__(capabilities=vad.VADCapabilities(update_interval=0.032))
+        self.inner = inner
+        self.threshold = threshold
+        self.min_speech_duration = min_speech_duration
+        self.min_silence_duration = min_silence_duration
+
+    def stream(self) -> "FakeVADStream":
+        return FakeVADStream(self)
+
+
+class FakeVADStream(vad.VADStream):
+    async def _main_task(self):
+        fake: FakeVAD = self._vad
+        inner = fake.inner.stream() if fake.inner is not None else None
+        drain = asyncio.create_task(self._drain(inner)) if inner is not None else None
+
+        samples_index = 0
+        speaking = False
+        speech: List[rtc.AudioFrame] = []
+        speech_duration = silence_duration = 0.0
+
+        def event(type_, frames, **kwargs) -> vad.VADEvent:
+            return vad.VADEvent(
+                type=type_,
+                samples_index=samples_index,
+                timestamp=time.time(),
+                speech_duration=speech_duration,
+                silence_duration=silence_duration,
+                frames=frames,
+                **kwargs,
+            )
+
+        try:
+            async for frame in self._input_ch:
+                if isinstance(frame, self._FlushSentinel):
+                    continue
+                if inner is not None:
+                    inner.push_frame(frame)
+                samples_index += frame.samples_per_channel
+                duration = frame.samples_per_channel / frame.sample_rate
+                loud = max(frame.data, default=0) > fake.threshold
+
+                if loud:
+                    speech.append(frame)
+                    speech_duration += duration
+                    silence_duration = 0.0
+                    if not speaking and speech_duration >= fake.min_speech_duration:
+                        speaking = True
+                        self._event_ch.send_nowait(
+                            event(vad.VADEventType.START_OF_SPEECH, list(speech))
+                        )
+                elif speaking:
+                    speech.append(frame)
+                    silence_duration += duration
+                else:
+                    speech.clear()
+                    speech_duration = 0.0
+                    silence_duration += duration
+
+                self._event_ch.send_nowait(
+                    event(
+                        vad.VADEventType.INFERENCE_DONE,
+                        [frame],
+                        probability=1.0 if loud else 0.0,
+                        speaking=speaking,
+                    )
+                )
+                if speaking and silence_duration >= fake.min_silence_duration:
+                    self._event_ch.send_nowait(
+                        event(vad.VADEventType.END_OF_SPEECH, list(speech))
+                    )
+                    speaking = False
+                    speech.clear()
+                    speech_duration = 0.0
+        finally:
+            if inner is not None:
+                await inner.aclose()
+                drain.cancel()
+
+    @staticmethod
+    async def _drain(stream: vad.VADStream):
+        async for _ in stream:
+            pass
+
+
+class FakeAvatarAudioOutput(io.AudioOutput):
+    """
+    The avatar's audio sink: each segment plays out in real time from its
+    first frame, and is cut short by clear_buffer()
+    """
+
+    def __init__(self):
+        super().__init__(next_in_chain=None, sample_rate=None)
+        self._segment_started: Optional[float] = None
+        self._segment_duration = 0.0
+        self._playout: Optional[asyncio.Task] = None
+
+    async def capture_frame(self, frame: rtc.AudioFrame) -> None:
+        await super().capture_frame(frame)
+        if self._segment_started is None:
+            self._segment_started = time.perf_counter()
+            self._segment_duration = 0.0
+        self._segment_duration += frame.duration
+
+    def flush(self) -> None:
+        super().flush()
+        if self._segment_started is not None and self._playout is None:
+            self._playout = asyncio.create_task(self._play_out())
+
+    async def _play_out(self):
+        remaining = self._segment_started + self._segment_duration - time.perf_counter()
+        await asyncio.sleep(max(0.0, remaining))
+        self._finish(interrupted=False)
+
+    def clear_buffer(self) -> None:
+        if self._segment_started is None:
+            return
+        if self._playout is not None:
+            self._playout.cancel()
+        self._finish(interrupted=True)
+
+    def _finish(self, interrupted: bool):
+        played = min(time.perf_counter() - self._segment_started, self._segment_duration)
+        self._segment_started = None
+        self._playout = None
+        self.on_playback_finished(playback_position=played, interrupted=interrupted)
+
+
+class FakeAvatarSession:
+    """
+    Stand-in for bithuman.AvatarSession: renders idle frames for the whole
+    session, burning `avatar_render_ms` of CPU per frame in a worker thread
+    the way the local bitHuman runtime does. Like the real avatar it takes
+    over the session's audio output, playing replies out in real time.
+    """
+
+    def __init__(self, profile: Optional[FakeProfile] = None):
+        self.profile = profile or FakeProfile()
+        self.frames_rendered = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, agent_session=None, room: Optional[rtc.Room] = None):
+        await asyncio.sleep(self.profile.delay(self.profile.avatar_start))
+        if agent_session is not None:
+            agent_session.output.audio = FakeAvatarAudioOutput()
+        if self._task is None:
+            self._task = asyncio.create_task(self._render_loop(), name="fake-avatar")
+
+    def _render_frame(self):
+        deadline = time.thread_time() + self.profile.avatar_render_ms / 1000
+        while time.thread_time() < deadline:
+            pass
+
+    async def _render_loop(self):
+        interval = 1 / self.profile.avatar_fps
+        while True:
+            started = time.perf_counter()
+            await asyncio.to_thread(self._render_frame)
+            self.frames_rendered += 1
+            await asyncio.sleep(max(0.0, interval - (time.perf_counter() - started)))
+
+    async def aclose(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
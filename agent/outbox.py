@@ -0,0 +1,219 @@
+"""
+Durable on-disk outbox for session analytics
+Payloads are written to SQLite first and delivered by a background flusher,
+so a slow or unavailable backend (or a worker restart) does not lose sessions
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# sender(payload, participant_id) -> HTTP status, or None on network error
+Sender = Callable[[dict, str], Awaitable[Optional[int]]]
+
+# 4xx responses that are still worth retrying; every other 4xx is dead-lettered.
+# 401 is a credential problem on our side (e.g. a rotated service token), not
+# a bad payload, so the row waits for it to be fixed
+RETRYABLE_CLIENT_STATUSES = {401, 408, 409, 425, 429}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    participant_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    dead INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (dead, next_attempt_at);
+"""
+
+
+class AnalyticsOutbox:
+    """
+    SQLite-backed spool drained by a background flusher with batching and retry
+    Rows are leased by pushing next_attempt_at forward, so several job
+    processes can share one file without sending the same row twice
+    """
+
+    def __init__(
+        self,
+        path: str,
+        sender: Sender,
+        *,
+        batch_size: int = 20,
+        flush_interval: float = 5.0,
+        lease_seconds: float = 60.0,
+        max_attempts: int = 12,
+        backoff_base: float = 2.0,
+        backoff_cap: float = 600.0,
+    ):
+        self.path = path
+        self.sender = sender
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(outbox)")}
+            if "jwt_token" in columns:
+                # Outboxes written before the service credential kept user tokens
+                conn.execute("ALTER TABLE outbox DROP COLUMN jwt_token")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    # --- Storage (blocking, always called through asyncio.to_thread) ---
+
+    def _insert(self, payload: dict, participant_id: str) -> int:
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO outbox (participant_id, payload, created_at, next_attempt_at)"
+                " VALUES (?, ?, ?, ?)",
+                (participant_id, json.dumps(payload), now, now),
+            )
+            return cursor.lastrowid
+
+    def _claim_due(self) -> List[Tuple[int, str, str, int]]:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT id, participant_id, payload, attempts FROM outbox"
+                " WHERE dead = 0 AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+                (now, self.batch_size),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE outbox SET next_attempt_at = ? WHERE id = ?",
+                [(now + self.lease_seconds, row[0]) for row in rows],
+            )
+            conn.execute("COMMIT")
+            return rows
+
+    def _mark_delivered(self, row_id: int):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM outbox WHERE id = ?", (row_id,))
+
+    def _mark_failed(self, row_id: int, attempts: int, error: str, dead: bool):
+        delay = random.uniform(
+            0, min(self.backoff_cap, self.backoff_base * 2**attempts)
+        )
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ?,"
+                " dead = ? WHERE id = ?",
+                (attempts, time.time() + delay, error, int(dead), row_id),
+            )
+
+    def _count(self) -> Tuple[int, int]:
+        with self._connect() as conn:
+            pending, dead = conn.execute(
+                "SELECT COALESCE(SUM(dead = 0), 0), COALESCE(SUM(dead = 1), 0) FROM outbox"
+            ).fetchone()
+            return pending, dead
+
+    # --- Async API ---
+
+    async def enqueue(self, payload: dict, participant_id: str) -> int:
+        """Persist a payload and nudge the flusher; returns the outbox row id"""
+        row_id = await asyncio.to_thread(self._insert, payload, participant_id)
+        logger.info(f"Queued analytics for {participant_id} in outbox (row {row_id})")
+        self._wakeup.set()
+        return row_id
+
+    async def _deliver(self, row: Tuple[int, str, str, int]) -> bool:
+        row_id, participant_id, payload, attempts = row
+        attempts += 1
+        try:
+            status = await self.sender(json.loads(payload), participant_id)
+        except Exception as e:
+            status, error = None, repr(e)
+        else:
+            error = f"HTTP {status}" if status is not None else "network error"
+
+        if status is not None and 200 <= status < 300:
+            await asyncio.to_thread(self._mark_delivered, row_id)
+            return True
+
+        rejected = (
+            status is not None
+            and 400 <= status < 500
+            and status not in RETRYABLE_CLIENT_STATUSES
+        )
+        dead = rejected or attempts >= self.max_attempts
+        if dead:
+            logger.error(
+                f"Dropping outbox row {row_id} for {participant_id} after {attempts} attempt(s): {error}"
+            )
+        await asyncio.to_thread(self._mark_failed, row_id, attempts, error, dead)
+        return False
+
+    async def flush_once(self) -> int:
+        """Deliver one batch of due rows concurrently; returns how many succeeded"""
+        rows = await asyncio.to_thread(self._claim_due)
+        if not rows:
+            return 0
+        results = await asyncio.gather(*(self._deliver(row) for row in rows))
+        delivered = sum(results)
+        logger.info(f"Outbox flushed {delivered}/{len(rows)} row(s)")
+        return delivered
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                while await self.flush_once() == self.batch_size:
+                    pass  # keep draining full batches
+            except Exception as e:
+                logger.error(f"Outbox flush failed: {e}")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        """Start the background flusher (idempotent)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="analytics-outbox")
+
+    async def stop(self, final_flush_timeout: float = 5.0):
+        """Stop the flusher after a last bounded delivery attempt"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await asyncio.wait_for(self.flush_once(), final_flush_timeout)
+        except Exception as e:
+            logger.warning(f"Final outbox flush incomplete: {e!r}")
+        pending, dead = await asyncio.to_thread(self._count)
+        logger.info(f"Outbox stopped with {pending} pending and {dead} dead row(s)")
@@ -0,0 +1,146 @@
+"""
+Content-addressed on-disk audio cache for fixed agent phrases
+Known phrases (e.g. encouragements) are synthesized once per host and then
+played straight from disk instead of going through a TTS round trip
+"""
+
+import asyncio
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import wave
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Iterable, Optional
+
+from livekit import rtc
+
+logger = logging.getLogger(__name__)
+
+FRAME_MS = 100  # duration of each frame handed to the audio output
+
+
+@dataclass
+class CachedAudio:
+    """16-bit PCM audio for one phrase"""
+
+    pcm: bytes
+    sample_rate: int
+    num_channels: int
+
+    async def frames(self) -> AsyncIterator[rtc.AudioFrame]:
+        """Yield the audio as fixed-size frames suitable for session.say(audio=...)"""
+        bytes_per_sample = 2 * self.num_channels
+        step = self.sample_rate * FRAME_MS // 1000 * bytes_per_sample
+        for offset in range(0, len(self.pcm), step):
+            chunk = self.pcm[offset : offset + step]
+            yield rtc.AudioFrame(
+                data=chunk,
+                sample_rate=self.sample_rate,
+                num_channels=self.num_channels,
+                samples_per_channel=len(chunk) // bytes_per_sample,
+            )
+
+
+class PhraseAudioCache:
+    """
+    Files are named by sha256(voice_id, model, voice_settings, text), so any
+    change to the voice configuration naturally misses the old entries.
+    """
+
+    def __init__(self, directory: str, voice_config: Dict):
+        self.directory = directory
+        self.voice_config = voice_config
+        self._audio: Dict[str, CachedAudio] = {}
+        self._fill_task: Optional[asyncio.Task] = None
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, text: str) -> str:
+        material = json.dumps(
+            {**self.voice_config, "text": text}, sort_keys=True, ensure_ascii=False
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _path(self, text: str) -> str:
+        return os.path.join(self.directory, f"{self.key(text)}.wav")
+
+    def get(self, text: str) -> Optional[CachedAudio]:
+        return self._audio.get(text)
+
+    def load(self, texts: Iterable[str]) -> int:
+        """Read already synthesized phrases into memory; returns how many were found"""
+        for text in texts:
+            path = self._path(text)
+            if text in self._audio or not os.path.exists(path):
+                continue
+            try:
+                with wave.open(path, "rb") as wav:
+                    self._audio[text] = CachedAudio(
+                        pcm=wav.readframes(wav.getnframes()),
+                        sample_rate=wav.getframerate(),
+                        num_channels=wav.getnchannels(),
+                    )
+            except (wave.Error, EOFError, OSError) as e:
+                logger.warning(f"Discarding unreadable cached phrase {path}: {e}")
+                os.remove(path)
+        return len(self._audio)
+
+    def _store(self, text: str, audio: CachedAudio):
+        path = self._path(text)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with wave.open(tmp_path, "wb") as wav:
+            wav.setnchannels(audio.num_channels)
+            wav.setsampwidth(2)
+            wav.setframerate(audio.sample_rate)
+            wav.writeframes(audio.pcm)
+        os.replace(tmp_path, path)  # atomic, so readers never see partial files
+
+    def start_fill(self, tts, texts: Iterable[str]) -> asyncio.Task:
+        """
+        Run `fill` in the background once per process; later jobs get the same
+        task (a fill cancelled with its job is started again)
+        """
+        task = self._fill_task
+        if task is None or task.cancelled():
+            self._fill_task = asyncio.create_task(
+                self.fill(tts, list(texts)), name="phrase-cache-fill"
+            )
+        return self._fill_task
+
+    async def fill(self, tts, texts: Iterable[str]):
+        """
+        Synthesize every phrase that is not cached yet with the session's TTS.
+        One process per host fills the directory at a time; the others skip.
+        """
+        texts = list(texts)
+        with open(os.path.join(self.directory, ".fill.lock"), "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                logger.info("Phrase cache is being filled by another process")
+                return
+            # Pick up what other processes synthesized since this one prewarmed
+            await asyncio.to_thread(self.load, texts)
+            for text in texts:
+                if text not in self._audio:
+                    await self._synthesize(tts, text)
+
+    async def _synthesize(self, tts, text: str):
+        """Synthesize and store one phrase; failures are logged and skipped"""
+        try:
+            pcm = bytearray()
+            sample_rate = num_channels = 0
+            async with tts.synthesize(text) as stream:
+                async for event in stream:
+                    pcm += bytes(event.frame.data)
+                    sample_rate = event.frame.sample_rate
+                    num_channels = event.frame.num_channels
+            if not pcm:
+                return
+            audio = CachedAudio(bytes(pcm), sample_rate, num_channels)
+            await asyncio.to_thread(self._store, text, audio)
+            self._audio[text] = audio
+            logger.info(f"Cached synthesized phrase: '{text}'")
+        except Exception as e:
+            logger.warning(f"Could not pre-synthesize '{text}': {e}")
@@ -0,0 +1,163 @@
+"""
+TTL + LRU cache for child conversation prompts with ETag revalidation
+Entries live in memory and in a small SQLite file shared by every job process
+on the host, since each LiveKit job runs in its own process
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS prompt_cache (
+    child_id TEXT PRIMARY KEY,
+    prompt TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL,
+    used_at REAL NOT NULL
+);
+"""
+
+
+@dataclass
+class CachedPrompt:
+    prompt: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+    def is_fresh(self, ttl: float) -> bool:
+        return time.time() - self.fetched_at < ttl
+
+
+class PromptCache:
+    """
+    Fresh entries (younger than `ttl`) are served without any backend call.
+    Stale entries keep their validators so the caller can send a conditional
+    GET and only pay for a 304.
+    """
+
+    def __init__(
+        self, path: Optional[str], *, ttl: float = 300.0, max_entries: int = 512
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedPrompt]" = OrderedDict()
+        self._schema_ready = False
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        if not self._schema_ready:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            if not self._schema_ready:
+                conn.executescript(SCHEMA)
+                self._schema_ready = True
+            yield conn
+        finally:
+            conn.close()
+
+    async def get(self, child_id: str) -> Optional[CachedPrompt]:
+        """Return the entry (fresh or stale) and mark it most recently used"""
+        entry = self._entries.get(child_id)
+        if entry is not None:
+            self._entries.move_to_end(child_id)
+            return entry
+
+        if not self.path:
+            return None
+        row = await asyncio.to_thread(self._load, child_id)
+        if row is None:
+            return None
+        entry = CachedPrompt(*row)
+        self._remember(child_id, entry)
+        return entry
+
+    async def put(
+        self,
+        child_id: str,
+        prompt: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+    ) -> CachedPrompt:
+        entry = CachedPrompt(prompt, etag, last_modified, time.time())
+        self._remember(child_id, entry)
+        await self._persist(child_id, entry)
+        return entry
+
+    async def touch(self, child_id: str) -> Optional[CachedPrompt]:
+        """Mark an entry as revalidated (after a 304) and return it"""
+        entry = await self.get(child_id)
+        if entry is not None:
+            entry.fetched_at = time.time()
+            await self._persist(child_id, entry)
+        return entry
+
+    def _remember(self, child_id: str, entry: CachedPrompt):
+        self._entries[child_id] = entry
+        self._entries.move_to_end(child_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _persist(self, child_id: str, entry: CachedPrompt):
+        if self.path:
+            await asyncio.to_thread(self._store, child_id, entry)
+
+    # --- Storage (blocking, always called through asyncio.to_thread) ---
+
+    def _load(self, child_id: str) -> Optional[tuple]:
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT prompt, etag, last_modified, fetched_at FROM prompt_cache"
+                    " WHERE child_id = ?",
+                    (child_id,),
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE prompt_cache SET used_at = ? WHERE child_id = ?",
+                        (time.time(), child_id),
+                    )
+                return row
+        except sqlite3.Error as e:
+            logger.warning(f"Prompt cache read failed: {e}")
+            return None
+
+    def _store(self, child_id: str, entry: CachedPrompt):
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO prompt_cache"
+                    " (child_id, prompt, etag, last_modified, fetched_at, used_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        child_id,
+                        entry.prompt,
+                        entry.etag,
+                        entry.last_modified,
+                        entry.fetched_at,
+                        now,
+                    ),
+                )
+                # LRU eviction of the shared store
+                conn.execute(
+                    "DELETE FROM prompt_cache WHERE child_id IN ("
+                    " SELECT child_id FROM prompt_cache ORDER BY used_at DESC"
+                    " LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Prompt cache write failed: {e}")
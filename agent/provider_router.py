@@ -0,0 +1,663 @@
+"""
+Latency-SLO routing between primary and secondary providers
+Each component keeps a rolling window of its providers' latencies (LLM time
+to first token, TTS time to first byte, STT end of speech to final
+transcript). The LLM hedges: when the primary has not produced a token
+after its own p95, the same request goes to the hedge provider and the first
+one to answer wins. STT and TTS fail over: when the primary's p95 breaches
+its SLO the secondary serves until a cooldown expires. Components without a
+secondary provider are used unwrapped.
+"""
+
+import asyncio
+import dataclasses
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from livekit.agents import (
+    DEFAULT_API_CONNECT_OPTIONS,
+    NOT_GIVEN,
+    APIConnectOptions,
+    NotGivenOr,
+    llm,
+    stt,
+    tts,
+)
+from livekit.agents import metrics as lk_metrics
+from prometheus_client import Counter, Gauge, Histogram
+
+from providers import ProviderConfig
+
+logger = logging.getLogger(__name__)
+
+ROUTE_DECISIONS = Counter(
+    "chat_agent_provider_route_decisions_total",
+    "Routing decisions (hedge_sent, primary_won, hedge_won, error_failover, failover, failback)",
+    ["component", "decision", "provider"],
+)
+PROVIDER_LATENCY_P95 = Gauge(
+    "chat_agent_provider_latency_p95_seconds",
+    "Rolling p95 latency the router sees for each provider",
+    ["component", "provider"],
+    multiprocess_mode="livemax",
+)
+HEDGE_DELAY = Histogram(
+    "chat_agent_llm_hedge_delay_seconds",
+    "Wait before a hedged LLM request was sent",
+    buckets=[0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0],
+)
+
+# p95 latency each component may reach before failing over
+SLO = {
+    "stt": float(os.getenv("CHAT_STT_SLO_MS", "1000")) / 1000,
+    "tts": float(os.getenv("CHAT_TTS_SLO_MS", "700")) / 1000,
+}
+ROUTER_WINDOW = int(os.getenv("CHAT_ROUTER_WINDOW", "50"))
+ROUTER_MIN_SAMPLES = int(os.getenv("CHAT_ROUTER_MIN_SAMPLES", "5"))
+FAILOVER_COOLDOWN = float(os.getenv("CHAT_ROUTER_COOLDOWN_SECONDS", "60"))
+# Hedge delay before the primary has enough samples, and its clamp afterwards
+HEDGE_DELAY_DEFAULT = float(os.getenv("CHAT_LLM_HEDGE_DELAY_MS", "1000")) / 1000
+HEDGE_DELAY_MIN = float(os.getenv("CHAT_LLM_HEDGE_MIN_DELAY_MS", "300")) / 1000
+HEDGE_DELAY_MAX = float(os.getenv("CHAT_LLM_HEDGE_MAX_DELAY_MS", "3000")) / 1000
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+def _single_attempt(conn_options: APIConnectOptions) -> APIConnectOptions:
+    # The router is the redundancy: a provider that fails is not retried
+    return dataclasses.replace(conn_options, max_retry=0)
+
+
+class LatencyWindow:
+    """The last `size` latency samples of one provider"""
+
+    def __init__(self, size: int = ROUTER_WINDOW):
+        self.samples: Deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def add(self, seconds: float):
+        if seconds >= 0:
+            self.samples.append(seconds)
+
+    def clear(self):
+        self.samples.clear()
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class SLORoute:
+    """
+    Primary and secondary provider of one component. The primary serves
+    until its p95 (over at least `min_samples`) breaches `slo`; the secondary
+    then serves for `cooldown` seconds, after which the primary gets another
+    chance with an empty window.
+    """
+
+    def __init__(
+        self,
+        component: str,
+        primary: Tuple[str, Any],
+        secondary: Tuple[str, Any],
+        slo: float,
+        *,
+        cooldown: float = FAILOVER_COOLDOWN,
+        min_samples: int = ROUTER_MIN_SAMPLES,
+    ):
+        self.component = component
+        self.members = [primary, secondary]
+        self.windows = [LatencyWindow(), LatencyWindow()]
+        self.slo = slo
+        self.cooldown = cooldown
+        self.min_samples = min_samples
+        self.active = 0
+        self.failovers = 0
+        self.failbacks = 0
+        self._failed_over_at = 0.0
+
+    def name(self, index: int) -> str:
+        return self.members[index][0]
+
+    def _record(self, decision: str, index: int):
+        ROUTE_DECISIONS.labels(self.component, decision, self.name(index)).inc()
+
+    def select(self):
+        """The instance the next request should go to"""
+        if self.active == 1 and time.monotonic() - self._failed_over_at >= self.cooldown:
+            self.active = 0
+            self.failbacks += 1
+            self.windows[0].clear()
+            self._record("failback", 0)
+            logger.info(f"{self.component}: failing back to {self.name(0)}")
+        return self.members[self.active][1]
+
+    def observe(self, instance, seconds: float):
+        for index, (name, member) in enumerate(self.members):
+            if member is instance:
+                break
+        else:
+            return
+        window = self.windows[index]
+        window.add(seconds)
+        p95 = window.percentile(0.95)
+        PROVIDER_LATENCY_P95.labels(self.component, name).set(p95)
+
+        if index == 0 and self.active == 0 and len(window) >= self.min_samples:
+            if p95 > self.slo:
+                self.active = 1
+                self.failovers += 1
+                self._failed_over_at = time.monotonic()
+                self._record("failover", 1)
+                logger.warning(
+                    f"{self.component}: {self.name(0)} p95 {p95 * 1000:.0f}ms breaches "
+                    f"the {self.slo * 1000:.0f}ms SLO, failing over to {self.name(1)}"
+                )
+
+    def summary(self) -> Dict:
+        return {
+            "active": self.name(self.active),
+            "failovers": self.failovers,
+            "failbacks": self.failbacks,
+            "p95_ms": {
+                self.name(i): _ms(w.percentile(0.95)) for i, w in enumerate(self.windows)
+            },
+        }
+
+
+# --- LLM: hedged requests ---
+
+
+class HedgedLLM(llm.LLM):
+    """
+    Sends each request to the primary; when no token has arrived after the
+    hedge delay (the primary's p95 time to first token, clamped), or the
+    primary fails first, the request is duplicated to `hedge`. The first
+    stream to produce a chunk wins and the other one is closed.
+    """
+
+    def __init__(self, primary: Tuple[str, llm.LLM], hedge: Tuple[str, llm.LLM]):
+        super().__init__()
+        (self.primary_name, self.primary), (self.hedge_name, self.hedge) = primary, hedge
+        self.ttft = LatencyWindow()
+        self.decisions: Dict[str, int] = {}
+        for instance in (self.primary, self.hedge):
+            instance.on("metrics_collected", self._on_metrics_collected)
+
+    @property
+    def model(self) -> str:
+        return self.primary.model
+
+    @property
+    def provider(self) -> str:
+        return self.primary.provider
+
+    def hedge_delay(self) -> float:
+        if len(self.ttft) < ROUTER_MIN_SAMPLES:
+            return HEDGE_DELAY_DEFAULT
+        return min(HEDGE_DELAY_MAX, max(HEDGE_DELAY_MIN, self.ttft.percentile(0.95)))
+
+    def record(self, decision: str, provider: str):
+        self.decisions[decision] = self.decisions.get(decision, 0) + 1
+        ROUTE_DECISIONS.labels("llm", decision, provider).inc()
+
+    def chat(
+        self,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: Optional[list] = None,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        parallel_tool_calls: NotGivenOr[bool] = NOT_GIVEN,
+        tool_choice: NotGivenOr[llm.ToolChoice] = NOT_GIVEN,
+        extra_kwargs: NotGivenOr[Dict[str, Any]] = NOT_GIVEN,
+    ) -> "HedgedLLMStream":
+        return HedgedLLMStream(
+            self,
+            chat_ctx=chat_ctx,
+            tools=tools or [],
+            conn_options=conn_options,
+            chat_kwargs={
+                "parallel_tool_calls": parallel_tool_calls,
+                "tool_choice": tool_choice,
+                "extra_kwargs": extra_kwargs,
+            },
+        )
+
+    def prewarm(self, **kwargs) -> None:
+        self.primary.prewarm(**kwargs)
+
+    def _on_metrics_collected(self, *args, **kwargs):
+        self.emit("metrics_collected", *args, **kwargs)
+
+    async def aclose(self) -> None:
+        for instance in (self.primary, self.hedge):
+            instance.off("metrics_collected", self._on_metrics_collected)
+
+    def summary(self) -> Dict:
+        return {
+            "primary": self.primary_name,
+            "hedge": self.hedge_name,
+            "hedge_delay_ms": _ms(self.hedge_delay()),
+            "ttft_p95_ms": _ms(self.ttft.percentile(0.95)),
+            **self.decisions,
+        }
+
+
+class HedgedLLMStream(llm.LLMStream):
+    def __init__(self, hedged: HedgedLLM, *, chat_kwargs: Dict[str, Any], **kwargs):
+        super().__init__(hedged, **kwargs)
+        self._hedged = hedged
+        self._chat_kwargs = chat_kwargs
+        # Chunks already reached the caller: a retry would repeat them
+        self._retry_on_chunk_sent = False
+
+    async def _metrics_monitor_task(self, event_aiter):
+        # The primary and hedge streams report their own metrics
+        async for _ in event_aiter:
+            pass
+
+    async def _pump(self, role: str, stream: llm.LLMStream, results: asyncio.Queue):
+        try:
+            async with stream:
+                async for chunk in stream:
+                    results.put_nowait((role, chunk))
+            results.put_nowait((role, None))
+        except Exception as e:
+            results.put_nowait((role, e))
+
+    async def _run(self) -> None:
+        hedged = self._hedged
+        results: asyncio.Queue = asyncio.Queue()
+        attempts: Dict[str, asyncio.Task] = {}
+        ended: Dict[str, Optional[Exception]] = {}
+        started = time.perf_counter()
+        delay = hedged.hedge_delay()
+
+        def launch(role: str):
+            target = hedged.primary if role == "primary" else hedged.hedge
+            stream = target.chat(
+                chat_ctx=self._chat_ctx,
+                tools=self._tools,
+                conn_options=_single_attempt(self._conn_options),
+                **self._chat_kwargs,
+            )
+            attempts[role] = asyncio.create_task(
+                self._pump(role, stream, results), name=f"llm-{role}"
+            )
+
+        launch("primary")
+        try:
+            winner, first = None, None
+            while winner is None:
+                timeout = None
+                if "hedge" not in attempts:
+                    timeout = max(0.0, delay - (time.perf_counter() - started))
+                try:
+                    role, item = await asyncio.wait_for(results.get(), timeout)
+                except asyncio.TimeoutError:
+                    HEDGE_DELAY.observe(delay)
+                    hedged.record("hedge_sent", hedged.hedge_name)
+                    launch("hedge")
+                    continue
+
+                if isinstance(item, Exception):
+                    ended[role] = item
+                    if "hedge" not in attempts:
+                        logger.warning(f"Primary LLM failed before answering: {item}")
+                        hedged.record("error_failover", hedged.hedge_name)
+                        launch("hedge")
+                    elif len(ended) == len(attempts):
+                        raise item
+                    continue
+                winner, first = role, item
+
+            # A primary that lost was at least this slow; count it as such
+            if "primary" not in ended:
+                hedged.ttft.add(time.perf_counter() - started)
+            if len(attempts) > 1:
+                name = hedged.primary_name if winner == "primary" else hedged.hedge_name
+                hedged.record(f"{winner}_won", name)
+            for role, task in attempts.items():
+                if role != winner:
+                    task.cancel()
+
+            item = first
+            while item is not None:
+                self._event_ch.send_nowait(item)
+                role, item = await results.get()
+                while role != winner:
+                    # Leftovers from the closed attempt
+                    role, item = await results.get()
+                if isinstance(item, Exception):
+                    raise item
+        finally:
+            for task in attempts.values():
+                task.cancel()
+            await asyncio.gather(*attempts.values(), return_exceptions=True)
+
+
+# --- TTS: SLO failover ---
+
+
+class SLORoutedTTS(tts.TTS):
+    """
+    Hands each synthesis to the provider the route selects. Providers keep
+    their own sample rate; the agent's audio output resamples per frame.
+    """
+
+    def __init__(self, primary: Tuple[str, tts.TTS], secondary: Tuple[str, tts.TTS]):
+        members = [primary, secondary]
+        streaming = any(t.capabilities.streaming for _, t in members)
+        if streaming:
+            members = [
+                (name, t if t.capabilities.streaming else tts.StreamAdapter(tts=t))
+                for name, t in members
+            ]
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=streaming),
+            sample_rate=primary[1].sample_rate,
+            num_channels=primary[1].num_channels,
+        )
+        self.route = SLORoute("tts", members[0], members[1], SLO["tts"])
+        self._listeners = []
+        for _, instance in members:
+            listener = self._metrics_listener(instance)
+            instance.on("metrics_collected", listener)
+            self._listeners.append((instance, listener))
+
+    def _metrics_listener(self, instance: tts.TTS):
+        def on_metrics(event, *args, **kwargs):
+            if isinstance(event, lk_metrics.TTSMetrics) and not event.cancelled:
+                self.route.observe(instance, event.ttfb)
+            self.emit("metrics_collected", event, *args, **kwargs)
+
+        return on_metrics
+
+    @property
+    def model(self) -> str:
+        return self.route.members[self.route.active][1].model
+
+    @property
+    def provider(self) -> str:
+        return self.route.members[self.route.active][1].provider
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> tts.ChunkedStream:
+        return self.route.select().synthesize(text, conn_options=conn_options)
+
+    def stream(
+        self, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> tts.SynthesizeStream:
+        return self.route.select().stream(conn_options=conn_options)
+
+    def prewarm(self) -> None:
+        self.route.select().prewarm()
+
+    async def aclose(self) -> None:
+        for instance, listener in self._listeners:
+            instance.off("metrics_collected", listener)
+
+
+# --- STT: SLO failover ---
+
+
+class SLORoutedSTT(stt.STT):
+    """
+    Batch recognition goes to the provider the route selects and is timed
+    directly. A recognition stream switches provider at the next final
+    transcript, so no utterance is split across providers; streamed latency
+    comes from the session's end-of-utterance metrics (see
+    `observe_transcription_delay`).
+    """
+
+    def __init__(
+        self,
+        primary: Tuple[str, stt.STT],
+        secondary: Tuple[str, stt.STT],
+        vad=None,
+    ):
+        members = [primary, secondary]
+        streaming = all(s.capabilities.streaming for _, s in members)
+        if not streaming and any(s.capabilities.streaming for _, s in members):
+            if vad is None:
+                raise ValueError("a VAD is needed to route between streaming and batch STT")
+            members = [
+                (name, s if s.capabilities.streaming else stt.StreamAdapter(stt=s, vad=vad))
+                for name, s in members
+            ]
+            streaming = True
+        super().__init__(
+            capabilities=stt.STTCapabilities(
+                streaming=streaming,
+                interim_results=all(s.capabilities.interim_results for _, s in members),
+            )
+        )
+        self.route = SLORoute("stt", members[0], members[1], SLO["stt"])
+        self.last_final_from = None
+        for _, instance in members:
+            instance.on("metrics_collected", self._on_metrics_collected)
+
+    @property
+    def model(self) -> str:
+        return self.route.members[self.route.active][1].model
+
+    @property
+    def provider(self) -> str:
+        return self.route.members[self.route.active][1].provider
+
+    def _on_metrics_collected(self, *args, **kwargs):
+        self.emit("metrics_collected", *args, **kwargs)
+
+    def observe_transcription_delay(self, seconds: float):
+        """End of speech to final transcript, attributed to the provider that produced it"""
+        if self.capabilities.streaming and self.last_final_from is not None:
+            self.route.observe(self.last_final_from, seconds)
+
+    async def recognize(
+        self,
+        buffer,
+        *,
+        language: NotGivenOr[str] = NOT_GIVEN,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+    ) -> stt.SpeechEvent:
+        instance = self.route.select()
+        started = time.perf_counter()
+        event = await instance.recognize(
+            buffer, language=language, conn_options=conn_options
+        )
+        self.route.observe(instance, time.perf_counter() - started)
+        return event
+
+    async def _recognize_impl(self, buffer, *, language=NOT_GIVEN, conn_options):
+        return await self.recognize(buffer, language=language, conn_options=conn_options)
+
+    def stream(
+        self,
+        *,
+        language: NotGivenOr[str] = NOT_GIVEN,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+    ) -> "RoutedRecognizeStream":
+        return RoutedRecognizeStream(self, language=language, conn_options=conn_options)
+
+    async def aclose(self) -> None:
+        for _, instance in self.route.members:
+            instance.off("metrics_collected", self._on_metrics_collected)
+
+
+class RoutedRecognizeStream(stt.RecognizeStream):
+    def __init__(
+        self,
+        routed: SLORoutedSTT,
+        *,
+        language: NotGivenOr[str],
+        conn_options: APIConnectOptions,
+    ):
+        super().__init__(stt=routed, conn_options=conn_options)
+        self._routed = routed
+        self._language = language
+        self._current: Optional[stt.RecognizeStream] = None
+        self._readers: List[asyncio.Task] = []
+        self._failed: Optional[asyncio.Future] = None
+        self._input_done = False
+
+    async def _metrics_monitor_task(self, event_aiter):
+        # The provider streams report their own usage
+        async for _ in event_aiter:
+            pass
+
+    def _open(self, instance: stt.STT) -> stt.RecognizeStream:
+        stream = instance.stream(
+            language=self._language, conn_options=_single_attempt(self._conn_options)
+        )
+        # Keep transcript timestamps relative to this stream's start
+        stream.start_time_offset = self.start_time_offset + (time.time() - self.start_time)
+        self._readers.append(
+            asyncio.create_task(self._read(instance, stream), name="stt-route-read")
+        )
+        return stream
+
+    async def _read(self, instance: stt.STT, stream: stt.RecognizeStream):
+        try:
+            async with stream:
+                async for event in stream:
+                    self._event_ch.send_nowait(event)
+                    if (
+                        event.type == stt.SpeechEventType.FINAL_TRANSCRIPT
+                        and stream is self._current
+                    ):
+                        self._routed.last_final_from = instance
+                        self._maybe_switch(instance)
+        except Exception as e:
+            if not self._failed.done():
+                self._failed.set_result(e)
+
+    def _maybe_switch(self, instance: stt.STT):
+        if self._input_done:
+            return
+        target = self._routed.route.select()
+        if target is instance:
+            return
+        previous = self._current
+        self._current = self._open(target)
+        # The previous stream finishes its pending results in the background
+        previous.end_input()
+
+    async def _forward_input(self):
+        async for data in self._input_ch:
+            if isinstance(data, self._FlushSentinel):
+                self._current.flush()
+            else:
+                self._current.push_frame(data)
+        self._input_done = True
+        self._current.end_input()
+
+    async def _run(self) -> None:
+        self._failed = asyncio.get_running_loop().create_future()
+        self._readers = []
+        self._input_done = False
+        self._current = self._open(self._routed.route.select())
+        forward = asyncio.create_task(self._forward_input(), name="stt-route-input")
+        try:
+            await asyncio.wait([forward, self._failed], return_when=asyncio.FIRST_COMPLETED)
+            if not self._failed.done():
+                # No switch happens once the input has ended
+                readers = asyncio.gather(*self._readers)
+                await asyncio.wait([readers, self._failed], return_when=asyncio.FIRST_COMPLETED)
+            if self._failed.done():
+                raise self._failed.result()
+        finally:
+            tasks = [forward, *self._readers]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class ProviderRouter:
+    """
+    Builds a session's STT, LLM and TTS from the provider config, routed
+    when a secondary provider is configured for the component
+    """
+
+    def __init__(self, config: ProviderConfig, userdata: dict):
+        self.config = config
+        self.userdata = userdata
+        self.primaries: Dict[str, Any] = {}
+        self.routed: Dict[str, Any] = {}
+        # Plugin label (as reported in metrics) -> (provider, model)
+        self.plugins: Dict[str, Tuple[str, str]] = {}
+
+    def _pair(self, component: str):
+        primary = self.config.build(component, self.userdata)
+        self.primaries[component] = primary
+        self._register(primary, self.config[component])
+        if component not in self.config.secondary:
+            return primary, None
+        secondary = self.config.build(component, self.userdata, secondary=True)
+        self._register(secondary, self.config.secondary[component])
+        return (
+            (self.config[component].name, primary),
+            (self.config.secondary[component].name, secondary),
+        )
+
+    def _register(self, instance, spec):
+        label = getattr(instance, "label", None)
+        if label:
+            self.plugins.setdefault(label, (spec.name, spec.model))
+
+    def _route(self, component: str, wrapper, **kwargs):
+        primary, secondary = self._pair(component)
+        if secondary is None:
+            return primary
+        routed = wrapper(primary, secondary, **kwargs)
+        self.routed[component] = routed
+        logger.info(
+            f"Routing {component}: {primary[0]} with {secondary[0]} as secondary"
+        )
+        return routed
+
+    def stt(self, vad=None):
+        return self._route("stt", SLORoutedSTT, vad=vad)
+
+    def llm(self):
+        return self._route("llm", HedgedLLM)
+
+    def tts(self):
+        return self._route("tts", SLORoutedTTS)
+
+    def background_llm(self):
+        """
+        A separate, unrouted LLM for background completions (summaries): its
+        requests never race a hedge and its metrics stay off the session
+        """
+        instance = self.config.build("llm", self.userdata)
+        self._register(instance, self.config["llm"])
+        return instance
+
+    def primary(self, component: str):
+        """The primary provider instance, bypassing routing"""
+        return self.primaries[component]
+
+    def on_metrics(self, event):
+        """Feed one `MetricsCollectedEvent.metrics` item"""
+        routed_stt = self.routed.get("stt")
+        if routed_stt is not None and isinstance(event, lk_metrics.EOUMetrics):
+            routed_stt.observe_transcription_delay(event.transcription_delay)
+
+    def summary(self) -> Dict:
+        summary = {}
+        for component, routed in self.routed.items():
+            if isinstance(routed, HedgedLLM):
+                summary[component] = routed.summary()
+            else:
+                summary[component] = routed.route.summary()
+        return summary
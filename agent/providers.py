@@ -0,0 +1,293 @@
+"""
+Config-driven provider registry
+CHAT_STT_PROVIDER / CHAT_LLM_PROVIDER / CHAT_TTS_PROVIDER / CHAT_AVATAR_PROVIDER
+select one backend per component (CHAT_FAKE_PROVIDERS=true defaults them all
+to the in-process fakes); CHAT_STT_FALLBACK_PROVIDER / CHAT_TTS_FALLBACK_PROVIDER
+/ CHAT_LLM_HEDGE_PROVIDER add a secondary one for the provider router. Plugin
+modules are imported on first use, never at agent import, and only the
+selected providers' API keys are required.
+"""
+
+import importlib
+import logging
+import os
+import time
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+COMPONENTS = ("stt", "llm", "tts", "avatar")
+
+STT_MODEL = "ink-whisper"
+LLM_MODEL = "gemini-2.0-flash-lite"
+FALLBACK_STT_MODEL = "scribe_v2_realtime"
+FALLBACK_TTS_MODEL = "sonic-2"
+
+# ElevenLabs voice configuration (also keys the pre-synthesized phrase cache)
+TTS_VOICE_ID = "TX3LPaxmHKxFdv7VOQHJ"
+TTS_MODEL = "eleven_multilingual_v3"
+TTS_VOICE_SETTINGS = {
+    "stability": 0.8,
+    "similarity_boost": 0.7,
+    "style": 0.3,
+    "use_speaker_boost": True,
+    "speed": 0.75,
+}
+
+# Milliseconds spent importing each module through this registry, this process
+IMPORT_TIMES: Dict[str, float] = {}
+
+
+def import_module(name: str) -> ModuleType:
+    """Import (once) and record how long the first import took"""
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    if name not in IMPORT_TIMES:
+        IMPORT_TIMES[name] = round((time.perf_counter() - started) * 1000, 1)
+    return module
+
+
+def bithuman_model_path() -> str:
+    here = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(here, os.getenv("BITHUMAN_MODEL_PATH", ""))
+
+
+# --- Builders: (plugin module, userdata) -> provider instance ---
+
+
+def _cartesia_stt(plugin, userdata):
+    return plugin.STT(api_key=os.getenv("CARTESIA_API_KEY"), model=STT_MODEL)
+
+
+def _google_llm(plugin, userdata):
+    return plugin.LLM(
+        api_key=os.getenv("GOOGLE_API_KEY"), model=LLM_MODEL, temperature=0.5
+    )
+
+
+def _elevenlabs_tts(plugin, userdata):
+    return plugin.TTS(
+        voice_id=TTS_VOICE_ID,
+        model=TTS_MODEL,
+        api_key=os.getenv("ELEVENLABS_API_KEY"),
+        voice_settings=plugin.VoiceSettings(**TTS_VOICE_SETTINGS),
+    )
+
+
+def _elevenlabs_stt(plugin, userdata):
+    return plugin.STT(api_key=os.getenv("ELEVENLABS_API_KEY"), model=FALLBACK_STT_MODEL)
+
+
+def _cartesia_tts(plugin, userdata):
+    return plugin.TTS(api_key=os.getenv("CARTESIA_API_KEY"), model=FALLBACK_TTS_MODEL)
+
+
+def _bithuman_prewarm(plugin, userdata):
+    model_path = bithuman_model_path()
+    logger.info(f"Prewarming BitHuman runtime from: {model_path}")
+    userdata["bithuman_runtime"] = import_module("bithuman").AsyncBithuman(
+        model_path=model_path,
+        api_secret=os.getenv("BITHUMAN_API_SECRET"),
+        load_model=True,
+    )
+
+
+def _bithuman_avatar(plugin, userdata):
+    model_path = bithuman_model_path()
+    logger.info(f"Model path is located at: {model_path}")
+    return plugin.AvatarSession(
+        api_secret=os.getenv("BITHUMAN_API_SECRET"),
+        model_path=model_path,
+        runtime=userdata["bithuman_runtime"],
+    )
+
+
+def _fake_prewarm(plugin, userdata):
+    if "fake_profile" not in userdata:
+        userdata["fake_profile"] = plugin.FakeProfile.from_env()
+
+
+def _fake(class_name: str) -> Callable[[ModuleType, dict], Any]:
+    def build(plugin, userdata):
+        return getattr(plugin, class_name)(userdata["fake_profile"])
+
+    return build
+
+
+@dataclass(frozen=True)
+class ProviderSpec:
+    component: str
+    name: str
+    model: str
+    module: str  # imported on first use
+    build: Callable[[ModuleType, dict], Any]
+    required_env: Tuple[str, ...] = ()
+    prewarm: Optional[Callable[[ModuleType, dict], None]] = None
+
+    def load(self) -> ModuleType:
+        return import_module(self.module)
+
+
+def _registry() -> Dict[str, Dict[str, ProviderSpec]]:
+    def fake(component: str, class_name: str) -> ProviderSpec:
+        return ProviderSpec(
+            component,
+            "fake",
+            f"fake-{component}",
+            "fake_providers",
+            _fake(class_name),
+            prewarm=_fake_prewarm,
+        )
+
+    return {
+        "stt": {
+            "cartesia": ProviderSpec(
+                "stt",
+                "cartesia",
+                STT_MODEL,
+                "livekit.plugins.cartesia",
+                _cartesia_stt,
+                ("CARTESIA_API_KEY",),
+            ),
+            "elevenlabs": ProviderSpec(
+                "stt",
+                "elevenlabs",
+                FALLBACK_STT_MODEL,
+                "livekit.plugins.elevenlabs",
+                _elevenlabs_stt,
+                ("ELEVENLABS_API_KEY",),
+            ),
+            "fake": fake("stt", "FakeSTT"),
+        },
+        "llm": {
+            "google": ProviderSpec(
+                "llm",
+                "google",
+                LLM_MODEL,
+                "livekit.plugins.google",
+                _google_llm,
+                ("GOOGLE_API_KEY",),
+            ),
+            "fake": fake("llm", "FakeLLM"),
+        },
+        "tts": {
+            "elevenlabs": ProviderSpec(
+                "tts",
+                "elevenlabs",
+                TTS_MODEL,
+                "livekit.plugins.elevenlabs",
+                _elevenlabs_tts,
+                ("ELEVENLABS_API_KEY",),
+            ),
+            "cartesia": ProviderSpec(
+                "tts",
+                "cartesia",
+                FALLBACK_TTS_MODEL,
+                "livekit.plugins.cartesia",
+                _cartesia_tts,
+                ("CARTESIA_API_KEY",),
+            ),
+            "fake": fake("tts", "FakeTTS"),
+        },
+        "avatar": {
+            "bithuman": ProviderSpec(
+                "avatar",
+                "bithuman",
+                os.path.basename(os.getenv("BITHUMAN_MODEL_PATH", "")),
+                "livekit.plugins.bithuman",
+                _bithuman_avatar,
+                ("BITHUMAN_API_SECRET", "BITHUMAN_MODEL_PATH"),
+                prewarm=_bithuman_prewarm,
+            ),
+            "fake": fake("avatar", "FakeAvatarSession"),
+        },
+    }
+
+
+PROVIDERS = _registry()
+
+DEFAULTS = {"stt": "cartesia", "llm": "google", "tts": "elevenlabs", "avatar": "bithuman"}
+
+# Optional secondary provider per component, used by provider_router
+SECONDARY_ENV = {
+    "stt": "CHAT_STT_FALLBACK_PROVIDER",
+    "llm": "CHAT_LLM_HEDGE_PROVIDER",
+    "tts": "CHAT_TTS_FALLBACK_PROVIDER",
+}
+
+
+def _lookup(component: str, name: str) -> ProviderSpec:
+    if name not in PROVIDERS[component]:
+        raise ValueError(
+            f"Unknown {component} provider '{name}' "
+            f"(choose from {', '.join(PROVIDERS[component])})"
+        )
+    return PROVIDERS[component][name]
+
+
+class ProviderConfig:
+    """The provider selected for each component, and any secondary ones"""
+
+    def __init__(
+        self,
+        selected: Dict[str, ProviderSpec],
+        secondary: Optional[Dict[str, ProviderSpec]] = None,
+    ):
+        self.selected = selected
+        self.secondary = secondary or {}
+
+    @classmethod
+    def from_env(cls) -> "ProviderConfig":
+        use_fakes = os.getenv("CHAT_FAKE_PROVIDERS", "false").lower() in (
+            "true",
+            "1",
+            "t",
+        )
+        selected = {}
+        for component in COMPONENTS:
+            default = "fake" if use_fakes else DEFAULTS[component]
+            name = os.getenv(f"CHAT_{component.upper()}_PROVIDER", default).lower()
+            selected[component] = _lookup(component, name)
+        secondary = {}
+        for component, env in SECONDARY_ENV.items():
+            name = os.getenv(env, "").lower()
+            if name:
+                secondary[component] = _lookup(component, name)
+        return cls(selected, secondary)
+
+    def __getitem__(self, component: str) -> ProviderSpec:
+        return self.selected[component]
+
+    def _specs(self) -> List[ProviderSpec]:
+        specs = list(self.selected.values())
+        specs += [spec for spec in self.secondary.values() if spec not in specs]
+        return specs
+
+    def required_env(self) -> List[str]:
+        return list(
+            dict.fromkeys(var for spec in self._specs() for var in spec.required_env)
+        )
+
+    def labels(self) -> Dict[str, Tuple[str, str]]:
+        """(provider, model) per component, for metrics and usage"""
+        return {c: (spec.name, spec.model) for c, spec in self.selected.items()}
+
+    def load_plugins(self):
+        """
+        Import the selected plugin modules. LiveKit plugins must register on
+        the main thread, so call this from prewarm (or main) rather than lazily
+        from a job task.
+        """
+        for spec in self._specs():
+            spec.load()
+
+    def prewarm(self, userdata: dict):
+        for spec in self._specs():
+            if spec.prewarm is not None:
+                spec.prewarm(spec.load(), userdata)
+
+    def build(self, component: str, userdata: dict, secondary: bool = False):
+        spec = (self.secondary if secondary else self.selected)[component]
+        return spec.build(spec.load(), userdata)
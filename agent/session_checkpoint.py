@@ -0,0 +1,357 @@
+"""
+Session checkpoints for fast resume after a participant reconnects
+When the child drops (e.g. the tablet loses Wi-Fi) the session state is
+checkpointed, to Redis when CHAT_CHECKPOINT_REDIS_URL is set or else to local
+disk, and finalization is deferred for a grace window. A rejoin within the
+window resumes: in the same job nothing is rebuilt, in a new job the
+conversation, analytics and context summary are restored from the checkpoint
+instead of bootstrapping from scratch. Resume and finalization both claim
+the checkpoint atomically, so exactly one of them happens; checkpoints
+nobody claims are finalized through the outbox once their window has passed.
+"""
+
+import asyncio
+import glob
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from prometheus_client import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+SESSION_RESUMES = Counter(
+    "chat_agent_session_resumes_total",
+    "Participant drops by outcome (resumed_live, resumed_checkpoint, finalized, handed_off, expired)",
+    ["outcome"],
+)
+RECONNECT_GAP = Histogram(
+    "chat_agent_reconnect_gap_seconds",
+    "Time between the child dropping and rejoining within the grace window",
+    buckets=[1, 2, 5, 10, 20, 30, 60, 120, 300],
+)
+
+# finalize(record) persists the checkpoint's analytics payload
+Finalize = Callable[[Dict], Awaitable[None]]
+
+
+class DiskCheckpointStore:
+    """
+    One JSON file per session key. A claim renames the file first, which is
+    atomic, so only one process can take a checkpoint.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode()).hexdigest()[:32]
+        return os.path.join(self.directory, f"{digest}.json")
+
+    # --- Blocking, always called through asyncio.to_thread ---
+
+    def _save(self, record: Dict):
+        path = self._path(record["key"])
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(record, f)
+        os.replace(tmp, path)
+
+    def _claim(self, key: str) -> Optional[Dict]:
+        path = self._path(key)
+        claimed = f"{path}.{uuid.uuid4().hex}.claimed"
+        try:
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            return None
+        try:
+            with open(claimed) as f:
+                return json.load(f)
+        finally:
+            os.remove(claimed)
+
+    def _expired(self, before: float) -> List[str]:
+        keys = []
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            try:
+                with open(path) as f:
+                    record = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if record.get("deadline", 0) <= before:
+                keys.append(record["key"])
+        return keys
+
+    # --- Async API ---
+
+    async def save(self, record: Dict):
+        await asyncio.to_thread(self._save, record)
+
+    async def claim(self, key: str) -> Optional[Dict]:
+        return await asyncio.to_thread(self._claim, key)
+
+    async def expired(self, before: float) -> List[str]:
+        return await asyncio.to_thread(self._expired, before)
+
+    async def close(self):
+        pass
+
+
+class RedisCheckpointStore:
+    """
+    Checkpoints as Redis strings, indexed by deadline in a sorted set so any
+    worker can find the abandoned ones; GETDEL makes a claim atomic
+    """
+
+    PREFIX = "chat:checkpoint:"
+    INDEX = "chat:checkpoints"
+
+    def __init__(self, url: str, retention: float):
+        # Only needed when checkpoints are shared through Redis
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url)
+        # Kept past the deadline so the sweeper can still finalize them
+        self.retention = int(retention)
+
+    async def save(self, record: Dict):
+        key = record["key"]
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.set(self.PREFIX + key, json.dumps(record), ex=self.retention)
+            pipe.zadd(self.INDEX, {key: record["deadline"]})
+            await pipe.execute()
+
+    async def claim(self, key: str) -> Optional[Dict]:
+        raw = await self.client.getdel(self.PREFIX + key)
+        await self.client.zrem(self.INDEX, key)
+        return json.loads(raw) if raw is not None else None
+
+    async def expired(self, before: float) -> List[str]:
+        keys = await self.client.zrangebyscore(self.INDEX, 0, before)
+        return [key.decode() if isinstance(key, bytes) else key for key in keys]
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class SessionCheckpoints:
+    """
+    Checkpoint store plus the sweeper that finalizes checkpoints left
+    unclaimed `sweep_slack` seconds past their deadline (their job is gone)
+    """
+
+    def __init__(
+        self,
+        store,
+        *,
+        grace: float = 120.0,
+        sweep_interval: float = 30.0,
+        sweep_slack: float = 30.0,
+    ):
+        self.store = store
+        self.grace = grace
+        self.sweep_interval = sweep_interval
+        self.sweep_slack = sweep_slack
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.grace > 0
+
+    async def save(
+        self,
+        key: str,
+        *,
+        room: str,
+        participant_id: str,
+        state: Dict,
+        payload: Dict,
+    ) -> Dict:
+        """Checkpoint a dropped session; returns the record"""
+        now = time.time()
+        record = {
+            "key": key,
+            "room": room,
+            "participant_id": participant_id,
+            "saved_at": now,
+            "deadline": now + self.grace,
+            "state": state,
+            # What finalization sends if the session is never resumed
+            "payload": payload,
+        }
+        await self.store.save(record)
+        return record
+
+    async def claim(self, key: str) -> Optional[Dict]:
+        """Take the checkpoint (at most one caller gets it)"""
+        return await self.store.claim(key)
+
+    async def resume(self, key: str, finalize: Finalize) -> Optional[Dict]:
+        """
+        Claim the checkpoint of a session the participant is rejoining.
+        One found past its window is finalized instead and None is returned.
+        """
+        if not self.enabled:
+            return None
+        record = await self.store.claim(key)
+        if record is None:
+            return None
+        if time.time() > record["deadline"]:
+            await finalize(record)
+            SESSION_RESUMES.labels(outcome="expired").inc()
+            return None
+        RECONNECT_GAP.observe(time.time() - record["saved_at"])
+        SESSION_RESUMES.labels(outcome="resumed_checkpoint").inc()
+        return record
+
+    async def sweep_once(self, finalize: Finalize) -> int:
+        """Finalize the checkpoints no job resumed; returns how many"""
+        finalized = 0
+        for key in await self.store.expired(time.time() - self.sweep_slack):
+            record = await self.store.claim(key)
+            if record is None:
+                continue  # resumed or swept by someone else meanwhile
+            await finalize(record)
+            finalized += 1
+            SESSION_RESUMES.labels(outcome="expired").inc()
+            logger.info(f"Finalized abandoned session checkpoint for {key}")
+        return finalized
+
+    async def _run(self, finalize: Finalize):
+        while True:
+            try:
+                await self.sweep_once(finalize)
+            except Exception as e:
+                logger.error(f"Checkpoint sweep failed: {e!r}")
+            await asyncio.sleep(self.sweep_interval)
+
+    def start(self, finalize: Finalize):
+        """Start the background sweeper (idempotent)"""
+        if self.enabled and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(
+                self._run(finalize), name="checkpoint-sweeper"
+            )
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.store.close()
+
+
+class ResumeWindow:
+    """
+    Drop/rejoin handling for one session in its job. `on_disconnect`
+    checkpoints the session and starts the grace timer; `on_reconnect`
+    within the window claims the checkpoint back and the session simply
+    goes on. When the window expires the session is finalized with
+    `finalize`; at shutdown `hand_off` leaves the checkpoint for a later
+    job (or the sweeper) and calls `release` so the drain skips the session.
+    """
+
+    def __init__(
+        self,
+        checkpoints: SessionCheckpoints,
+        key: str,
+        checkpoint: Callable[[], Awaitable[Dict]],
+        finalize: Callable[[], None],
+        release: Callable[[], None],
+    ):
+        self.checkpoints = checkpoints
+        self.key = key
+        self.checkpoint = checkpoint
+        self.finalize = finalize
+        self.release = release
+        self.drops = 0
+        self.resumes = 0
+        self._disconnected_at: Optional[float] = None
+        self._saved: Optional[asyncio.Task] = None
+        self._timer: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> bool:
+        return self._timer is not None and not self._timer.done()
+
+    def on_disconnect(self):
+        if not self.checkpoints.enabled:
+            self.finalize()
+            return
+        if self.pending:
+            return
+        self.drops += 1
+        self._disconnected_at = time.monotonic()
+        self._saved = asyncio.create_task(self.checkpoint(), name="session-checkpoint")
+        self._timer = asyncio.create_task(self._expire(), name="resume-window")
+        logger.info(
+            f"{self.key} dropped; finalization deferred {self.checkpoints.grace:.0f}s"
+        )
+
+    async def _checkpoint_saved(self) -> bool:
+        try:
+            await asyncio.shield(self._saved)
+        except Exception as e:
+            logger.error(f"Could not checkpoint session {self.key}: {e!r}")
+            return False
+        return True
+
+    async def _expire(self):
+        if await self._checkpoint_saved():
+            await asyncio.sleep(self.checkpoints.grace)
+            if await self.checkpoints.claim(self.key) is None:
+                # Resumed by another job or swept meanwhile: it owns the session now
+                self.release()
+                return
+        SESSION_RESUMES.labels(outcome="finalized").inc()
+        self.finalize()
+
+    async def on_reconnect(self) -> bool:
+        """The child is back; True if a pending finalization was cancelled"""
+        if not self.pending:
+            return False
+        self._timer.cancel()
+        if await self._checkpoint_saved():
+            await self.checkpoints.claim(self.key)
+        gap = time.monotonic() - self._disconnected_at
+        self.resumes += 1
+        RECONNECT_GAP.observe(gap)
+        SESSION_RESUMES.labels(outcome="resumed_live").inc()
+        logger.info(f"{self.key} rejoined after {gap:.1f}s; session resumed")
+        return True
+
+    async def hand_off(self):
+        """Shutdown during the window: keep the checkpoint, skip the drain"""
+        if not self.pending:
+            return
+        self._timer.cancel()
+        if await self._checkpoint_saved():
+            SESSION_RESUMES.labels(outcome="handed_off").inc()
+            self.release()
+
+    def summary(self) -> Dict[str, int]:
+        return {"drops": self.drops, "resumes": self.resumes}
+
+
+_checkpoints: Optional[SessionCheckpoints] = None
+
+
+def get_session_checkpoints(default_dir: str) -> SessionCheckpoints:
+    """Return the worker-wide checkpoint store (Redis if configured, else disk)"""
+    global _checkpoints
+    if _checkpoints is None:
+        grace = float(os.getenv("CHAT_RESUME_GRACE_SECONDS", "120"))
+        redis_url = os.getenv("CHAT_CHECKPOINT_REDIS_URL")
+        if redis_url:
+            store = RedisCheckpointStore(redis_url, retention=grace + 3600)
+        else:
+            store = DiskCheckpointStore(os.getenv("CHAT_CHECKPOINT_DIR", default_dir))
+        _checkpoints = SessionCheckpoints(store, grace=grace)
+    return _checkpoints
@@ -0,0 +1,147 @@
+"""
+Rolling clinical summary of a CHAT session
+The summary is refreshed during the session (every K turns, or after an idle
+gap) from the previous summary plus the turns since, so each LLM call sees a
+bounded prompt and disconnect only has to fold in the last few turns.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from conversation_context import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# complete(prompt) -> generated text
+Complete = Callable[[str], Awaitable[str]]
+
+UPDATE_PROMPT = """You keep a running clinical summary of a speech therapy session with a child (18-36 months) with Late Language Emergence.
+
+Summary so far:
+{summary}
+
+New conversation turns:
+{turns}
+{stats}
+Update the summary with the new turns. Focus on:
+1. Child's communication progress and engagement
+2. Language skills demonstrated
+3. Areas of strength and potential growth
+4. Overall interaction quality
+
+Keep the summary concise (2-3 sentences) and professional for clinical records.
+Reply with the updated summary only."""
+
+
+class RollingSessionSummary:
+    """
+    Turns are buffered until `every_turns` have accumulated or the session has
+    been idle for `idle_seconds`; then one background update folds them in.
+    A failed update keeps its turns buffered for the next attempt.
+    `prompt` takes the same {summary}, {turns} and {stats} fields as
+    UPDATE_PROMPT.
+    """
+
+    def __init__(
+        self,
+        complete: Complete,
+        *,
+        every_turns: int = 6,
+        idle_seconds: float = 15.0,
+        prompt: str = UPDATE_PROMPT,
+    ):
+        self.complete = complete
+        self.every_turns = every_turns
+        self.idle_seconds = idle_seconds
+        self.prompt = prompt
+
+        self.summary = ""
+        self.updates = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._pending: List[Tuple[str, str]] = []
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._idle_timer: Optional[asyncio.TimerHandle] = None
+
+    def add_turn(self, role: str, text: str):
+        if not text or not text.strip():
+            return
+        self._pending.append((role, text.strip()))
+
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+        self._idle_timer = asyncio.get_running_loop().call_later(
+            self.idle_seconds, self._schedule
+        )
+        if len(self._pending) >= self.every_turns:
+            self._schedule()
+
+    def _schedule(self):
+        if self._pending and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._update(), name="rolling-summary")
+
+    async def _update(self, stats: str = ""):
+        async with self._lock:
+            batch = list(self._pending)
+            if not batch:
+                return
+
+            prompt = self.prompt.format(
+                summary=self.summary or "(nothing yet, the session just started)",
+                turns="\n".join(f"{role}: {text}" for role, text in batch),
+                stats=f"\n{stats}\n" if stats else "",
+            )
+            try:
+                text = (await self.complete(prompt)).strip()
+            except Exception as e:
+                logger.warning(f"Rolling summary update failed, will retry: {e}")
+                return
+            if not text:
+                return
+
+            self.summary = text
+            del self._pending[: len(batch)]
+            self.updates += 1
+            self.prompt_tokens += estimate_tokens(prompt)
+            self.completion_tokens += estimate_tokens(text)
+            logger.info(
+                f"Rolling summary updated with {len(batch)} turn(s) "
+                f"(~{estimate_tokens(prompt)} prompt tokens)"
+            )
+
+    async def finalize(self, stats: str = "") -> str:
+        """Fold in the remaining turns (if any) with the final statistics"""
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+        if self._task is not None and not self._task.done():
+            await self._task
+        if self._pending:
+            await self._update(stats)
+        return self.summary
+
+    def snapshot(self) -> dict:
+        """Summary so far and turns not yet folded in, for a session checkpoint"""
+        return {
+            "summary": self.summary,
+            "pending": [list(turn) for turn in self._pending],
+            **self.usage(),
+        }
+
+    def restore(self, state: dict):
+        self.summary = state["summary"]
+        self._pending = [tuple(turn) for turn in state["pending"]]
+        self.updates = state["updates"]
+        self.prompt_tokens = state["prompt_tokens"]
+        self.completion_tokens = state["completion_tokens"]
+
+    def usage(self) -> dict:
+        """Estimated LLM usage of all summary updates so far"""
+        return {
+            "updates": self.updates,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "pending_turns": len(self._pending),
+        }
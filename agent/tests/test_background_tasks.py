@@ -0,0 +1,82 @@
+import asyncio
+import unittest
+
+from background_tasks import BackgroundTasks
+
+
+class DrainTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tasks = BackgroundTasks(deadline=0.1, spool_deadline=0.05)
+        self.calls = []
+
+    def session(self, key, flush_delay=0.0, flush_error=None, spool_delay=0.0):
+        async def flush():
+            self.calls.append((key, "flush"))
+            await asyncio.sleep(flush_delay)
+            if flush_error is not None:
+                raise flush_error
+
+        async def spool():
+            self.calls.append((key, "spool"))
+            await asyncio.sleep(spool_delay)
+
+        self.tasks.register_session(key, flush, spool)
+
+    async def test_flushes_every_session_concurrently(self):
+        for key in ("a", "b", "c"):
+            self.session(key, flush_delay=0.05)
+        outcomes = await self.tasks.drain()
+        # Three 50ms flushes in sequence would miss the 100ms deadline
+        self.assertEqual(outcomes, {"completed": 3})
+        self.assertNotIn("spool", [call for _, call in self.calls])
+
+    async def test_spools_a_flush_that_misses_the_deadline(self):
+        self.session("fast")
+        self.session("slow", flush_delay=5)
+        outcomes = await self.tasks.drain()
+        self.assertEqual(outcomes, {"completed": 1, "spooled": 1})
+        self.assertIn(("slow", "spool"), self.calls)
+        self.assertNotIn(("fast", "spool"), self.calls)
+
+    async def test_times_out_when_the_spool_is_too_slow(self):
+        self.session("stuck", flush_delay=5, spool_delay=5)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        outcomes = await self.tasks.drain()
+        self.assertEqual(outcomes, {"timed_out": 1})
+        # Bounded by the flush deadline plus the spool deadline
+        self.assertLess(loop.time() - started, 1.0)
+
+    async def test_spools_a_failed_flush(self):
+        self.session("broken", flush_error=RuntimeError("backend down"))
+        outcomes = await self.tasks.drain()
+        self.assertEqual(outcomes, {"spooled": 1})
+
+    async def test_flushes_a_session_only_once(self):
+        self.session("left")
+        await self.tasks.flush_session("left")
+        outcomes = await self.tasks.drain()
+        self.assertEqual(outcomes, {"completed": 1})
+        self.assertEqual(self.calls, [("left", "flush")])
+
+    async def test_skips_released_sessions(self):
+        self.session("handed_off")
+        self.assertTrue(self.tasks.release_session("handed_off"))
+        outcomes = await self.tasks.drain()
+        self.assertEqual(outcomes, {})
+        self.assertEqual(self.calls, [])
+
+    async def test_waits_for_tracked_tasks(self):
+        done = asyncio.Event()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            done.set()
+
+        self.tasks.spawn(work(), name="work")
+        await self.tasks.drain()
+        self.assertTrue(done.is_set())
+
+
+if __name__ == "__main__":
+    unittest.main()
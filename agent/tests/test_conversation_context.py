@@ -0,0 +1,133 @@
+import unittest
+
+from livekit.agents import AgentSession, ChatContext
+from livekit.agents.llm import ChatMessage
+
+import agent as agent_module
+from conversation_context import (
+    ConversationContextManager,
+    estimate_ctx_tokens,
+    estimate_tokens,
+)
+from fake_providers import FakeLLM, FakeProfile
+
+TURNS = 200
+
+
+class RecordingLLM(FakeLLM):
+    """FakeLLM that keeps the estimated size of every prompt it is sent"""
+
+    def __init__(self, profile: FakeProfile):
+        super().__init__(profile)
+        self.prompt_tokens = []
+
+    def chat(self, *, chat_ctx, **kwargs):
+        self.prompt_tokens.append(estimate_ctx_tokens(chat_ctx))
+        return super().chat(chat_ctx=chat_ctx, **kwargs)
+
+
+class StubSummarizer:
+    summary = ""
+
+    def __init__(self):
+        self.turns = []
+
+    def add_turn(self, role, text):
+        self.turns.append((role, text))
+
+
+class FitTest(unittest.TestCase):
+    def setUp(self):
+        self.context = ConversationContextManager(
+            turn_budget=60, summary_budget=30, low_watermark=0.5
+        )
+        self.chat_ctx = ChatContext()
+        self.chat_ctx.add_message(role="system", content="instructions")
+
+    def add(self, role, text):
+        message = self.chat_ctx.add_message(role=role, content=text)
+        self.context.add_turn(message)
+        return message
+
+    def test_folded_turns_leave_the_prompt_for_the_summary(self):
+        first = self.add("user", "ball go up " * 4)
+        for _ in range(6):
+            self.add("assistant", "up up up " * 4)
+        self.assertGreater(self.context.folded_turns, 0)
+
+        fitted = self.context.fit(self.chat_ctx)
+        ids = [item.id for item in fitted.items]
+        self.assertNotIn(first.id, ids)
+        self.assertEqual(fitted.items[0].text_content, "instructions")
+        self.assertIn("EARLIER IN THIS SESSION", fitted.items[1].text_content)
+        # The session's own context is left as it is
+        self.assertEqual(len(self.chat_ctx.items), 8)
+
+    def test_only_dropped_excerpts_reach_the_summarizer(self):
+        summarizer = StubSummarizer()
+        self.context.attach_summarizer(summarizer)
+        self.add("user", "dog")
+        self.add("assistant", "big dog woof " * 6)
+        self.assertEqual(summarizer.turns, [])
+
+        for _ in range(4):
+            self.add("assistant", "big dog woof " * 6)
+        self.assertEqual(summarizer.turns[0], ("child", "dog"))
+        excerpts = self.context._summary_tokens
+        self.assertLessEqual(excerpts, self.context.summary_budget)
+
+    def test_restored_turns_keep_their_ids_in_the_seeded_context(self):
+        for text in ("dog", "red car", "mama milk"):
+            self.add("user", text)
+        restored = ConversationContextManager(turn_budget=60, summary_budget=30)
+        restored.restore(self.context.snapshot())
+
+        seeded = restored.history_ctx()
+        self.assertEqual(
+            [item.text_content for item in seeded.items], ["dog", "red car", "mama milk"]
+        )
+        # Recorded again when the session re-adds them: no duplicate turns
+        for item in seeded.items:
+            restored.add_turn(item)
+        self.assertEqual(len(restored._turns), 3)
+
+    def test_messages_are_recorded_once(self):
+        message = ChatMessage(role="user", content=["dog"])
+        self.context.add_turn(message)
+        self.context.add_turn(message)
+        self.assertEqual(self.context._turn_tokens, estimate_tokens("dog"))
+
+
+class LivePromptTest(unittest.IsolatedAsyncioTestCase):
+    async def test_prompt_stays_flat_over_a_long_session(self):
+        llm = RecordingLLM(FakeProfile(llm_ttft=0, llm_token_interval=0, jitter=0))
+        assistant = agent_module.CHATAssistant()
+        session = AgentSession(llm=llm)
+        # As wired in the entrypoint
+        session.on(
+            "conversation_item_added",
+            lambda event: assistant.context.add_turn(event.item),
+        )
+        await session.start(assistant)
+        try:
+            for turn in range(TURNS):
+                await session.run(user_input=f"ball go up {turn}")
+        finally:
+            await session.aclose()
+
+        self.assertEqual(len(llm.prompt_tokens), TURNS)
+        self.assertGreater(assistant.context.folded_turns, TURNS // 2)
+        ceiling = (
+            estimate_tokens(assistant.instructions)
+            + agent_module.CONTEXT_TURN_BUDGET
+            + agent_module.CONTEXT_SUMMARY_BUDGET
+            + 50
+        )
+        # Flat: bounded by the budgets however long the session runs, while
+        # the session's own context has long outgrown them
+        self.assertLessEqual(max(llm.prompt_tokens), ceiling)
+        self.assertGreater(estimate_ctx_tokens(assistant.chat_ctx), ceiling)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import asyncio
+import tempfile
+import unittest
+
+from session_checkpoint import DiskCheckpointStore, ResumeWindow, SessionCheckpoints
+
+KEY = "child-1"
+GRACE = 0.05
+
+
+class ResumeWindowTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.checkpoints = SessionCheckpoints(
+            DiskCheckpointStore(directory.name), grace=GRACE, sweep_slack=0
+        )
+        self.finalized = 0
+        self.released = 0
+        self.window = ResumeWindow(
+            self.checkpoints,
+            KEY,
+            self.save_checkpoint,
+            finalize=self.finalize,
+            release=self.release,
+        )
+
+    async def save_checkpoint(self):
+        return await self.checkpoints.save(
+            KEY, room="room-1", participant_id=KEY, state={}, payload={"turns": 3}
+        )
+
+    def finalize(self):
+        self.finalized += 1
+
+    def release(self):
+        self.released += 1
+
+    async def wait_out_window(self):
+        await asyncio.sleep(GRACE * 3)
+
+    async def test_finalizes_once_the_window_expires(self):
+        self.window.on_disconnect()
+        await self.wait_out_window()
+        self.assertEqual((self.finalized, self.released), (1, 0))
+        self.assertIsNone(await self.checkpoints.claim(KEY))
+
+    async def test_rejoin_within_the_window_cancels_finalization(self):
+        self.window.on_disconnect()
+        self.assertTrue(await self.window.on_reconnect())
+        await self.wait_out_window()
+        self.assertEqual((self.finalized, self.released), (0, 0))
+        self.assertIsNone(await self.checkpoints.claim(KEY))
+        self.assertEqual(self.window.summary(), {"drops": 1, "resumes": 1})
+
+    async def test_rejoin_after_the_window_is_not_a_resume(self):
+        self.window.on_disconnect()
+        await self.wait_out_window()
+        self.assertFalse(await self.window.on_reconnect())
+        self.assertEqual(self.finalized, 1)
+
+    async def test_resume_by_another_job_wins_over_expiry(self):
+        self.window.on_disconnect()
+        await asyncio.sleep(GRACE / 5)
+
+        async def never(record):
+            self.fail("an unexpired checkpoint must not be finalized")
+
+        record = await self.checkpoints.resume(KEY, never)
+        self.assertEqual(record["payload"], {"turns": 3})
+        await self.wait_out_window()
+        # The other job owns the session now: this one only lets go of it
+        self.assertEqual((self.finalized, self.released), (0, 1))
+
+    async def test_sweeper_and_expiry_finalize_only_once(self):
+        self.window.on_disconnect()
+        swept = []
+
+        async def finalize_record(record):
+            swept.append(record)
+
+        # Around the deadline both claim it; the loser finds nothing
+        await asyncio.sleep(GRACE)
+        swept_count, _ = await asyncio.gather(
+            self.checkpoints.sweep_once(finalize_record), self.wait_out_window()
+        )
+        self.assertEqual(len(swept) + self.finalized, 1)
+        self.assertEqual(swept_count, len(swept))
+        if swept:
+            self.assertEqual(self.released, 1)
+
+    async def test_concurrent_claims_get_the_checkpoint_once(self):
+        await self.save_checkpoint()
+        records = await asyncio.gather(
+            *(self.checkpoints.claim(KEY) for _ in range(8))
+        )
+        self.assertEqual(sum(record is not None for record in records), 1)
+
+    async def test_hand_off_keeps_the_checkpoint_for_a_later_job(self):
+        self.window.on_disconnect()
+        await self.window.hand_off()
+        await self.wait_out_window()
+        self.assertEqual((self.finalized, self.released), (0, 1))
+        record = await self.checkpoints.claim(KEY)
+        self.assertEqual(record["participant_id"], KEY)
+        self.assertNotIn("jwt_token", record)
+
+    async def test_expired_checkpoint_is_finalized_instead_of_resumed(self):
+        await self.checkpoints.save(
+            KEY, room="room-1", participant_id=KEY, state={}, payload={}
+        )
+        await self.wait_out_window()
+        finalized = []
+
+        async def finalize_record(record):
+            finalized.append(record)
+
+        self.assertIsNone(await self.checkpoints.resume(KEY, finalize_record))
+        self.assertEqual(len(finalized), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
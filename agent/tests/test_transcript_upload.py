@@ -0,0 +1,96 @@
+import json
+import unittest
+
+import aiohttp
+
+from backend_client import BackendResponse
+from transcript_upload import TranscriptUploader
+
+
+class FakeBackend:
+    """Records every transcript POST; fails while `down` is set"""
+
+    def __init__(self):
+        self.down = False
+        self.sent = []
+        self.stored = {}
+
+    async def request(self, method, path, *, json=None, **kwargs):
+        self.sent.append(json)
+        if self.down:
+            raise aiohttp.ClientConnectionError("backend unreachable")
+        sequence = json["sequence"]
+        # Like append_segment: a resent chunk must carry the same turns
+        assert self.stored.setdefault(sequence, json["turns"]) == json["turns"]
+        return BackendResponse(201, '{"stored_bytes": 10}', {})
+
+
+class TranscriptUploaderTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.backend = FakeBackend()
+        self.uploader = TranscriptUploader(
+            self.backend, "room-1", "child-1", flush_turns=2, flush_seconds=60
+        )
+
+    def add_turns(self, *texts):
+        for text in texts:
+            self.uploader.add_turn("child", text, timestamp=1.0)
+
+    async def test_resends_a_failed_chunk_under_the_same_sequence(self):
+        self.backend.down = True
+        self.add_turns("car", "red")
+        self.assertFalse(await self.uploader.flush())
+        failed = self.backend.sent[-1]
+
+        # More turns arrive while the backend is down; the chunk stays as it was
+        self.add_turns("go")
+        self.backend.down = False
+        self.assertTrue(await self.uploader.flush())
+
+        resent = [body for body in self.backend.sent if body["sequence"] == 0]
+        self.assertTrue(all(body == failed for body in resent))
+        self.assertEqual(
+            [turn["content"] for turn in self.backend.stored[1]], ["go"]
+        )
+        self.assertEqual(self.uploader.stats()["segments"], 2)
+        self.assertEqual(self.uploader.stats()["pending_turns"], 0)
+
+    async def test_unsent_chunks_keep_the_in_flight_sequence(self):
+        self.backend.down = True
+        self.add_turns("car", "red")
+        await self.uploader.flush()
+        self.add_turns("go", "big", "truck")
+
+        chunks = self.uploader.unsent_chunks()
+        self.assertEqual([chunk["sequence"] for chunk in chunks], [0, 1, 2])
+        self.assertEqual(chunks[0]["turns"], self.backend.sent[-1]["turns"])
+        self.assertEqual(sum(len(chunk["turns"]) for chunk in chunks), 5)
+
+    async def test_close_returns_what_the_backend_never_took(self):
+        self.add_turns("car", "red")
+        await self.uploader.flush()
+        self.backend.down = True
+        self.add_turns("go")
+        unsent = await self.uploader.close()
+        self.assertEqual(unsent, [{"sequence": 1, "turns": unsent[0]["turns"]}])
+        self.assertEqual([turn["content"] for turn in unsent[0]["turns"]], ["go"])
+
+    async def test_checkpoint_restore_continues_the_sequence(self):
+        self.add_turns("car", "red")
+        await self.uploader.flush()
+        self.backend.down = True
+        self.add_turns("go")
+        await self.uploader.flush()
+        state = json.loads(json.dumps(self.uploader.snapshot()))
+
+        resumed = TranscriptUploader(
+            self.backend, "room-1", "child-1", flush_turns=2, flush_seconds=60
+        )
+        self.backend.down = False
+        resumed.restore(state, same_room=True)
+        self.assertEqual(await resumed.close(), [])
+        self.assertEqual(sorted(self.backend.stored), [0, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
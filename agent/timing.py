@@ -0,0 +1,51 @@
+"""
+Per-phase wall-clock timing for job bootstrap
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PhaseTimer:
+    """
+    Records start offset and duration of named phases relative to job start.
+    Phases may overlap, so offsets show which steps ran concurrently.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: List[Tuple[str, float, float]] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.phases.append((name, begin - self.started, end - begin))
+            logger.info(f"Bootstrap phase '{name}' took {end - begin:.3f}s")
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        """{phase: {"start_ms", "duration_ms"}} for logs and analytics payloads"""
+        return {
+            name: {
+                "start_ms": round(offset * 1000, 1),
+                "duration_ms": round(duration * 1000, 1),
+            }
+            for name, offset, duration in self.phases
+        }
+
+    def summary(self) -> str:
+        ordered = sorted(self.phases, key=lambda p: p[1])
+        return ", ".join(
+            f"{name} @{offset:.2f}s +{duration:.2f}s"
+            for name, offset, duration in ordered
+        )
@@ -0,0 +1,477 @@
+"""
+Topic detection for CHAT conversations
+Per-language keyword packs compiled into a word-boundary token -> topics index
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Set
+
+DEFAULT_LANGUAGE = "en"
+
+# Words are runs of letters/digits; ZWNJ is kept so Persian compounds stay whole
+WORD_PATTERN = re.compile(r"[\w\u200c]+")
+
+# Arabic code points commonly typed in place of their Persian equivalents
+_CHAR_NORMALIZATION = str.maketrans({"ي": "ی", "ك": "ک", "ة": "ه"})
+
+# Keyword packs, one word per entry. Plural forms are derived from PLURAL_SUFFIXES.
+TOPIC_KEYWORDS: Dict[str, Dict[str, List[str]]] = {
+    "en": {
+        "animals": [
+            "dog",
+            "cat",
+            "bird",
+            "cow",
+            "pig",
+            "horse",
+            "duck",
+            "sheep",
+            "chicken",
+            "fish",
+        ],
+        "colors": [
+            "red",
+            "blue",
+            "green",
+            "yellow",
+            "orange",
+            "purple",
+            "pink",
+            "black",
+            "white",
+            "brown",
+        ],
+        "toys": [
+            "ball",
+            "car",
+            "truck",
+            "doll",
+            "teddy",
+            "blocks",
+            "train",
+            "puzzle",
+            "bike",
+            "book",
+        ],
+        "food": [
+            "apple",
+            "banana",
+            "milk",
+            "cookie",
+            "bread",
+            "water",
+            "juice",
+            "cake",
+            "pizza",
+            "cheese",
+        ],
+        "family": [
+            "mama",
+            "dada",
+            "mommy",
+            "daddy",
+            "baby",
+            "sister",
+            "brother",
+            "grandma",
+            "grandpa",
+        ],
+        "actions": [
+            "go",
+            "run",
+            "jump",
+            "play",
+            "eat",
+            "drink",
+            "sleep",
+            "walk",
+            "dance",
+            "sing",
+        ],
+        "body_parts": [
+            "head",
+            "eyes",
+            "nose",
+            "mouth",
+            "hands",
+            "feet",
+            "ears",
+            "hair",
+            "arms",
+            "legs",
+        ],
+        "emotions": [
+            "happy",
+            "sad",
+            "mad",
+            "excited",
+            "tired",
+            "hungry",
+            "love",
+            "like",
+            "want",
+        ],
+    },
+    "fa": {
+        "animals": [
+            "سگ",
+            "گربه",
+            "پرنده",
+            "گاو",
+            "خوک",
+            "اسب",
+            "اردک",
+            "گوسفند",
+            "مرغ",
+            "جوجه",
+            "ماهی",
+        ],
+        "colors": [
+            "قرمز",
+            "آبی",
+            "سبز",
+            "زرد",
+            "نارنجی",
+            "بنفش",
+            "صورتی",
+            "سیاه",
+            "مشکی",
+            "سفید",
+            "قهوه‌ای",
+        ],
+        "toys": [
+            "توپ",
+            "ماشین",
+            "کامیون",
+            "عروسک",
+            "لگو",
+            "قطار",
+            "پازل",
+            "دوچرخه",
+            "کتاب",
+        ],
+        "food": [
+            "سیب",
+            "موز",
+            "شیر",
+            "بیسکویت",
+            "نان",
+            "نون",
+            "آب",
+            "آبمیوه",
+            "کیک",
+            "پیتزا",
+            "پنیر",
+        ],
+        "family": [
+            "مامان",
+            "بابا",
+            "نی‌نی",
+            "خواهر",
+            "آبجی",
+            "برادر",
+            "داداش",
+            "مادربزرگ",
+            "پدربزرگ",
+        ],
+        "actions": [
+            "برو",
+            "بدو",
+            "بپر",
+            "بازی",
+            "بخور",
+            "بنوش",
+            "بخواب",
+            "لالا",
+            "برقص",
+            "بخون",
+        ],
+        "body_parts": [
+            "سر",
+            "چشم",
+            "دماغ",
+            "بینی",
+            "دهن",
+            "دهان",
+            "دست",
+            "پا",
+            "گوش",
+            "مو",
+        ],
+        "emotions": [
+            "خوشحال",
+            "ناراحت",
+            "عصبانی",
+            "خسته",
+            "گرسنه",
+            "گشنمه",
+            "دوست",
+            "می‌خوام",
+        ],
+    },
+    "de": {
+        "animals": [
+            "hund",
+            "katze",
+            "vogel",
+            "kuh",
+            "schwein",
+            "pferd",
+            "ente",
+            "schaf",
+            "huhn",
+            "fisch",
+        ],
+        "colors": [
+            "rot",
+            "blau",
+            "grün",
+            "gelb",
+            "orange",
+            "lila",
+            "rosa",
+            "schwarz",
+            "weiß",
+            "braun",
+        ],
+        "toys": [
+            "ball",
+            "auto",
+            "lastwagen",
+            "puppe",
+            "teddy",
+            "bauklötze",
+            "zug",
+            "puzzle",
+            "fahrrad",
+            "buch",
+        ],
+        "food": [
+            "apfel",
+            "banane",
+            "milch",
+            "keks",
+            "brot",
+            "wasser",
+            "saft",
+            "kuchen",
+            "pizza",
+            "käse",
+        ],
+        "family": [
+            "mama",
+            "papa",
+            "baby",
+            "schwester",
+            "bruder",
+            "oma",
+            "opa",
+        ],
+        "actions": [
+            "gehen",
+            "laufen",
+            "springen",
+            "spielen",
+            "essen",
+            "trinken",
+            "schlafen",
+            "tanzen",
+            "singen",
+        ],
+        "body_parts": [
+            "kopf",
+            "augen",
+            "nase",
+            "mund",
+            "hände",
+            "füße",
+            "ohren",
+            "haare",
+            "arme",
+            "beine",
+        ],
+        "emotions": [
+            "froh",
+            "glücklich",
+            "traurig",
+            "böse",
+            "müde",
+            "hunger",
+            "hungrig",
+            "lieb",
+            "mag",
+            "will",
+        ],
+    },
+    "fr": {
+        "animals": [
+            "chien",
+            "chat",
+            "oiseau",
+            "vache",
+            "cochon",
+            "cheval",
+            "canard",
+            "mouton",
+            "poule",
+            "poisson",
+        ],
+        "colors": [
+            "rouge",
+            "bleu",
+            "vert",
+            "jaune",
+            "orange",
+            "violet",
+            "rose",
+            "noir",
+            "blanc",
+            "marron",
+        ],
+        "toys": [
+            "balle",
+            "ballon",
+            "voiture",
+            "camion",
+            "poupée",
+            "nounours",
+            "cubes",
+            "train",
+            "puzzle",
+            "vélo",
+            "livre",
+        ],
+        "food": [
+            "pomme",
+            "banane",
+            "lait",
+            "biscuit",
+            "pain",
+            "eau",
+            "jus",
+            "gâteau",
+            "pizza",
+            "fromage",
+        ],
+        "family": [
+            "maman",
+            "papa",
+            "bébé",
+            "sœur",
+            "frère",
+            "mamie",
+            "papi",
+        ],
+        "actions": [
+            "va",
+            "cours",
+            "saute",
+            "joue",
+            "mange",
+            "bois",
+            "dors",
+            "marche",
+            "danse",
+            "chante",
+        ],
+        "body_parts": [
+            "tête",
+            "yeux",
+            "nez",
+            "bouche",
+            "mains",
+            "pieds",
+            "oreilles",
+            "cheveux",
+            "bras",
+            "jambes",
+        ],
+        "emotions": [
+            "content",
+            "triste",
+            "fâché",
+            "fatigué",
+            "faim",
+            "aime",
+            "veux",
+        ],
+    },
+}
+
+# Regular plural endings added to every keyword when the index is compiled
+PLURAL_SUFFIXES: Dict[str, List[str]] = {
+    "en": ["s", "es"],
+    "fa": ["ها", "\u200cها"],
+    "de": [],
+    "fr": ["s", "x"],
+}
+
+
+def normalize_text(text: str) -> str:
+    """Case-fold and unify character variants so lookups are exact"""
+    return text.casefold().translate(_CHAR_NORMALIZATION)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into normalized word tokens"""
+    return WORD_PATTERN.findall(normalize_text(text))
+
+
+def normalize_language(language: str) -> str:
+    """Map a language code such as 'en-US' or 'FA' to a supported keyword pack"""
+    code = (language or "").split("-")[0].split("_")[0].lower()
+    return code if code in TOPIC_KEYWORDS else DEFAULT_LANGUAGE
+
+
+class TopicIndex:
+    """
+    Compiled token -> topics map for one language
+    Detection is one hash lookup per token and only matches whole words
+    """
+
+    __slots__ = ("language", "_token_topics")
+
+    def __init__(self, language: str, keywords: Dict[str, List[str]]):
+        self.language = language
+
+        token_topics: Dict[str, Set[str]] = {}
+        suffixes = [""] + PLURAL_SUFFIXES.get(language, [])
+        for topic, words in keywords.items():
+            for word in words:
+                word = normalize_text(word)
+                for suffix in suffixes:
+                    token_topics.setdefault(word + suffix, set()).add(topic)
+
+        self._token_topics: Dict[str, FrozenSet[str]] = {
+            token: frozenset(topics) for token, topics in token_topics.items()
+        }
+
+    def detect(self, text: str) -> Set[str]:
+        """Return the topics mentioned in a raw utterance"""
+        return self.detect_tokens(tokenize(text))
+
+    def detect_tokens(self, tokens: Iterable[str]) -> Set[str]:
+        """Return the topics mentioned in already normalized tokens"""
+        topics: Set[str] = set()
+        lookup = self._token_topics.get
+        for token in tokens:
+            matched = lookup(token)
+            if matched:
+                topics.update(matched)
+        return topics
+
+
+@lru_cache(maxsize=None)
+def _compile_index(language: str) -> TopicIndex:
+    return TopicIndex(language, TOPIC_KEYWORDS[language])
+
+
+def get_topic_index(language: str = DEFAULT_LANGUAGE) -> TopicIndex:
+    """Return the compiled index for a language; built once per process"""
+    return _compile_index(normalize_language(language))
+
+
+def build_topic_indexes() -> Dict[str, TopicIndex]:
+    """Compile every keyword pack up front (called from worker prewarm)"""
+    return {language: _compile_index(language) for language in TOPIC_KEYWORDS}
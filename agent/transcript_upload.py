@@ -0,0 +1,180 @@
+"""
+Chunked transcript upload to the backend transcript store
+Turns are buffered and appended to /sessions/rooms/<room>/transcript/ every
+N turns or after an idle gap, so the full conversation never has to be held
+(or sent in one request) at disconnect.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+
+import aiohttp
+
+from backend_client import BackendClient
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptUploader:
+    """
+    Each chunk gets a sequence number when it is first sent and is resent
+    unchanged until the backend acknowledges it, which makes retries
+    idempotent. While the backend is unreachable at most `max_buffer_turns`
+    unsent turns are kept; older ones are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        client: BackendClient,
+        room: str,
+        child_id: str,
+        *,
+        flush_turns: int = 20,
+        flush_seconds: float = 30.0,
+        max_buffer_turns: int = 500,
+    ):
+        self.client = client
+        self.path = f"sessions/rooms/{room}/transcript/"
+        self.child_id = child_id
+        self.flush_turns = flush_turns
+        self.flush_seconds = flush_seconds
+        self.max_buffer_turns = max_buffer_turns
+
+        self.sequence = 0
+        self.uploaded_turns = 0
+        self.dropped_turns = 0
+        self.stored_bytes = 0
+        self._buffer: List[Dict] = []
+        self._inflight: Optional[List[Dict]] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._idle_timer: Optional[asyncio.TimerHandle] = None
+
+    def add_turn(self, role: str, content: str, timestamp: Optional[float] = None):
+        if not content or not content.strip():
+            return
+        self._buffer.append(
+            {
+                "role": role,
+                "content": content.strip(),
+                "timestamp": round(timestamp or time.time(), 3),
+            }
+        )
+        overflow = len(self._buffer) - self.max_buffer_turns
+        if overflow > 0:
+            del self._buffer[:overflow]
+            self.dropped_turns += overflow
+
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+        self._idle_timer = asyncio.get_running_loop().call_later(
+            self.flush_seconds, self._schedule
+        )
+        if len(self._buffer) >= self.flush_turns:
+            self._schedule()
+
+    def _schedule(self):
+        if self._buffer and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self.flush(), name="transcript-upload")
+
+    async def flush(self) -> bool:
+        """Send the in-flight chunk, then the buffer; False if the backend failed"""
+        async with self._lock:
+            while self._inflight or self._buffer:
+                if self._inflight is None:
+                    self._inflight = self._buffer[: self.flush_turns]
+                    del self._buffer[: len(self._inflight)]
+                if not await self._send(self._inflight):
+                    return False
+                self.sequence += 1
+                self.uploaded_turns += len(self._inflight)
+                self._inflight = None
+            return True
+
+    async def _send(self, turns: List[Dict]) -> bool:
+        try:
+            resp = await self.client.request(
+                "POST",
+                self.path,
+                endpoint="sessions.transcript",
+                child_id=self.child_id,
+                json={"sequence": self.sequence, "turns": turns},
+                idempotent=True,
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Transcript chunk {self.sequence} not uploaded: {e!r}")
+            return False
+        if resp.status not in (200, 201):
+            logger.warning(
+                f"Transcript chunk {self.sequence} rejected ({resp.status}): {resp.text}"
+            )
+            return False
+        self.stored_bytes += (resp.json() or {}).get("stored_bytes", 0)
+        return True
+
+    async def close(self) -> List[Dict]:
+        """Final flush; returns the chunks that could not be uploaded"""
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+        if self._task is not None and not self._task.done():
+            await self._task
+        await self.flush()
+        unsent = self.unsent_chunks()
+        self._inflight = None
+        self._buffer = []
+        return unsent
+
+    def unsent(self) -> List[Dict]:
+        """Turns not yet acknowledged by the backend (no network call)"""
+        return (self._inflight or []) + self._buffer
+
+    def unsent_chunks(self) -> List[Dict]:
+        """
+        Unacknowledged turns as {"sequence", "turns"} chunks, numbered as
+        `flush` would have sent them: the in-flight chunk keeps its number,
+        so the backend stores each chunk once however often it is resent
+        """
+        chunks = []
+        sequence = self.sequence
+        if self._inflight:
+            chunks.append({"sequence": sequence, "turns": list(self._inflight)})
+            sequence += 1
+        for start in range(0, len(self._buffer), self.flush_turns):
+            chunks.append(
+                {
+                    "sequence": sequence,
+                    "turns": self._buffer[start : start + self.flush_turns],
+                }
+            )
+            sequence += 1
+        return chunks
+
+    def snapshot(self) -> Dict:
+        """Sequence, counters and unsent turns, for a session checkpoint"""
+        return {**self.stats(), "unsent": self.unsent()}
+
+    def restore(self, state: Dict, same_room: bool = True):
+        """
+        Continue from a checkpoint. Unsent turns are queued again; the
+        sequence and counters only carry over when uploading to the same room.
+        """
+        if same_room:
+            self.sequence = state["segments"]
+            self.uploaded_turns = state["uploaded_turns"]
+            self.dropped_turns = state["dropped_turns"]
+            self.stored_bytes = state["stored_bytes"]
+        self._buffer = list(state["unsent"]) + self._buffer
+        if self._buffer:
+            self._schedule()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "segments": self.sequence,
+            "uploaded_turns": self.uploaded_turns,
+            "dropped_turns": self.dropped_turns,
+            "stored_bytes": self.stored_bytes,
+            "pending_turns": len(self._buffer) + len(self._inflight or []),
+        }
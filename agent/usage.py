@@ -0,0 +1,222 @@
+"""
+Per-session provider usage and estimated cost
+Counts LLM tokens, TTS characters, STT audio seconds and avatar render time
+as LiveKit reports them, so the backend can see which sessions (and which
+prompts) are expensive
+"""
+
+import os
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+from livekit.agents import metrics as lk_metrics
+from prometheus_client import Counter
+
+from voice_metrics import event_labels
+
+PROVIDER_USAGE = Counter(
+    "chat_agent_provider_usage_total",
+    "Provider usage by unit (prompt_tokens, cached_tokens, completion_tokens, "
+    "characters, audio_seconds, render_seconds)",
+    ["component", "provider", "model", "unit"],
+)
+
+# USD list prices, set per deployment from the providers' price sheets.
+# CHAT_COST_<NAME> applies to every provider of the component;
+# CHAT_COST_<PROVIDER>_<NAME> (e.g. CHAT_COST_GOOGLE_LLM_PROMPT_PER_MTOK) to one
+RATES = {
+    "llm_prompt_per_mtok": float(os.getenv("CHAT_COST_LLM_PROMPT_PER_MTOK", "0")),
+    "llm_cached_per_mtok": float(os.getenv("CHAT_COST_LLM_CACHED_PER_MTOK", "0")),
+    "llm_completion_per_mtok": float(
+        os.getenv("CHAT_COST_LLM_COMPLETION_PER_MTOK", "0")
+    ),
+    "tts_per_kchar": float(os.getenv("CHAT_COST_TTS_PER_KCHAR", "0")),
+    "stt_per_minute": float(os.getenv("CHAT_COST_STT_PER_MINUTE", "0")),
+    "avatar_per_minute": float(os.getenv("CHAT_COST_AVATAR_PER_MINUTE", "0")),
+}
+
+
+def rate(name: str, provider: str) -> float:
+    """Price `name` for `provider`, falling back to the component-wide price"""
+    key = re.sub(r"[^A-Z0-9]+", "_", provider.upper()).strip("_")
+    value = os.getenv(f"CHAT_COST_{key}_{name.upper()}")
+    return float(value) if value else RATES[name]
+
+
+def provider_cost(component: str, provider: str, units: Dict[str, float]) -> float:
+    """Estimated USD cost of one provider's usage"""
+    if component == "llm":
+        cached = units.get("cached_tokens", 0)
+        uncached = units.get("prompt_tokens", 0) - cached
+        return (
+            uncached * rate("llm_prompt_per_mtok", provider)
+            + cached * rate("llm_cached_per_mtok", provider)
+            + units.get("completion_tokens", 0)
+            * rate("llm_completion_per_mtok", provider)
+        ) / 1_000_000
+    if component == "tts":
+        return units.get("characters", 0) / 1000 * rate("tts_per_kchar", provider)
+    if component == "stt":
+        return units.get("audio_seconds", 0) / 60 * rate("stt_per_minute", provider)
+    if component == "avatar":
+        return units.get("render_seconds", 0) / 60 * rate("avatar_per_minute", provider)
+    return 0.0
+
+
+class UsageMeter:
+    """
+    Fed with `metrics_collected` items like VoiceLatencyRecorder. Usage is
+    attributed to the provider that reported it (see `event_labels`), so a
+    hedged LLM call bills both providers; `providers` gives the (provider,
+    model) of each component for events that cannot be traced.
+    """
+
+    def __init__(
+        self,
+        providers: Dict[str, Tuple[str, str]],
+        plugins: Optional[Dict[str, Tuple[str, str]]] = None,
+    ):
+        self.providers = providers
+        self.plugins = plugins
+        self.llm_requests = 0
+        self.llm_prompt_tokens = 0
+        self.llm_cached_tokens = 0
+        self.llm_completion_tokens = 0
+        self.tts_requests = 0
+        self.tts_characters = 0
+        self.tts_audio_seconds = 0.0
+        self.stt_audio_seconds = 0.0
+        self.avatar_render_seconds = 0.0
+        # (component, provider, model) -> {unit: amount}
+        self.by_provider: Dict[Tuple[str, str, str], Dict[str, float]] = {}
+        self._avatar_started_at: Optional[float] = None
+
+    def _count(self, component: str, labels: Tuple[str, str], unit: str, amount: float):
+        if amount <= 0:
+            return
+        PROVIDER_USAGE.labels(component, *labels, unit).inc(amount)
+        units = self.by_provider.setdefault((component, *labels), {})
+        units[unit] = units.get(unit, 0) + amount
+
+    def on_metrics(self, event):
+        """Feed one `MetricsCollectedEvent.metrics` item"""
+        if isinstance(event, lk_metrics.LLMMetrics):
+            # Cancelled streams are billed for what was generated
+            labels = event_labels("llm", event, self.providers, self.plugins)
+            self.llm_requests += 1
+            self.llm_prompt_tokens += event.prompt_tokens
+            self.llm_cached_tokens += event.prompt_cached_tokens
+            self.llm_completion_tokens += event.completion_tokens
+            self._count("llm", labels, "prompt_tokens", event.prompt_tokens)
+            self._count("llm", labels, "cached_tokens", event.prompt_cached_tokens)
+            self._count("llm", labels, "completion_tokens", event.completion_tokens)
+        elif isinstance(event, lk_metrics.TTSMetrics):
+            labels = event_labels("tts", event, self.providers, self.plugins)
+            self.tts_requests += 1
+            self.tts_characters += event.characters_count
+            self.tts_audio_seconds += event.audio_duration
+            self._count("tts", labels, "characters", event.characters_count)
+        elif isinstance(event, lk_metrics.STTMetrics):
+            labels = event_labels("stt", event, self.providers, self.plugins)
+            self.stt_audio_seconds += event.audio_duration
+            self._count("stt", labels, "audio_seconds", event.audio_duration)
+
+    def avatar_started(self):
+        self._avatar_started_at = time.monotonic()
+
+    def avatar_stopped(self):
+        if self._avatar_started_at is None:
+            return
+        seconds = time.monotonic() - self._avatar_started_at
+        self._avatar_started_at = None
+        self.avatar_render_seconds += seconds
+        labels = self.providers.get("avatar", ("unknown", "unknown"))
+        self._count("avatar", labels, "render_seconds", seconds)
+
+    def snapshot(self) -> Dict:
+        """Counters so far (the avatar clock keeps running), for a session checkpoint"""
+        return {
+            **{
+                name: getattr(self, name)
+                for name in (
+                    "llm_requests",
+                    "llm_prompt_tokens",
+                    "llm_cached_tokens",
+                    "llm_completion_tokens",
+                    "tts_requests",
+                    "tts_characters",
+                    "tts_audio_seconds",
+                    "stt_audio_seconds",
+                    "avatar_render_seconds",
+                )
+            },
+            "by_provider": [
+                [*key, dict(units)] for key, units in self.by_provider.items()
+            ],
+        }
+
+    def restore(self, state: Dict):
+        """Add the usage of the session's earlier job(s)"""
+        for name, value in state.items():
+            if name == "by_provider":
+                for component, provider, model, units in value:
+                    key = (component, provider, model)
+                    merged = self.by_provider.setdefault(key, {})
+                    for unit, amount in units.items():
+                        merged[unit] = merged.get(unit, 0) + amount
+            else:
+                setattr(self, name, getattr(self, name) + value)
+
+    def estimated_cost(self) -> float:
+        cost = sum(
+            provider_cost(component, provider, units)
+            for (component, provider, _), units in self.by_provider.items()
+        )
+        return round(cost, 6)
+
+    def _providers_summary(self) -> Dict[str, List[Dict]]:
+        """Usage and cost per provider of each component"""
+        result: Dict[str, List[Dict]] = {
+            component: [] for component in self.providers
+        }
+        for (component, provider, model), units in self.by_provider.items():
+            result.setdefault(component, []).append(
+                {
+                    "provider": provider,
+                    "model": model,
+                    "usage": {unit: round(amount, 2) for unit, amount in units.items()},
+                    "estimated_cost_usd": round(
+                        provider_cost(component, provider, units), 6
+                    ),
+                }
+            )
+        for component, entries in result.items():
+            if not entries and component in self.providers:
+                provider, model = self.providers[component]
+                entries.append(
+                    {
+                        "provider": provider,
+                        "model": model,
+                        "usage": {},
+                        "estimated_cost_usd": 0.0,
+                    }
+                )
+        return result
+
+    def summary(self) -> Dict:
+        """Usage in the backend's SessionUsage format; stops the avatar clock"""
+        self.avatar_stopped()
+        return {
+            "llm_requests": self.llm_requests,
+            "llm_prompt_tokens": self.llm_prompt_tokens,
+            "llm_cached_tokens": self.llm_cached_tokens,
+            "llm_completion_tokens": self.llm_completion_tokens,
+            "tts_requests": self.tts_requests,
+            "tts_characters": self.tts_characters,
+            "tts_audio_seconds": round(self.tts_audio_seconds, 2),
+            "stt_audio_seconds": round(self.stt_audio_seconds, 2),
+            "avatar_render_seconds": round(self.avatar_render_seconds, 2),
+            "estimated_cost_usd": self.estimated_cost(),
+            "providers": self._providers_summary(),
+        }
@@ -0,0 +1,116 @@
+"""
+Single-pass analysis of a child utterance
+The text is normalized and tokenized once; word count, vocabulary, topics,
+emotion cue and achievement level are all derived from that one token list
+using tables compiled once per language.
+"""
+
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+
+from topics import (
+    DEFAULT_LANGUAGE,
+    TOPIC_KEYWORDS,
+    WORD_PATTERN,
+    TopicIndex,
+    get_topic_index,
+    normalize_language,
+    normalize_text,
+)
+
+# Emotion cues in priority order: the first emotion with a matching cue wins.
+# Multi-word cues are matched on consecutive tokens.
+EMOTION_CUES: Dict[str, List[Tuple[str, List[str]]]] = {
+    "en": [
+        ("celebrating", ["great", "good", "perfect", "wonderful"]),
+        ("encouraging", ["try", "tried", "trying", "attempt", "practice"]),
+        ("thinking", ["thinking", "hmm", "let me"]),
+        ("excited", ["excited", "fun", "play", "playing", "yay"]),
+    ],
+}
+DEFAULT_EMOTION = "happy"
+
+
+class UtteranceAnalysis(NamedTuple):
+    text: str  # stripped and normalized
+    tokens: Tuple[str, ...]
+    word_count: int
+    vocabulary: FrozenSet[str]  # word tokens, digits excluded
+    topics: Set[str]
+    emotion: str  # an AvatarEmotion value
+    achievement_level: str
+
+
+class UtteranceAnalyzer:
+    """Compiled per-language tables; safe to share between sessions"""
+
+    __slots__ = ("language", "topic_index", "_emotions", "_word_cues", "_phrase_cues")
+
+    def __init__(self, language: str, topic_index: TopicIndex):
+        self.language = language
+        self.topic_index = topic_index
+
+        cues = EMOTION_CUES.get(language, EMOTION_CUES[DEFAULT_LANGUAGE])
+        self._emotions = [emotion for emotion, _ in cues]
+        self._word_cues: Dict[str, int] = {}
+        self._phrase_cues: Dict[Tuple[str, str], int] = {}
+        for priority, (_, words) in enumerate(cues):
+            for cue in words:
+                parts = WORD_PATTERN.findall(normalize_text(cue))
+                if len(parts) == 1:
+                    self._word_cues.setdefault(parts[0], priority)
+                elif len(parts) == 2:
+                    self._phrase_cues.setdefault((parts[0], parts[1]), priority)
+
+    def _emotion(self, tokens: Tuple[str, ...]) -> str:
+        best: Optional[int] = None
+        word_cue = self._word_cues.get
+        phrase_cue = self._phrase_cues.get
+        previous = None
+        for token in tokens:
+            priority = word_cue(token)
+            if priority is None and previous is not None:
+                priority = phrase_cue((previous, token))
+            if priority is not None and (best is None or priority < best):
+                best = priority
+                if best == 0:
+                    break
+            previous = token
+        return DEFAULT_EMOTION if best is None else self._emotions[best]
+
+    def analyze(self, text: str) -> UtteranceAnalysis:
+        clean = normalize_text(text.strip())
+        tokens = tuple(WORD_PATTERN.findall(clean))
+        word_count = len(tokens)
+
+        if word_count == 1:
+            achievement_level = "first_word"
+        elif word_count > 1:
+            achievement_level = "breakthrough"
+        else:
+            achievement_level = "good_attempt"
+
+        return UtteranceAnalysis(
+            clean,
+            tokens,
+            word_count,
+            frozenset([t for t in tokens if not t.isdigit()]),
+            self.topic_index.detect_tokens(tokens),
+            self._emotion(tokens),
+            achievement_level,
+        )
+
+
+@lru_cache(maxsize=None)
+def _compile_analyzer(language: str) -> UtteranceAnalyzer:
+    return UtteranceAnalyzer(language, get_topic_index(language))
+
+
+def get_utterance_analyzer(language: str = DEFAULT_LANGUAGE) -> UtteranceAnalyzer:
+    """Return the compiled analyzer for a language; built once per process"""
+    return _compile_analyzer(normalize_language(language))
+
+
+def build_utterance_analyzers() -> Dict[str, UtteranceAnalyzer]:
+    """Compile every language's tables up front (called from worker prewarm)"""
+    return {language: _compile_analyzer(language) for language in TOPIC_KEYWORDS}
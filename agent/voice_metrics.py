@@ -0,0 +1,209 @@
+"""
+Per-turn voice pipeline latency histograms
+Every job process records into Prometheus histograms; the worker's main process
+serves them on a local /metrics endpoint, aggregated across job processes when
+PROMETHEUS_MULTIPROC_DIR is set
+"""
+
+import glob
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from livekit.agents import metrics as lk_metrics
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Histogram,
+    multiprocess,
+    start_http_server,
+)
+
+logger = logging.getLogger(__name__)
+
+# Voice turns live in the 50ms - 10s range; the default buckets are too coarse
+LATENCY_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+
+# Speaking and TTS metrics further apart than this belong to different turns
+MAX_PAIRING_GAP = 15.0
+
+STAGES = {
+    "eos_to_stt_final": Histogram(
+        "chat_agent_eos_to_stt_final_seconds",
+        "End of child speech to final STT transcript",
+        ["provider", "model"],
+        buckets=LATENCY_BUCKETS,
+    ),
+    "llm_ttft": Histogram(
+        "chat_agent_llm_ttft_seconds",
+        "LLM request to first generated token",
+        ["provider", "model"],
+        buckets=LATENCY_BUCKETS,
+    ),
+    "tts_ttfb": Histogram(
+        "chat_agent_tts_ttfb_seconds",
+        "TTS request to first synthesized audio byte",
+        ["provider", "model"],
+        buckets=LATENCY_BUCKETS,
+    ),
+    "tts_to_avatar_first_frame": Histogram(
+        "chat_agent_tts_to_avatar_first_frame_seconds",
+        "First synthesized audio byte to avatar playback start",
+        ["provider", "model"],
+        buckets=LATENCY_BUCKETS,
+    ),
+}
+
+# End to end, so not labelled by provider
+FIRST_AUDIO = Histogram(
+    "chat_agent_time_to_first_audio_seconds",
+    "Committed child turn to the first agent audio of its reply",
+    buckets=LATENCY_BUCKETS,
+)
+
+
+def start_metrics_server(port: int) -> bool:
+    """
+    Serve /metrics from the worker's main process. Call before any job starts;
+    returns False when the port is unavailable.
+    """
+    multiproc_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    registry = REGISTRY
+    if multiproc_dir:
+        os.makedirs(multiproc_dir, exist_ok=True)
+        # Files left by a previous worker would otherwise be summed in forever
+        for path in glob.glob(os.path.join(multiproc_dir, "*.db")):
+            os.remove(path)
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+
+    try:
+        start_http_server(port, registry=registry)
+    except OSError as e:
+        logger.warning(f"Metrics endpoint disabled, cannot bind port {port}: {e}")
+        return False
+    logger.info(f"Serving voice pipeline metrics on :{port}/metrics")
+    return True
+
+
+def event_labels(
+    component: str,
+    event,
+    providers: Dict[str, Tuple[str, str]],
+    plugins: Optional[Dict[str, Tuple[str, str]]] = None,
+) -> Tuple[str, str]:
+    """
+    (provider, model) of whichever provider reported `event`: from its
+    metadata where LiveKit sends it, else from its plugin label through
+    `plugins` (see ProviderRouter.plugins), else the component's default
+    """
+    provider, model = providers.get(component, ("unknown", "unknown"))
+    label = getattr(event, "label", None)
+    if plugins and label in plugins:
+        provider, model = plugins[label]
+    metadata = getattr(event, "metadata", None)
+    if metadata is not None:
+        provider = getattr(metadata, "model_provider", None) or provider
+        model = getattr(metadata, "model_name", None) or model
+    return provider, model
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class VoiceLatencyRecorder:
+    """
+    Turns LiveKit `metrics_collected` events into stage latencies.
+
+    `providers` maps each component ("stt", "llm", "tts", "avatar") to its
+    (provider, model) labels; they are used when an event cannot be traced
+    to its provider (see `event_labels`). Samples are also kept per session
+    for the analytics payload.
+    """
+
+    def __init__(
+        self,
+        providers: Dict[str, Tuple[str, str]],
+        plugins: Optional[Dict[str, Tuple[str, str]]] = None,
+    ):
+        self.providers = providers
+        self.plugins = plugins
+        self.samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        self.samples["turn_to_first_audio"] = []
+        self._speaking_at: Optional[float] = None
+        self._tts_first_byte_at: Optional[float] = None
+
+    def _labels(self, component: str, event) -> Tuple[str, str]:
+        return event_labels(component, event, self.providers, self.plugins)
+
+    def _observe(self, stage: str, seconds: float, labels: Tuple[str, str]):
+        if seconds < 0:
+            return
+        STAGES[stage].labels(*labels).observe(seconds)
+        self.samples[stage].append(seconds)
+
+    def on_metrics(self, event):
+        """Feed one `MetricsCollectedEvent.metrics` item"""
+        if isinstance(event, lk_metrics.EOUMetrics):
+            self._observe(
+                "eos_to_stt_final",
+                event.transcription_delay,
+                self._labels("stt", None),
+            )
+        elif isinstance(event, lk_metrics.LLMMetrics):
+            if event.ttft >= 0 and not event.cancelled:
+                self._observe("llm_ttft", event.ttft, self._labels("llm", event))
+        elif isinstance(event, lk_metrics.TTSMetrics):
+            if event.ttfb < 0 or event.cancelled:
+                return
+            self._observe("tts_ttfb", event.ttfb, self._labels("tts", event))
+            # TTS metrics are emitted when synthesis ends; rebuild the first-byte time
+            self._tts_first_byte_at = event.timestamp - event.duration + event.ttfb
+            self._pair_avatar_frame()
+
+    def on_first_audio(self, seconds: float):
+        """Time from a committed child turn to the first audio of the reply"""
+        if seconds < 0:
+            return
+        FIRST_AUDIO.observe(seconds)
+        self.samples["turn_to_first_audio"].append(seconds)
+
+    def on_agent_speaking(self):
+        """The avatar started playing agent audio"""
+        self._speaking_at = time.time()
+        self._pair_avatar_frame()
+
+    def _pair_avatar_frame(self):
+        if self._speaking_at is None or self._tts_first_byte_at is None:
+            return
+        gap = self._speaking_at - self._tts_first_byte_at
+        if abs(gap) > MAX_PAIRING_GAP:
+            # Stale half from another turn: keep only the newer timestamp
+            if self._speaking_at < self._tts_first_byte_at:
+                self._speaking_at = None
+            else:
+                self._tts_first_byte_at = None
+            return
+        if gap >= 0:
+            self._observe(
+                "tts_to_avatar_first_frame", gap, self._labels("avatar", None)
+            )
+        self._speaking_at = self._tts_first_byte_at = None
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """{stage: {"count", "p50_ms", "p95_ms", "max_ms"}} for the analytics payload"""
+        result = {}
+        for stage, values in self.samples.items():
+            if not values:
+                continue
+            ordered = sorted(values)
+            result[stage] = {
+                "count": len(ordered),
+                "p50_ms": round(_percentile(ordered, 0.5) * 1000, 1),
+                "p95_ms": round(_percentile(ordered, 0.95) * 1000, 1),
+                "max_ms": round(ordered[-1] * 1000, 1),
+            }
+        return result
@@ -1,8 +1,10 @@
 from django.contrib import admin
-from .models import Child, Session, SessionAnalytics
+from .models import Child, Session, SessionAnalytics, SessionUsage, TranscriptSegment
 
 
 # Register your models here.
 admin.site.register(Child)
 admin.site.register(Session)
 admin.site.register(SessionAnalytics)
+admin.site.register(TranscriptSegment)
+admin.site.register(SessionUsage)
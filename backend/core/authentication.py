@@ -0,0 +1,62 @@
+import hmac
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+from .models import Child
+
+
+class AgentServiceAuthentication(BaseAuthentication):
+    """
+    Authenticates the LiveKit agent with a shared service credential:
+        Authorization: Service <AGENT_SERVICE_TOKEN>
+        X-Chat-Child: <child id>
+    The request acts for the child's parent, so the agent never has to keep a
+    user's (short-lived) JWT around for deliveries made after the session.
+    """
+
+    keyword = "Service"
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+
+        expected = settings.AGENT_SERVICE_TOKEN
+        if not expected:
+            raise AuthenticationFailed("Agent service authentication is disabled.")
+        if len(auth) != 2 or not hmac.compare_digest(auth[1], expected.encode()):
+            raise AuthenticationFailed("Invalid service credential.")
+
+        child_id = request.headers.get("X-Chat-Child")
+        if not child_id:
+            raise AuthenticationFailed("X-Chat-Child header is required.")
+        try:
+            child = Child.objects.select_related("parent").get(id=child_id)
+        except (Child.DoesNotExist, DjangoValidationError, ValueError):
+            raise AuthenticationFailed("Unknown child.")
+        return child.parent, child
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+
+class AgentServiceEndpointsMixin:
+    """
+    ViewSet mixin accepting AgentServiceAuthentication, next to the view's
+    own authenticators, on the (action, method) pairs the agent calls:
+        agent_service_actions = {("create", "post")}
+    Every other endpoint keeps refusing the service credential.
+    """
+
+    agent_service_actions = frozenset()
+
+    def get_authenticators(self):
+        authenticators = super().get_authenticators()
+        # .action is only set once the request is built, so go by the route
+        method = self.request.method.lower()
+        if (self.action_map.get(method), method) in self.agent_service_actions:
+            authenticators.append(AgentServiceAuthentication())
+        return authenticators
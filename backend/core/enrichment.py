@@ -0,0 +1,137 @@
+"""
+Session analytics enrichment: transcript-derived metrics and the LLM summary.
+Runs inside Celery workers (see core.tasks), never in the request cycle.
+"""
+
+import json
+import logging
+import re
+
+from django.conf import settings
+from google import genai
+from google.genai import errors, types
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"[\w\u200c]+")
+
+SUMMARY_PROMPT = """Please create a brief, professional summary of this speech therapy session with a child (18-36 months) with Late Language Emergence.
+
+Session Statistics:
+- Duration: {duration} seconds
+- Child vocalizations: {child_vocalizations}
+- Unique words used: {unique_child_words}
+- Topics detected by the agent: {topics}
+- Best utterance: "{best_utterance}"
+
+Conversation:
+{conversation}
+
+Focus on:
+1. Child's communication progress and engagement
+2. Language skills demonstrated
+3. Areas of strength and potential growth
+4. Overall interaction quality
+
+Respond with JSON: {{"conversation_summary": "<2-3 sentences, professional, for clinical records>", "topics": ["<short topic>", ...]}}"""
+
+
+class TransientEnrichmentError(Exception):
+    """The LLM provider failed in a way worth retrying (rate limit, 5xx, timeout)"""
+
+
+def derive_metrics(turns, duration_seconds=None, recent=None):
+    """
+    Cheap, deterministic metrics computed in one pass over the transcript.
+    `turns` may be a stream; pass a bounded deque as `recent` to keep the
+    last turns for the summary prompt. Without `duration_seconds` the span
+    of the turn timestamps is used.
+    """
+    child_lengths = []
+    child_vocabulary = set()
+    assistant_turns = 0
+    assistant_words = 0
+    first_timestamp = last_timestamp = None
+    for turn in turns:
+        if recent is not None:
+            recent.append(turn)
+        timestamp = turn.get("timestamp")
+        if isinstance(timestamp, (int, float)):
+            if first_timestamp is None:
+                first_timestamp = timestamp
+            last_timestamp = timestamp
+
+        words = WORD_PATTERN.findall(str(turn.get("content", "")).casefold())
+        if turn.get("role") == "child":
+            child_lengths.append(len(words))
+            child_vocabulary.update(words)
+        else:
+            assistant_turns += 1
+            assistant_words += len(words)
+
+    if not duration_seconds and first_timestamp is not None:
+        duration_seconds = last_timestamp - first_timestamp
+
+    child_words = sum(child_lengths)
+    total_words = child_words + assistant_words
+    metrics = {
+        "child_turns": len(child_lengths),
+        "assistant_turns": assistant_turns,
+        "mean_length_of_utterance": (
+            round(child_words / len(child_lengths), 2) if child_lengths else 0
+        ),
+        "longest_utterance_words": max(child_lengths, default=0),
+        "type_token_ratio": (
+            round(len(child_vocabulary) / child_words, 3) if child_words else 0
+        ),
+        "child_talk_share": round(child_words / total_words, 3) if total_words else 0,
+    }
+    if duration_seconds:
+        metrics["child_words_per_minute"] = round(
+            child_words / (duration_seconds / 60), 2
+        )
+    return metrics
+
+
+def summarize_transcript(analytics, turns, duration_seconds=None):
+    """
+    Ask the configured Gemini model for a clinical summary and topic list of
+    `turns` (the most recent part of the transcript for very long sessions).
+    Returns (summary, topics). Raises TransientEnrichmentError for retryable failures.
+    """
+    conversation = "\n".join(
+        f"{turn.get('role')}: {turn.get('content')}" for turn in turns
+    )
+    prompt = SUMMARY_PROMPT.format(
+        duration=round(duration_seconds or 0),
+        child_vocalizations=analytics.child_vocalizations,
+        unique_child_words=analytics.unique_child_words,
+        topics=", ".join(analytics.topics_detected) or "None identified",
+        best_utterance=analytics.best_utterance,
+        conversation=conversation or "(no conversation)",
+    )
+
+    client = genai.Client(api_key=settings.GENAI_API_KEY)
+    try:
+        response = client.models.generate_content(
+            model=settings.GENAI_MODEL_NAME,
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                response_mime_type="application/json", temperature=0.2
+            ),
+        )
+    except errors.ServerError as e:
+        raise TransientEnrichmentError(str(e)) from e
+    except errors.ClientError as e:
+        if e.code in (408, 429):
+            raise TransientEnrichmentError(str(e)) from e
+        raise
+
+    try:
+        data = json.loads(response.text or "{}")
+    except json.JSONDecodeError:
+        logger.warning("Summary model returned non-JSON output; storing it as text")
+        return (response.text or "").strip(), []
+
+    topics = [str(t).strip().lower() for t in data.get("topics", []) if str(t).strip()]
+    return str(data.get("conversation_summary", "")).strip(), topics
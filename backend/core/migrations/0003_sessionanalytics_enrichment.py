@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_remove_child_user_child_conversation_prompt_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sessionanalytics',
+            name='derived_metrics',
+            field=models.JSONField(blank=True, default=dict, help_text='Metrics computed from the transcript (e.g. MLU, type-token ratio)'),
+        ),
+        migrations.AddField(
+            model_name='sessionanalytics',
+            name='enrichment_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='completed', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='sessionanalytics',
+            name='enrichment_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='sessionanalytics',
+            name='enriched_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
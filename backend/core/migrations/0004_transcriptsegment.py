@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-17 10:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_sessionanalytics_enrichment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranscriptSegment',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('sequence', models.PositiveIntegerField(help_text='Position of the chunk in the session, assigned by the uploader')),
+                ('turn_count', models.PositiveIntegerField()),
+                ('raw_size', models.PositiveIntegerField(help_text='Uncompressed JSON size in bytes')),
+                ('data', models.BinaryField(help_text='zstd-compressed JSON list of turns')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transcript_segments', to='core.session')),
+            ],
+            options={
+                'ordering': ['session', 'sequence'],
+                'constraints': [models.UniqueConstraint(fields=('session', 'sequence'), name='unique_transcript_segment')],
+            },
+        ),
+    ]
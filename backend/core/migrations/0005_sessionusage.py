@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-17 12:05
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_transcriptsegment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionUsage',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('llm_requests', models.PositiveIntegerField(default=0)),
+                ('llm_prompt_tokens', models.PositiveBigIntegerField(default=0)),
+                ('llm_cached_tokens', models.PositiveBigIntegerField(default=0)),
+                ('llm_completion_tokens', models.PositiveBigIntegerField(default=0)),
+                ('tts_requests', models.PositiveIntegerField(default=0)),
+                ('tts_characters', models.PositiveBigIntegerField(default=0)),
+                ('tts_audio_seconds', models.FloatField(default=0)),
+                ('stt_audio_seconds', models.FloatField(default=0)),
+                ('avatar_render_seconds', models.FloatField(default=0)),
+                ('estimated_cost_usd', models.DecimalField(decimal_places=6, default=0, max_digits=12)),
+                ('providers', models.JSONField(blank=True, default=dict, help_text='Usage and estimated cost per provider of each component (llm, tts, stt, avatar)')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='usage', to='core.session')),
+            ],
+            options={
+                'verbose_name_plural': 'Session usage',
+            },
+        ),
+    ]
@@ -69,6 +69,12 @@ class SessionAnalytics(models.Model):
     Stores analytics extracted from a session's conversation for pathologists/therapists/parents.
     """
 
+    class EnrichmentStatus(models.TextChoices):
+        PENDING = "pending", "Pending"
+        PROCESSING = "processing", "Processing"
+        COMPLETED = "completed", "Completed"
+        FAILED = "failed", "Failed"
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
     session = models.OneToOneField(
@@ -100,8 +106,89 @@ class SessionAnalytics(models.Model):
         blank=True, help_text="Short narrative summary of the session"
     )
 
+    # Enriched asynchronously by core.tasks from the session's TranscriptSegments
+    derived_metrics = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Metrics computed from the transcript (e.g. MLU, type-token ratio)",
+    )
+    enrichment_status = models.CharField(
+        max_length=16,
+        choices=EnrichmentStatus.choices,
+        default=EnrichmentStatus.COMPLETED,
+        db_index=True,
+    )
+    enrichment_attempts = models.PositiveSmallIntegerField(default=0)
+    enriched_at = models.DateTimeField(null=True, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Analytics for Session {self.session.id} ({self.session.child.name})"
+
+
+class SessionUsage(models.Model):
+    """
+    Provider usage the agent metered during a session, with its cost estimate.
+    Uploaded together with the session's SessionAnalytics.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    session = models.OneToOneField(
+        Session, on_delete=models.CASCADE, related_name="usage"
+    )
+    llm_requests = models.PositiveIntegerField(default=0)
+    llm_prompt_tokens = models.PositiveBigIntegerField(default=0)
+    llm_cached_tokens = models.PositiveBigIntegerField(default=0)
+    llm_completion_tokens = models.PositiveBigIntegerField(default=0)
+    tts_requests = models.PositiveIntegerField(default=0)
+    tts_characters = models.PositiveBigIntegerField(default=0)
+    tts_audio_seconds = models.FloatField(default=0)
+    stt_audio_seconds = models.FloatField(default=0)
+    avatar_render_seconds = models.FloatField(default=0)
+    estimated_cost_usd = models.DecimalField(max_digits=12, decimal_places=6, default=0)
+    providers = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Usage and estimated cost per provider of each component (llm, tts, stt, avatar)",
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Usage for Session {self.session_id} (${self.estimated_cost_usd})"
+
+    class Meta:
+        verbose_name_plural = "Session usage"
+
+
+class TranscriptSegment(models.Model):
+    """
+    A chunk of a session's conversation turns, stored as zstd-compressed JSON.
+    The agent appends segments during the session (see core.transcripts), so
+    neither side ever has to hold a whole transcript in memory.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    session = models.ForeignKey(
+        Session, on_delete=models.CASCADE, related_name="transcript_segments"
+    )
+    sequence = models.PositiveIntegerField(
+        help_text="Position of the chunk in the session, assigned by the uploader"
+    )
+    turn_count = models.PositiveIntegerField()
+    raw_size = models.PositiveIntegerField(help_text="Uncompressed JSON size in bytes")
+    data = models.BinaryField(help_text="zstd-compressed JSON list of turns")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Transcript segment {self.sequence} of Session {self.session_id}"
+
+    class Meta:
+        ordering = ["session", "sequence"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["session", "sequence"], name="unique_transcript_segment"
+            ),
+        ]
@@ -1,7 +1,8 @@
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import transaction
 from rest_framework import serializers
-from .models import Child, Session, SessionAnalytics
+from .models import Child, Session, SessionAnalytics, SessionUsage
 
 
 class ChildSerializer(serializers.ModelSerializer):
@@ -99,11 +100,84 @@ class SessionCreateResponseSerializer(serializers.Serializer):
     started_at = serializers.DateTimeField()
 
 
+class SessionUsageSerializer(serializers.ModelSerializer):
+    """
+    Provider usage of one session. Written by the agent as the `usage` part of
+    its analytics upload; read through /api/usage/.
+    """
+
+    child = serializers.CharField(source="session.child.name", read_only=True)
+    child_id = serializers.UUIDField(source="session.child_id", read_only=True)
+    started_at = serializers.DateTimeField(source="session.started_at", read_only=True)
+
+    class Meta:
+        model = SessionUsage
+        fields = [
+            "id",
+            "session",
+            "child",
+            "child_id",
+            "started_at",
+            "llm_requests",
+            "llm_prompt_tokens",
+            "llm_cached_tokens",
+            "llm_completion_tokens",
+            "tts_requests",
+            "tts_characters",
+            "tts_audio_seconds",
+            "stt_audio_seconds",
+            "avatar_render_seconds",
+            "estimated_cost_usd",
+            "providers",
+            "created_at",
+        ]
+        read_only_fields = ["id", "session", "created_at"]
+
+
+def validate_turns(value):
+    """Each turn needs a role and text content"""
+    for turn in value:
+        if "role" not in turn or "content" not in turn:
+            raise serializers.ValidationError(
+                "Transcript turns must be objects with 'role' and 'content'."
+            )
+    return value
+
+
+class TranscriptChunkSerializer(serializers.Serializer):
+    """
+    Input for POST /api/sessions/{id}/transcript/.
+    `sequence` makes retries idempotent; omit it to append after the last chunk.
+    """
+
+    sequence = serializers.IntegerField(min_value=0, required=False)
+    turns = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=settings.TRANSCRIPT_MAX_CHUNK_TURNS,
+    )
+
+    def validate_turns(self, value):
+        return validate_turns(value)
+
+
 class SessionAnalyticsSerializer(serializers.ModelSerializer):
     child_id = serializers.UUIDField(write_only=True)
     session = serializers.PrimaryKeyRelatedField(read_only=True)
     session_duration = serializers.SerializerMethodField()
     child = serializers.CharField(source="session.child.name", read_only=True)
+    usage = SessionUsageSerializer(write_only=True, required=False)
+    # Room of the session; older agents omit it and get the child's latest session
+    livekit_room = serializers.CharField(write_only=True, required=False)
+    # Trailing chunks the agent did not upload, under the sequence numbers they
+    # would have had, so a resent payload stores them only once
+    transcript_chunks = TranscriptChunkSerializer(
+        many=True, write_only=True, required=False
+    )
+    # Older agents send the trailing turns without a sequence
+    transcript = serializers.ListField(
+        child=serializers.DictField(), write_only=True, required=False
+    )
 
     class Meta:
         model = SessionAnalytics
@@ -122,6 +196,13 @@ class SessionAnalyticsSerializer(serializers.ModelSerializer):
             "topics_detected",
             "best_utterance",
             "conversation_summary",
+            "livekit_room",
+            "transcript_chunks",
+            "transcript",
+            "usage",
+            "derived_metrics",
+            "enrichment_status",
+            "enriched_at",
             "created_at",
             "updated_at",
         ]
@@ -129,10 +210,16 @@ class SessionAnalyticsSerializer(serializers.ModelSerializer):
             "id",
             "session",
             "child",
+            "derived_metrics",
+            "enrichment_status",
+            "enriched_at",
             "created_at",
             "updated_at",
         ]
 
+    def validate_transcript(self, value):
+        return validate_turns(value)
+
     def get_session_duration(self, obj):
         """
         Returns session duration in seconds (or None if session not ended).
@@ -0,0 +1,158 @@
+"""
+Celery tasks that enrich SessionAnalytics after the agent uploads a session.
+
+Routing (see CELERY_TASK_ROUTES): summaries run on the "summaries" queue, the
+periodic sweep on "maintenance". Sessions that just ended are published with
+LIVE priority; retries and sweeps use BACKFILL so fresh sessions overtake them.
+"""
+
+import logging
+from collections import deque
+from datetime import timedelta
+
+from celery import group, shared_task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .enrichment import TransientEnrichmentError, derive_metrics, summarize_transcript
+from .models import SessionAnalytics
+from .transcripts import iter_turns
+
+logger = logging.getLogger(__name__)
+
+# Redis transport: lower value is consumed first
+LIVE_PRIORITY = 0
+BACKFILL_PRIORITY = 6
+
+Status = SessionAnalytics.EnrichmentStatus
+
+
+def processing_cutoff():
+    """PROCESSING rows touched after this may still be held by a running task"""
+    return timezone.now() - timedelta(seconds=settings.CELERY_TASK_TIME_LIMIT)
+
+
+def enqueue_enrichment(analytics_id, priority=LIVE_PRIORITY):
+    """Publish the enrichment task once the current transaction commits"""
+    transaction.on_commit(
+        lambda: summarize_session.apply_async((str(analytics_id),), priority=priority)
+    )
+
+
+@shared_task(
+    bind=True,
+    acks_late=True,
+    autoretry_for=(TransientEnrichmentError,),
+    retry_backoff=True,
+    retry_backoff_max=600,
+    retry_jitter=True,
+    max_retries=5,
+    ignore_result=True,
+)
+def summarize_session(self, analytics_id):
+    """Compute derived metrics, then the LLM summary and topics, for one session"""
+    with transaction.atomic():
+        analytics = (
+            SessionAnalytics.objects.select_for_update(skip_locked=True)
+            .select_related("session")
+            .filter(pk=analytics_id)
+            .first()
+        )
+        if analytics is None or analytics.enrichment_status == Status.COMPLETED:
+            return
+        if (
+            analytics.enrichment_status == Status.PROCESSING
+            and analytics.updated_at > processing_cutoff()
+        ):
+            # A redelivered message while another worker is still on it
+            return
+        analytics.enrichment_status = Status.PROCESSING
+        analytics.enrichment_attempts += 1
+        analytics.save(
+            update_fields=["enrichment_status", "enrichment_attempts", "updated_at"]
+        )
+
+    # One streamed pass over the stored segments; only the tail is kept in memory
+    duration = analytics.session.get_session_duration()
+    duration = duration.total_seconds() if duration else None
+    recent = deque(maxlen=settings.SUMMARY_MAX_TURNS)
+    analytics.derived_metrics = derive_metrics(
+        iter_turns(analytics.session), duration, recent
+    )
+    update_fields = [
+        "derived_metrics",
+        "enrichment_status",
+        "enriched_at",
+        "updated_at",
+    ]
+
+    # The agent may already have summarized the session itself
+    if not analytics.conversation_summary and recent:
+        try:
+            summary, topics = summarize_transcript(analytics, recent, duration)
+        except TransientEnrichmentError:
+            analytics.enrichment_status = Status.PENDING
+            analytics.save(
+                update_fields=["derived_metrics", "enrichment_status", "updated_at"]
+            )
+            if self.request.retries >= self.max_retries:
+                logger.error(f"Giving up on summary for analytics {analytics_id}")
+                analytics.enrichment_status = Status.FAILED
+                analytics.save(update_fields=["enrichment_status", "updated_at"])
+            raise
+        except Exception:
+            logger.exception(f"Summary failed for analytics {analytics_id}")
+            analytics.enrichment_status = Status.FAILED
+            analytics.save(
+                update_fields=["derived_metrics", "enrichment_status", "updated_at"]
+            )
+            return
+
+        analytics.conversation_summary = summary
+        analytics.topics_detected = sorted(set(analytics.topics_detected) | set(topics))
+        update_fields += ["conversation_summary", "topics_detected"]
+
+    analytics.enrichment_status = Status.COMPLETED
+    analytics.enriched_at = timezone.now()
+    analytics.save(update_fields=update_fields)
+    logger.info(f"Enriched analytics {analytics_id}")
+
+
+@shared_task(ignore_result=True)
+def sweep_pending_enrichment():
+    """
+    Re-publish sessions whose enrichment was lost (worker restart, broker
+    outage) or retried out, in batches at backfill priority. PROCESSING rows
+    are only taken once no task can still be running on them.
+    """
+    stale_before = timezone.now() - timedelta(
+        minutes=settings.ENRICHMENT_STALE_MINUTES
+    )
+    ids = list(
+        SessionAnalytics.objects.filter(
+            Q(
+                enrichment_status__in=[Status.PENDING, Status.FAILED],
+                updated_at__lt=stale_before,
+            )
+            | Q(
+                enrichment_status=Status.PROCESSING,
+                updated_at__lt=min(stale_before, processing_cutoff()),
+            ),
+            enrichment_attempts__lt=settings.ENRICHMENT_MAX_ATTEMPTS,
+        )
+        .order_by("updated_at")
+        .values_list("id", flat=True)[: settings.ENRICHMENT_BATCH_SIZE]
+    )
+    if not ids:
+        return
+
+    # Touch the batch so the next sweep does not publish it again
+    SessionAnalytics.objects.filter(id__in=ids).update(
+        enrichment_status=Status.PENDING, updated_at=timezone.now()
+    )
+    group(summarize_session.s(str(pk)) for pk in ids).apply_async(
+        priority=BACKFILL_PRIORITY
+    )
+    logger.info(f"Re-queued enrichment for {len(ids)} session(s)")
@@ -0,0 +1,73 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from .models import Child, Session, TranscriptSegment
+from .transcripts import SegmentConflict, append_segment, iter_turns, next_sequence
+
+TURNS = [
+    {"role": "assistant", "content": "Hello! Can you wave?", "timestamp": 1.0},
+    {"role": "child", "content": "hi", "timestamp": 2.5},
+]
+
+
+class AppendSegmentTests(TestCase):
+    def setUp(self):
+        parent = User.objects.create_user(username="parent", password="secret")
+        child = Child.objects.create(parent=parent, age=3, native_language="en")
+        self.session = Session.objects.create(child=child, livekit_room="room-1")
+
+    def test_resent_chunk_is_stored_once(self):
+        first, created = append_segment(self.session, 0, TURNS)
+        self.assertTrue(created)
+
+        again, created = append_segment(self.session, 0, list(TURNS))
+        self.assertFalse(created)
+        self.assertEqual(again.pk, first.pk)
+        segments = TranscriptSegment.objects.filter(session=self.session)
+        self.assertEqual(segments.count(), 1)
+        self.assertEqual(list(iter_turns(self.session)), TURNS)
+
+    def test_other_turns_under_a_stored_sequence_conflict(self):
+        append_segment(self.session, 0, TURNS)
+        with self.assertRaises(SegmentConflict):
+            append_segment(self.session, 0, TURNS[:1])
+        self.assertEqual(list(iter_turns(self.session)), TURNS)
+
+    def test_turns_are_read_back_in_sequence_order(self):
+        append_segment(self.session, 1, TURNS[1:])
+        append_segment(self.session, 0, TURNS[:1])
+        self.assertEqual(list(iter_turns(self.session)), TURNS)
+        self.assertEqual(list(iter_turns(self.session, after_sequence=0)), TURNS[1:])
+        self.assertEqual(next_sequence(self.session), 2)
+
+
+@override_settings(AGENT_SERVICE_TOKEN="service-secret")
+class AgentServiceCredentialTests(TestCase):
+    def setUp(self):
+        parent = User.objects.create_user(username="parent", password="secret")
+        self.child = Child.objects.create(parent=parent, age=3, native_language="en")
+        Session.objects.create(child=self.child, livekit_room="room-1")
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Service service-secret",
+            HTTP_X_CHAT_CHILD=str(self.child.pk),
+        )
+
+    def test_agent_endpoints_accept_the_service_credential(self):
+        response = self.client.get(f"/api/children/{self.child.pk}/prompt/")
+        self.assertIn(response.status_code, (200, 204))
+
+        response = self.client.post(
+            "/api/sessions/rooms/room-1/transcript/",
+            {"sequence": 0, "turns": TURNS},
+            format="json",
+        )
+        self.assertIn(response.status_code, (200, 201))
+
+    def test_other_endpoints_refuse_the_service_credential(self):
+        self.assertEqual(self.client.get("/api/children/").status_code, 401)
+        self.assertEqual(self.client.get("/api/sessions/").status_code, 401)
+        self.assertEqual(self.client.get("/api/analytics/").status_code, 401)
+        response = self.client.get("/api/sessions/rooms/room-1/transcript/")
+        self.assertEqual(response.status_code, 401)
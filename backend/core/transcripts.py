@@ -0,0 +1,85 @@
+"""
+Session transcript store: append-only zstd-compressed JSON segments.
+
+The agent uploads turns in small chunks while the session runs; readers
+decompress one segment at a time, so memory stays bounded by the segment
+size rather than the session length.
+"""
+
+import json
+
+import zstandard
+from django.db import IntegrityError, transaction
+
+from .models import TranscriptSegment
+
+ZSTD_LEVEL = 3
+
+# Segments fetched per database round trip when streaming
+READ_CHUNK_SEGMENTS = 20
+
+
+class SegmentConflict(Exception):
+    """A different chunk was already stored under this sequence number"""
+
+
+def encode_turns(turns):
+    """Return (compressed bytes, uncompressed size) for a list of turns"""
+    raw = json.dumps(turns, ensure_ascii=False, separators=(",", ":")).encode()
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw), len(raw)
+
+
+def decode_segment(data):
+    return json.loads(zstandard.ZstdDecompressor().decompress(bytes(data)))
+
+
+def append_segment(session, sequence, turns):
+    """
+    Store one chunk of turns. Retried uploads of the same chunk are accepted
+    without writing twice; returns (segment, created).
+    """
+    data, raw_size = encode_turns(turns)
+    try:
+        with transaction.atomic():
+            segment = TranscriptSegment.objects.create(
+                session=session,
+                sequence=sequence,
+                turn_count=len(turns),
+                raw_size=raw_size,
+                data=data,
+            )
+    except IntegrityError:
+        segment = TranscriptSegment.objects.get(session=session, sequence=sequence)
+        if bytes(segment.data) != data:
+            raise SegmentConflict(
+                f"Segment {sequence} of session {session.pk} already has other turns"
+            )
+        return segment, False
+    return segment, True
+
+
+def next_sequence(session):
+    last = (
+        TranscriptSegment.objects.filter(session=session)
+        .order_by("-sequence")
+        .values_list("sequence", flat=True)
+        .first()
+    )
+    return 0 if last is None else last + 1
+
+
+def iter_turns(session, after_sequence=None):
+    """Yield the session's turns in order, decompressing one segment at a time"""
+    segments = TranscriptSegment.objects.filter(session=session).order_by("sequence")
+    if after_sequence is not None:
+        segments = segments.filter(sequence__gt=after_sequence)
+    for data in segments.values_list("data", flat=True).iterator(
+        chunk_size=READ_CHUNK_SEGMENTS
+    ):
+        yield from decode_segment(data)
+
+
+def iter_ndjson(session, after_sequence=None):
+    """Streaming body for the read endpoint: one JSON turn per line"""
+    for turn in iter_turns(session, after_sequence):
+        yield json.dumps(turn, ensure_ascii=False) + "\n"
@@ -7,6 +7,7 @@ from .views import (
     ChildViewSet,
     SessionViewSet,
     SessionAnalyticsViewSet,
+    SessionUsageViewSet,
 )
 
 # Create a router and register our viewsets with it.
@@ -14,6 +15,7 @@ router = DefaultRouter()
 router.register(r"children", ChildViewSet, basename="child")
 router.register(r"sessions", SessionViewSet, basename="session")
 router.register(r"analytics", SessionAnalyticsViewSet, basename="analytics")
+router.register(r"usage", SessionUsageViewSet, basename="usage")
 
 # The API URLs are now determined automatically by the router.
 # Additionally, we include login URLs for the browsable API.
@@ -1,7 +1,16 @@
 import uuid
+from datetime import timedelta
 from django.contrib.auth.models import User
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django.utils.crypto import get_random_string
 from django.utils import timezone  # For end_session
+from django.utils.http import (
+    http_date,
+    parse_etags,
+    parse_http_date_safe,
+    quote_etag,
+)
 from django.conf import settings
 from django_ratelimit.decorators import ratelimit
 from django.utils.decorators import method_decorator
@@ -9,16 +18,24 @@ from rest_framework import viewsets, status, generics
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework_simplejwt.views import (
     TokenObtainPairView as BaseTokenObtainPairView,
 )
 from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
 import logging
 from rest_framework_simplejwt.views import TokenRefreshView as BaseTokenRefreshView
 
-from .models import Child, Session, SessionAnalytics
+from .authentication import AgentServiceEndpointsMixin
+from .models import Child, Session, SessionAnalytics, SessionUsage
+from .tasks import enqueue_enrichment
+from .transcripts import SegmentConflict, append_segment, iter_ndjson, next_sequence
 from .serializers import (
     SessionAnalyticsSerializer,
+    SessionUsageSerializer,
+    TranscriptChunkSerializer,
     UserSerializer,
     ChildSerializer,
     SessionSerializer,
@@ -96,7 +113,7 @@ class TokenRefreshView(BaseTokenRefreshView):
 # --- Core Model ViewSets ---
 
 
-class ChildViewSet(viewsets.ModelViewSet):  # Changed to ReadOnlyModelViewSet initially
+class ChildViewSet(AgentServiceEndpointsMixin, viewsets.ModelViewSet):  # Changed to ReadOnlyModelViewSet initially
     """
     API endpoint that allows Children to be viewed.
     Retrieves the child profile linked to the authenticated user.
@@ -107,6 +124,8 @@ class ChildViewSet(viewsets.ModelViewSet):  # Changed to ReadOnlyModelViewSet in
     serializer_class = ChildSerializer
 
     permission_classes = [IsAuthenticated]
+    # The agent reads the prompt with its service credential
+    agent_service_actions = {("get_conversation_prompt", "get")}
 
     def get_queryset(self):
         """
@@ -128,20 +147,49 @@ class ChildViewSet(viewsets.ModelViewSet):  # Changed to ReadOnlyModelViewSet in
         name="Child's Conversation Prompt",
     )
     def get_conversation_prompt(self, request, pk=None):
-        """Get child's custom conversation props"""
+        """
+        Get child's custom conversation props.
+        Responses carry ETag/Last-Modified derived from Child.updated_at, and
+        conditional requests that still match are answered with 304.
+        """
         child = self.get_object()
+
+        etag = quote_etag(f"{child.pk}-{child.updated_at.timestamp():.6f}")
+        last_modified = http_date(child.updated_at.timestamp())
+        validators = {
+            "ETag": etag,
+            "Last-Modified": last_modified,
+            "Cache-Control": "private, no-cache",
+        }
+
+        if_none_match = request.headers.get("If-None-Match")
+        if_modified_since = parse_http_date_safe(
+            request.headers.get("If-Modified-Since", "")
+        )
+        if if_none_match is not None:
+            not_modified = etag in parse_etags(if_none_match) or if_none_match == "*"
+        else:
+            not_modified = if_modified_since is not None and int(
+                child.updated_at.timestamp()
+            ) <= if_modified_since
+        if not_modified:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=validators)
+
         if child.conversation_prompt:
             return Response(
-                {"conversation_prompt": child.conversation_prompt}, status.HTTP_200_OK
+                {"conversation_prompt": child.conversation_prompt},
+                status.HTTP_200_OK,
+                headers=validators,
             )
         else:
             return Response(
                 {"detail": "No conversation prompt available."},
                 status.HTTP_204_NO_CONTENT,
+                headers=validators,
             )
 
 
-class SessionViewSet(viewsets.ModelViewSet):
+class SessionViewSet(AgentServiceEndpointsMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows Sessions to be viewed or managed.
     - GET /api/sessions/ -> lists sessions for the user's child.
@@ -153,6 +201,8 @@ class SessionViewSet(viewsets.ModelViewSet):
 
     serializer_class = SessionSerializer
     permission_classes = [IsAuthenticated]
+    # The agent appends transcript chunks with its service credential
+    agent_service_actions = {("room_transcript", "post")}
 
     def get_queryset(self):
         """
@@ -296,9 +346,63 @@ class SessionViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class SessionAnalyticsViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=["get", "post"], url_path="transcript")
+    def transcript(self, request, pk=None):
+        """
+        GET streams the stored transcript as NDJSON (one turn per line);
+        POST appends a chunk of turns: { "sequence": 3, "turns": [...] }.
+        """
+        return self._transcript(request, self.get_object())
+
+    @action(
+        detail=False,
+        methods=["get", "post"],
+        url_path=r"rooms/(?P<livekit_room>[\w-]+)/transcript",
+        name="Room Transcript",
+    )
+    def room_transcript(self, request, livekit_room=None):
+        """Same as /{id}/transcript/, addressed by the LiveKit room (used by the agent)"""
+        session = get_object_or_404(self.get_queryset(), livekit_room=livekit_room)
+        return self._transcript(request, session)
+
+    def _transcript(self, request, session):
+        if request.method == "GET":
+            after = request.query_params.get("after_sequence")
+            try:
+                after = int(after) if after is not None else None
+            except ValueError:
+                raise ValidationError({"after_sequence": "Must be an integer."})
+            return StreamingHttpResponse(
+                iter_ndjson(session, after), content_type="application/x-ndjson"
+            )
+
+        serializer = TranscriptChunkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        sequence = serializer.validated_data.get("sequence")
+        if sequence is None:
+            sequence = next_sequence(session)
+        try:
+            segment, created = append_segment(
+                session, sequence, serializer.validated_data["turns"]
+            )
+        except SegmentConflict as e:
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
+
+        return Response(
+            {
+                "sequence": segment.sequence,
+                "turn_count": segment.turn_count,
+                "stored_bytes": len(segment.data),
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+
+class SessionAnalyticsViewSet(AgentServiceEndpointsMixin, viewsets.ModelViewSet):
     serializer_class = SessionAnalyticsSerializer
     permission_classes = [IsAuthenticated]
+    # The agent delivers analytics with its service credential
+    agent_service_actions = {("create", "post")}
 
     def get_queryset(self):
         """
@@ -327,22 +431,151 @@ class SessionAnalyticsViewSet(viewsets.ModelViewSet):
         """
         return {"request": self.request}
 
-    def perform_create(self, serializer):
-        child_id = serializer.validated_data.pop("child_id")
+    def create(self, request, *args, **kwargs):
+        """
+        Store the analytics of a session once. The agent resends a payload
+        until it sees a response, so a session that already has analytics
+        answers 200 with them instead of storing anything again.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            analytics, created = self._store_analytics(serializer)
+        except SegmentConflict as e:
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
+
+        return Response(
+            self.get_serializer(analytics).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+    def _store_analytics(self, serializer):
+        data = serializer.validated_data
+        child_id = data.pop("child_id")
         try:
             child = self.request.user.children.get(id=child_id)
         except Child.DoesNotExist:
-            return Response(
-                {"error": "You do not have permission for this child."},
-                status=status.HTTP_403_FORBIDDEN,
-            )
-
-        # Use latest session for this child
-        session = child.sessions.order_by("-started_at").first()
+            raise PermissionDenied("You do not have permission for this child.")
+
+        sessions = child.sessions.all()
+        livekit_room = data.pop("livekit_room", None)
+        if livekit_room:
+            sessions = sessions.filter(livekit_room=livekit_room)
+        # Older agents do not say which session: use the latest one
+        session = sessions.order_by("-started_at").first()
         if not session:
-            return Response(
-                {"message": "No session exists for this child."},
-                status=status.HTTP_400_BAD_REQUEST,
+            raise ValidationError({"message": "No session exists for this child."})
+
+        chunks = data.pop("transcript_chunks", None) or []
+        transcript = data.pop("transcript", None)
+        usage = data.pop("usage", None)
+
+        with transaction.atomic():
+            # Serializes concurrent deliveries of the same session
+            Session.objects.select_for_update().filter(pk=session.pk).first()
+            existing = SessionAnalytics.objects.filter(session=session).first()
+            if existing is not None:
+                return existing, False
+
+            for chunk in chunks:
+                sequence = chunk.get("sequence")
+                if sequence is None:
+                    sequence = next_sequence(session)
+                append_segment(session, sequence, chunk["turns"])
+            if transcript:
+                append_segment(session, next_sequence(session), transcript)
+
+            if usage:
+                SessionUsage.objects.update_or_create(session=session, defaults=usage)
+
+            # Summary, topics and derived metrics are filled in by core.tasks
+            analytics = serializer.save(
+                session=session,
+                enrichment_status=SessionAnalytics.EnrichmentStatus.PENDING,
             )
+            enqueue_enrichment(analytics.pk)
+        return analytics, True
+
+
+class SessionUsageViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Provider usage and estimated cost per session.
+    - GET /api/usage/ -> per-session usage, newest first.
+    - GET /api/usage/by-child/ -> totals per child.
+    - GET /api/usage/by-day/ -> totals per day.
+    Optional filters: `child_id`, `days` (look-back window, default 30).
+    """
+
+    serializer_class = SessionUsageSerializer
+    permission_classes = [IsAuthenticated]
+
+    TOTALS = {
+        "sessions": Count("id"),
+        "llm_requests": Sum("llm_requests"),
+        "llm_prompt_tokens": Sum("llm_prompt_tokens"),
+        "llm_cached_tokens": Sum("llm_cached_tokens"),
+        "llm_completion_tokens": Sum("llm_completion_tokens"),
+        "tts_characters": Sum("tts_characters"),
+        "tts_audio_seconds": Sum("tts_audio_seconds"),
+        "stt_audio_seconds": Sum("stt_audio_seconds"),
+        "avatar_render_seconds": Sum("avatar_render_seconds"),
+        "estimated_cost_usd": Sum("estimated_cost_usd"),
+    }
+
+    def get_queryset(self):
+        user = self.request.user
+        if not hasattr(user, "children"):
+            return SessionUsage.objects.none()
 
-        serializer.save(session=session)
+        queryset = (
+            SessionUsage.objects.filter(session__child__in=user.children.all())
+            .select_related("session__child")
+            .order_by("-session__started_at")
+        )
+
+        child_id = self.request.query_params.get("child_id")
+        if child_id:
+            queryset = queryset.filter(session__child__id=child_id)
+
+        days = self.request.query_params.get("days", "30")
+        try:
+            days = int(days)
+        except ValueError:
+            raise ValidationError({"days": "Must be an integer."})
+        if days > 0:
+            since = timezone.now() - timedelta(days=days)
+            queryset = queryset.filter(session__started_at__gte=since)
+
+        return queryset
+
+    @action(detail=False, methods=["get"], url_path="by-child", name="Usage per Child")
+    def by_child(self, request):
+        rows = (
+            self.get_queryset()
+            .order_by()
+            .values("session__child_id", "session__child__name")
+            .annotate(**self.TOTALS)
+            .order_by("-estimated_cost_usd")
+        )
+        return Response(
+            [
+                {
+                    "child_id": row.pop("session__child_id"),
+                    "child": row.pop("session__child__name"),
+                    **row,
+                }
+                for row in rows
+            ]
+        )
+
+    @action(detail=False, methods=["get"], url_path="by-day", name="Usage per Day")
+    def by_day(self, request):
+        rows = (
+            self.get_queryset()
+            .order_by()
+            .annotate(day=TruncDate("session__started_at"))
+            .values("day")
+            .annotate(**self.TOTALS)
+            .order_by("-day")
+        )
+        return Response(list(rows))
@@ -208,14 +208,14 @@ from datetime import timedelta
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(
-        minutes=int(os.getenv("DJANGO_JWT_ACCESS_TOKEN_LIFETIME_MINUTES", "60"))
+        minutes=int(os.getenv("DJANGO_JWT_ACCESS_TOKEN_LIFETIME_MINUTES", "15"))
     ),
     "REFRESH_TOKEN_LIFETIME": timedelta(
         days=int(os.getenv("DJANGO_JWT_REFRESH_TOKEN_LIFETIME_DAYS", "7"))
     ),
     "ROTATE_REFRESH_TOKENS": True,  # When a refresh token is used, a new one is issued
     "BLACKLIST_AFTER_ROTATION": True,  # Blacklists the old refresh token
-    "UPDATE_LAST_LOGIN": True,  # Updates User.last_login field upon successful token refresh
+    "UPDATE_LAST_LOGIN": False,  # True updates User.last_login on each token login
     "ALGORITHM": "HS256",
     "SIGNING_KEY": SECRET_KEY,  # Uses Django's SECRET_KEY by default
     "VERIFYING_KEY": None,
@@ -331,6 +331,32 @@ CELERY_TIMEZONE = TIME_ZONE  # Use Django's timezone
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # Example: 30 minutes time limit for tasks
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1  # LLM tasks are slow; don't hoard them
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    "queue_order_strategy": "priority",
+    "priority_steps": list(range(10)),
+}
+CELERY_TASK_ROUTES = {
+    "core.tasks.summarize_session": {"queue": "summaries"},
+    "core.tasks.sweep_pending_enrichment": {"queue": "maintenance"},
+}
+CELERY_BEAT_SCHEDULE = {
+    "sweep-pending-enrichment": {
+        "task": "core.tasks.sweep_pending_enrichment",
+        "schedule": 60.0,
+    },
+}
+
+# Session enrichment (core.tasks)
+ENRICHMENT_BATCH_SIZE = int(os.getenv("ENRICHMENT_BATCH_SIZE", "50"))
+ENRICHMENT_STALE_MINUTES = int(os.getenv("ENRICHMENT_STALE_MINUTES", "10"))
+ENRICHMENT_MAX_ATTEMPTS = int(os.getenv("ENRICHMENT_MAX_ATTEMPTS", "8"))
+
+# Transcript store (core.transcripts): turns accepted per appended chunk, and
+# the most recent turns sent to the summary model for very long sessions
+TRANSCRIPT_MAX_CHUNK_TURNS = int(os.getenv("TRANSCRIPT_MAX_CHUNK_TURNS", "200"))
+SUMMARY_MAX_TURNS = int(os.getenv("SUMMARY_MAX_TURNS", "400"))
 
 # Django Prometheus settings (already added to INSTALLED_APPS and MIDDLEWARE)
 # No specific settings usually required here unless customizing metrics.
@@ -353,6 +379,9 @@ LIVEKIT_API_KEY = os.getenv("LIVEKIT_API_KEY")
 LIVEKIT_API_SECRET = os.getenv("LIVEKIT_API_SECRET")
 LIVEKIT_WS_URL = os.getenv("LIVEKIT_WS_URL")
 
+# Shared secret the agent presents instead of a user's JWT (empty disables it)
+AGENT_SERVICE_TOKEN = os.getenv("AGENT_SERVICE_TOKEN", "")
+
 # Google Generative AI SDK Settings
 GENAI_API_KEY = os.getenv("GENAI_API_KEY")
 GENAI_MODEL_NAME = os.getenv(
@@ -407,16 +436,6 @@ LOGGING = {
     },
 }
 
-
-# Simple JWT settings
-
-SIMPLE_JWT = {
-    "ACCESS_TOKEN_LIFETIME": timedelta(minutes=15),
-    "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
-    "ROTATE_REFRESH_TOKENS": True,
-    "BLACKLIST_AFTER_ROTATION": True,
-}
-
 # Email Configurations
 EMAIL_HOST = os.getenv("EMAIL_HOST")
 EMAIL_PORT = int(os.getenv("EMAIL_PORT", 587))  # Manual casting is needed
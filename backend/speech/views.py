@@ -72,10 +72,12 @@ class LiveKitTokenView(GenericAPIView):
 
         # Security: Validate that the identity belongs to the requesting user's child
         # This is crucial to prevent users from generating tokens for arbitrary identities/rooms.
-        if (
-            not hasattr(request.user, "children")
-            or not request.user.children.filter(id=identity).exists()
-        ):
+        child = (
+            request.user.children.filter(id=identity).first()
+            if hasattr(request.user, "children")
+            else None
+        )
+        if child is None:
             return Response(
                 {
                     "error": "Invalid identity. Token can only be generated for the authenticated user's child."
@@ -113,6 +115,8 @@ class LiveKitTokenView(GenericAPIView):
             metadata = json.dumps(
                 {
                     "authToken": application_jwt,
+                    # Lets the agent pick language-specific analytics tables
+                    "nativeLanguage": child.native_language,
                 }
             )
 